@@ -1,4 +1,5 @@
 from django.contrib import admin
+from config.exportar import ExportacionMixin
 from .models import Category, Course, Module, Lesson, Enrollment, LessonProgress, Review, Certificate
 
 # =========================
@@ -7,7 +8,7 @@ from .models import Category, Course, Module, Lesson, Enrollment, LessonProgress
 class LessonInline(admin.TabularInline):
     model = Lesson
     extra = 1
-    fields = ("title", "order", "video_url")
+    fields = ("title", "order", "duration_minutes", "video_url")
     ordering = ("order",)
 
 
@@ -52,6 +53,7 @@ class CourseAdmin(admin.ModelAdmin):
 @admin.register(Module)
 class ModuleAdmin(admin.ModelAdmin):
     list_display = ("title", "course", "order")
+    list_select_related = ("course",)
     list_filter = ("course",)
     search_fields = ("title",)
     ordering = ("course", "order")
@@ -63,7 +65,8 @@ class ModuleAdmin(admin.ModelAdmin):
 # =========================
 @admin.register(Lesson)
 class LessonAdmin(admin.ModelAdmin):
-    list_display = ("title", "module", "order")
+    list_display = ("title", "module", "order", "duration_minutes")
+    list_select_related = ("module__course",)
     list_filter = ("module__course",)
     search_fields = ("title", "content")
     prepopulated_fields = {"slug": ("title",)}
@@ -74,8 +77,10 @@ class LessonAdmin(admin.ModelAdmin):
 # Inscripciones
 # =========================
 @admin.register(Enrollment)
-class EnrollmentAdmin(admin.ModelAdmin):
-    list_display = ("user", "course", "enrolled_at", "active")
+class EnrollmentAdmin(ExportacionMixin, admin.ModelAdmin):
+    list_display = ("user", "course", "enrolled_at", "active", "completed_lessons")
+    list_select_related = ("user", "course")
+    campos_exportacion = ("id", "user__username", "user__email", "course__title", "enrolled_at", "active")
     list_filter = ("active", "course")
     search_fields = ("user__username", "user__email", "course__title")
     date_hierarchy = "enrolled_at"
@@ -88,6 +93,7 @@ class EnrollmentAdmin(admin.ModelAdmin):
 @admin.register(LessonProgress)
 class LessonProgressAdmin(admin.ModelAdmin):
     list_display = ("enrollment", "lesson", "completed", "completed_at")
+    list_select_related = ("enrollment__user", "enrollment__course", "lesson__module__course")
     list_filter = ("completed", "lesson__module__course")
     search_fields = ("enrollment__user__username", "lesson__title")
     date_hierarchy = "completed_at"
@@ -98,8 +104,10 @@ class LessonProgressAdmin(admin.ModelAdmin):
 # Reseñas
 # =========================
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(ExportacionMixin, admin.ModelAdmin):
     list_display = ("course", "user", "rating", "created_at")
+    list_select_related = ("course", "user")
+    campos_exportacion = ("id", "course__title", "user__username", "rating", "comment", "created_at")
     list_filter = ("rating", "course")
     search_fields = ("user__username", "user__email", "course__title", "comment")
     date_hierarchy = "created_at"
@@ -112,6 +120,7 @@ class ReviewAdmin(admin.ModelAdmin):
 @admin.register(Certificate)
 class CertificateAdmin(admin.ModelAdmin):
     list_display = ("code", "enrollment", "issued_at")
+    list_select_related = ("enrollment__user", "enrollment__course")
     search_fields = ("code", "enrollment__user__username", "enrollment__course__title")
     date_hierarchy = "issued_at"
     ordering = ("-issued_at",)
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class AcademiaConfig(AppConfig):
     name = 'academia'
+
+    def ready(self):
+        # Conectar las señales que generan los PDF de los certificados
+        from . import signals  # noqa: F401
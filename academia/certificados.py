@@ -0,0 +1,153 @@
+"""
+Almacén de certificados en PDF.
+
+Un certificado no cambia una vez emitido, así que el PDF se genera una sola vez
+(al emitirlo o en la primera descarga) y se guarda en
+``MEDIA_ROOT/<CERTIFICADOS_DIR>/<código>-<versión>.pdf``. La versión es un hash
+de la plantilla: si la plantilla cambia, los PDF antiguos dejan de usarse y
+``manage.py renderizar_certificados`` los regenera en bloque.
+
+Las descargas se sirven desde el fichero con ETag, Last-Modified y soporte de
+``Range`` (un único rango), sin volver a pasar por weasyprint.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.template.loader import get_template
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+PLANTILLA = "academia/certificate.html"
+
+_RANGO = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+@lru_cache(maxsize=1)
+def version_plantilla():
+    """
+    Hash corto del código fuente de la plantilla (se calcula una vez por proceso).
+    """
+    fuente = get_template(PLANTILLA).template.source
+    return hashlib.sha256(fuente.encode()).hexdigest()[:12]
+
+
+def directorio():
+    return Path(settings.MEDIA_ROOT) / getattr(settings, "CERTIFICADOS_DIR", "certificados")
+
+
+def ruta(certificate):
+    return directorio() / f"{certificate.code}-{version_plantilla()}.pdf"
+
+
+def renderizar(certificate):
+    """
+    Genera el PDF del certificado y devuelve sus bytes.
+    """
+    # weasyprint es pesado y necesita librerías del sistema: solo se importa al renderizar
+    import weasyprint
+
+    course = certificate.enrollment.course
+    html = get_template(PLANTILLA).render({"course": course, "certificate": certificate})
+    return weasyprint.HTML(string=html).write_pdf()
+
+
+def guardar(certificate, forzar=False):
+    """
+    Devuelve la ruta del PDF del certificado, renderizándolo si no existe
+    para la versión actual de la plantilla.
+    """
+    destino = ruta(certificate)
+    if destino.exists() and not forzar:
+        return destino
+
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    pdf = renderizar(certificate)
+    # Escritura atómica: otra descarga simultánea nunca ve un PDF a medias
+    fd, temporal = tempfile.mkstemp(dir=destino.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fichero:
+            fichero.write(pdf)
+        os.replace(temporal, destino)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+
+    # Los PDF de versiones anteriores de la plantilla ya no se sirven
+    for antiguo in destino.parent.glob(f"{certificate.code}-*.pdf"):
+        if antiguo != destino:
+            antiguo.unlink(missing_ok=True)
+    return destino
+
+
+# -----------------------------
+# Descarga
+# -----------------------------
+
+def respuesta(request, certificate):
+    """
+    Sirve el PDF del certificado con validación condicional y rangos.
+    """
+    destino = guardar(certificate)
+    estado = destino.stat()
+    etag = quote_etag(f"{certificate.code}-{version_plantilla()}")
+    modificado = int(estado.st_mtime)
+
+    no_modificado = get_conditional_response(request, etag=etag, last_modified=modificado)
+    if no_modificado is not None:
+        return no_modificado
+
+    rango = _rango(request, etag, estado.st_size)
+    if rango == "invalido":
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{estado.st_size}"
+    elif rango:
+        inicio, fin = rango
+        with open(destino, "rb") as fichero:
+            fichero.seek(inicio)
+            response = HttpResponse(fichero.read(fin - inicio + 1), status=206,
+                                    content_type="application/pdf")
+        response["Content-Range"] = f"bytes {inicio}-{fin}/{estado.st_size}"
+    else:
+        response = FileResponse(open(destino, "rb"), content_type="application/pdf")
+
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(modificado)
+    response["Cache-Control"] = "private, max-age=0, must-revalidate"
+    response["Content-Disposition"] = f'attachment; filename="certificado_{certificate.code}.pdf"'
+    return response
+
+
+def _rango(request, etag, tamano):
+    """
+    Devuelve ``(inicio, fin)`` para una cabecera ``Range`` de un solo rango,
+    ``"invalido"`` si no se puede satisfacer o ``None`` para enviar el fichero entero.
+    """
+    cabecera = request.headers.get("Range")
+    if not cabecera or request.method != "GET":
+        return None
+    # If-Range con otro ETag: el cliente tiene una versión distinta, se envía entero
+    si_rango = request.headers.get("If-Range")
+    if si_rango and si_rango != etag:
+        return None
+
+    encontrado = _RANGO.match(cabecera.strip())
+    if not encontrado:
+        return None  # varios rangos u otras unidades: se ignora la cabecera
+    inicio, fin = encontrado.groups()
+    if not inicio:
+        if not fin or int(fin) == 0:
+            return "invalido"
+        inicio, fin = max(tamano - int(fin), 0), tamano - 1
+    else:
+        inicio = int(inicio)
+        fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or inicio > fin:
+        return "invalido"
+    return inicio, fin
@@ -0,0 +1,90 @@
+# academia/curriculo.py
+"""
+Temario de cada curso (módulos → lecciones) guardado en la caché de Django.
+
+Es un árbol de diccionarios (ids, títulos, slugs y duraciones) que se
+construye una vez con dos consultas y se invalida con las señales de Module y
+Lesson (ver academia/signals.py). Lo usan la ficha del curso, la vista de
+lección y la navegación anterior/siguiente.
+
+Con una caché local (LocMem) la invalidación solo llega al proceso que
+guardó el módulo o la lección; los demás ven el temario anterior hasta que
+caduca (``ACADEMIA_CURRICULO_TTL``, cinco minutos por defecto). Con varios
+workers conviene una caché compartida (aviso ``config.W001``).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Lesson, Module
+
+PREFIJO_CACHE = "academia:curriculo:"
+
+
+def _clave(course_id):
+    return f"{PREFIJO_CACHE}{course_id}"
+
+
+def construir(course_id):
+    modules = list(
+        Module.objects.filter(course_id=course_id).order_by("order", "pk").values("pk", "title", "order")
+    )
+    lessons = (Lesson.objects.filter(module__course_id=course_id)
+               .order_by("order", "pk")
+               .values("pk", "module_id", "title", "slug", "duration_minutes"))
+
+    por_modulo = {module["pk"]: [] for module in modules}
+    for lesson in lessons:
+        por_modulo[lesson["module_id"]].append({
+            "id": lesson["pk"],
+            "module_id": lesson["module_id"],
+            "title": lesson["title"],
+            "slug": lesson["slug"],
+            "duration_minutes": lesson["duration_minutes"],
+        })
+
+    arbol = []
+    ordenadas = []
+    for module in modules:
+        lecciones = por_modulo[module["pk"]]
+        ordenadas.extend(lecciones)
+        arbol.append({
+            "id": module["pk"],
+            "title": module["title"],
+            "order": module["order"],
+            "duration_minutes": sum(lesson["duration_minutes"] for lesson in lecciones),
+            "lessons": lecciones,
+        })
+    return {
+        "modules": arbol,
+        "lessons": ordenadas,
+        "duration_minutes": sum(module["duration_minutes"] for module in arbol),
+    }
+
+
+def obtener(course_id):
+    """
+    Devuelve el temario del curso (sin consultas si ya está en la caché).
+    """
+    curriculo = cache.get(_clave(course_id))
+    if curriculo is None:
+        curriculo = construir(course_id)
+        cache.set(_clave(course_id), curriculo, getattr(settings, "ACADEMIA_CURRICULO_TTL", 60 * 5))
+    return curriculo
+
+
+def invalidar(course_id):
+    cache.delete(_clave(course_id))
+
+
+def vecinas(curriculo, lesson_slug):
+    """
+    Devuelve ``(anterior, actual, siguiente)`` para la lección con ese slug
+    (``None`` donde no haya), siguiendo el orden de módulos y lecciones.
+    """
+    lecciones = curriculo["lessons"]
+    for i, lesson in enumerate(lecciones):
+        if lesson["slug"] == lesson_slug:
+            anterior = lecciones[i - 1] if i > 0 else None
+            siguiente = lecciones[i + 1] if i + 1 < len(lecciones) else None
+            return anterior, lesson, siguiente
+    return None, None, None
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from academia.models import Course
+
+
+class Command(BaseCommand):
+    help = "Recalcula la valoración media y el número de reseñas de los cursos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=500,
+                            help="Cursos que se actualizan en cada UPDATE")
+
+    def handle(self, *args, **options):
+        ids = list(Course.objects.order_by("pk").values_list("pk", flat=True))
+        for inicio in range(0, len(ids), options["lote"]):
+            Course.objects.filter(pk__in=ids[inicio:inicio + options["lote"]]).update_ratings()
+        self.stdout.write(self.style.SUCCESS(f"{len(ids)} cursos actualizados"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from academia import certificados
+from academia.models import Certificate
+
+
+class Command(BaseCommand):
+    help = "Genera los PDF de los certificados que no existen para la versión actual de la plantilla"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--forzar", action="store_true",
+                            help="Regenera también los PDF que ya existen")
+        parser.add_argument("--lote", type=int, default=200,
+                            help="Certificados que se leen de la base de datos por iteración")
+
+    def handle(self, *args, **options):
+        version = certificados.version_plantilla()
+        certificates = (Certificate.objects
+                        .select_related("enrollment__user", "enrollment__course")
+                        .order_by("pk"))
+        generados = existentes = errores = 0
+        for certificate in certificates.iterator(chunk_size=options["lote"]):
+            if certificados.ruta(certificate).exists() and not options["forzar"]:
+                existentes += 1
+                continue
+            try:
+                certificados.guardar(certificate, forzar=options["forzar"])
+                generados += 1
+            except Exception as exc:
+                errores += 1
+                self.stderr.write(f"{certificate.code}: {exc}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Plantilla {version}: {generados} generados, {existentes} ya existían, {errores} errores"
+        ))
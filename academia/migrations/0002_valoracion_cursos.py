@@ -0,0 +1,46 @@
+# Generated by Django 6.0.1 on 2026-10-17 10:40
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def calcular_valoraciones(apps, schema_editor):
+    Course = apps.get_model('academia', 'Course')
+    Review = apps.get_model('academia', 'Review')
+    reviews = Review.objects.filter(course=OuterRef('pk')).order_by().values('course')
+    Course.objects.update(
+        rating_count=Coalesce(Subquery(reviews.annotate(n=Count('pk')).values('n')), 0),
+        rating_avg=Coalesce(
+            Subquery(reviews.annotate(media=Avg('rating')).values('media'),
+                     output_field=models.DecimalField(max_digits=3, decimal_places=2)),
+            Value(Decimal('0')),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academia', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='rating_avg',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-rating_avg', '-rating_count'], name='course_pub_rating_idx'),
+        ),
+        migrations.RunPython(calcular_valoraciones, migrations.RunPython.noop),
+    ]
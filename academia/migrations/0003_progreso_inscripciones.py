@@ -0,0 +1,67 @@
+# Generated by Django 6.0.1 on 2026-10-17 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def calcular_progreso(apps, schema_editor):
+    """
+    Crea los contadores de las inscripciones existentes a partir de LessonProgress.
+    """
+    Enrollment = apps.get_model('academia', 'Enrollment')
+    Module = apps.get_model('academia', 'Module')
+    LessonProgress = apps.get_model('academia', 'LessonProgress')
+    ModuleProgress = apps.get_model('academia', 'ModuleProgress')
+
+    completadas = LessonProgress.objects.filter(enrollment=OuterRef('pk'), completed=True).order_by().values('enrollment')
+    Enrollment.objects.update(completed_lessons=Coalesce(
+        Subquery(completadas.annotate(n=Count('pk')).values('n')), 0
+    ))
+
+    por_modulo = {
+        (fila['enrollment_id'], fila['lesson__module_id']): fila['n']
+        for fila in LessonProgress.objects.filter(completed=True).order_by()
+        .values('enrollment_id', 'lesson__module_id').annotate(n=Count('pk'))
+    }
+    modulos = {}
+    for module_id, course_id in Module.objects.values_list('pk', 'course_id'):
+        modulos.setdefault(course_id, []).append(module_id)
+    nuevos = [
+        ModuleProgress(enrollment_id=enrollment_id, module_id=module_id,
+                       completed_lessons=por_modulo.get((enrollment_id, module_id), 0))
+        for enrollment_id, course_id in Enrollment.objects.values_list('pk', 'course_id').iterator()
+        for module_id in modulos.get(course_id, [])
+    ]
+    ModuleProgress.objects.bulk_create(nuevos, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academia', '0002_valoracion_cursos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_lessons',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ModuleProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_lessons', models.PositiveIntegerField(default=0)),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='module_progress', to='academia.enrollment')),
+                ('module', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='academia.module')),
+            ],
+            options={
+                'verbose_name': 'Progreso de módulo',
+                'verbose_name_plural': 'Progresos de módulos',
+                'unique_together': {('enrollment', 'module')},
+            },
+        ),
+        migrations.RunPython(calcular_progreso, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 11:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academia', '0003_progreso_inscripciones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='duration_minutes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
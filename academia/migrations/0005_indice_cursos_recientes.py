@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academia', '0004_duracion_lecciones'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at', '-id'], name='course_pub_recientes_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academia', '0005_indice_cursos_recientes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='course',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='lessons', to='academia.course'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:11
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def asignar_cursos(apps, schema_editor):
+    """
+    Copia el curso de cada módulo en sus lecciones y renombra los slugs repetidos dentro de un curso.
+    """
+    Lesson = apps.get_model('academia', 'Lesson')
+    Module = apps.get_model('academia', 'Module')
+    Lesson.objects.update(course=Subquery(Module.objects.filter(pk=OuterRef('module_id')).values('course_id')[:1]))
+
+    lecciones = list(Lesson.objects.order_by('course_id', 'pk').values_list('pk', 'course_id', 'slug'))
+    usados = {(course_id, slug) for _, course_id, slug in lecciones}
+    vistos = set()
+    cambios = []
+    for pk, course_id, slug in lecciones:
+        if (course_id, slug) in vistos:
+            n = 2
+            while (course_id, nuevo := f"{slug[:50 - len(str(n)) - 1]}-{n}") in usados:
+                n += 1
+            usados.add((course_id, nuevo))
+            cambios.append(Lesson(pk=pk, slug=nuevo))
+        vistos.add((course_id, slug))
+    Lesson.objects.bulk_update(cambios, ['slug'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academia', '0006_lesson_course'),
+    ]
+
+    operations = [
+        migrations.RunPython(asignar_cursos, migrations.RunPython.noop),
+    ]
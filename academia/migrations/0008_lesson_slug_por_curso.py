@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academia', '0007_asignar_curso_lecciones'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='lesson',
+            name='course',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='lessons', to='academia.course'),
+        ),
+        migrations.AddConstraint(
+            model_name='lesson',
+            constraint=models.UniqueConstraint(fields=('course', 'slug'), name='lesson_slug_por_curso'),
+        ),
+    ]
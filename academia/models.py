@@ -1,8 +1,15 @@
+from decimal import Decimal
+from functools import partial
+
 from django.db import models
+from django.db.models import Avg, Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
-from django.utils.text import slugify
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from config.slugs import guardar_con_slug
+
 User = get_user_model()
 
 # =========================
@@ -19,9 +26,10 @@ class Category(models.Model):
         ordering = ["name"]
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            guardar_con_slug(self, self.name, partial(super().save, *args, **kwargs))
 
     def __str__(self):
         return self.name
@@ -30,6 +38,26 @@ class Category(models.Model):
 # =========================
 # Cursos
 # =========================
+class CourseQuerySet(models.QuerySet):
+    def published(self):
+        return self.filter(is_published=True)
+
+    def update_ratings(self):
+        """
+        Recalcula rating_avg/rating_count de estos cursos con un solo UPDATE
+        (subconsultas sobre Review), sin traer las reseñas a Python.
+        """
+        reviews = Review.objects.filter(course=OuterRef("pk")).order_by().values("course")
+        return self.update(
+            rating_count=Coalesce(Subquery(reviews.annotate(n=Count("pk")).values("n")), 0),
+            rating_avg=Coalesce(
+                Subquery(reviews.annotate(media=Avg("rating")).values("media"),
+                         output_field=models.DecimalField(max_digits=3, decimal_places=2)),
+                Value(Decimal("0")),
+            ),
+        )
+
+
 class Course(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True, blank=True)
@@ -46,23 +74,36 @@ class Course(models.Model):
     )
     is_published = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Valoración desnormalizada: la mantienen las señales de Review (academia/signals.py)
+    rating_avg = models.DecimalField(max_digits=3, decimal_places=2, default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CourseQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Curso"
         verbose_name_plural = "Cursos"
         ordering = ["-created_at"]
+        indexes = [
+            # Listados de cursos publicados ordenados o filtrados por valoración
+            models.Index(fields=["-rating_avg", "-rating_count"], condition=models.Q(is_published=True),
+                         name="course_pub_rating_idx"),
+            # Listado por cursor de los más recientes (config/paginacion.py)
+            models.Index(fields=["-created_at", "-id"], condition=models.Q(is_published=True),
+                         name="course_pub_recientes_idx"),
+        ]
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            guardar_con_slug(self, self.title, partial(super().save, *args, **kwargs))
 
     def __str__(self):
         return self.title
 
     def average_rating(self):
-        ratings = self.reviews.all().values_list("rating", flat=True)
-        return sum(ratings) / len(ratings) if ratings else 0
+        return float(self.rating_avg) if self.rating_count else 0
 
 
 # =========================
@@ -78,6 +119,13 @@ class Module(models.Model):
         verbose_name_plural = "Módulos"
         ordering = ["order"]
 
+    def save(self, *args, **kwargs):
+        nuevo = self.pk is None
+        super().save(*args, **kwargs)
+        if not nuevo:
+            # Si el módulo cambia de curso, sus lecciones van con él (ver Lesson.course)
+            self.lessons.exclude(course_id=self.course_id).update(course_id=self.course_id)
+
     def __str__(self):
         return f"{self.course.title} - {self.title}"
 
@@ -87,21 +135,39 @@ class Module(models.Model):
 # =========================
 class Lesson(models.Model):
     module = models.ForeignKey(Module, related_name="lessons", on_delete=models.CASCADE)
+    # Copia de module.course: la URL de la lección lleva el slug del curso y
+    # la restricción de slug único por curso necesita la columna en esta tabla
+    course = models.ForeignKey(Course, related_name="lessons", on_delete=models.CASCADE, editable=False)
     title = models.CharField(max_length=200)
     slug = models.SlugField(blank=True)
     content = models.TextField(blank=True)
     video_url = models.URLField(blank=True)
+    duration_minutes = models.PositiveIntegerField(default=0)
     order = models.PositiveIntegerField(default=0)
 
     class Meta:
         verbose_name = "Lección"
         verbose_name_plural = "Lecciones"
         ordering = ["order"]
+        constraints = [
+            models.UniqueConstraint(fields=["course", "slug"], name="lesson_slug_por_curso"),
+        ]
+
+    def clean(self):
+        # La restricción incluye course, que no está en los formularios: se comprueba aquí
+        if self.slug and self.module_id:
+            otras = Lesson.objects.filter(course_id=self.module.course_id, slug=self.slug).exclude(pk=self.pk)
+            if otras.exists():
+                raise ValidationError({"slug": "Ya hay una lección con este slug en el curso."})
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        self.course_id = self.module.course_id
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            # Basta con que el slug sea único dentro del curso
+            guardar_con_slug(self, self.title, partial(super().save, *args, **kwargs),
+                             ambito={"course": self.course_id})
 
     def __str__(self):
         return f"{self.module.course.title} - {self.title}"
@@ -115,6 +181,8 @@ class Enrollment(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     enrolled_at = models.DateTimeField(auto_now_add=True)
     active = models.BooleanField(default=True)
+    # Contador de lecciones completadas (lo mantiene academia/progreso.py)
+    completed_lessons = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         verbose_name = "Inscripción"
@@ -143,6 +211,23 @@ class LessonProgress(models.Model):
         return f"{self.enrollment.user} - {self.lesson.title} ({'✔' if self.completed else '✘'})"
 
 
+class ModuleProgress(models.Model):
+    """
+    Lecciones completadas de un módulo por una inscripción (contador desnormalizado).
+    """
+    enrollment = models.ForeignKey(Enrollment, related_name="module_progress", on_delete=models.CASCADE)
+    module = models.ForeignKey(Module, on_delete=models.CASCADE)
+    completed_lessons = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Progreso de módulo"
+        verbose_name_plural = "Progresos de módulos"
+        unique_together = ("enrollment", "module")
+
+    def __str__(self):
+        return f"{self.enrollment.user} - {self.module.title} ({self.completed_lessons})"
+
+
 # =========================
 # Reseñas de cursos
 # =========================
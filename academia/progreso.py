@@ -0,0 +1,119 @@
+"""
+Progreso de los alumnos en un curso.
+
+- Al inscribirse se crean de una vez (bulk_create) las filas de LessonProgress
+  de todas las lecciones y las de ModuleProgress de todos los módulos.
+- Marcar o desmarcar una lección actualiza con ``F()`` los contadores de la
+  inscripción y del módulo, así el porcentaje completado nunca requiere contar filas.
+- ``arbol_progreso`` devuelve el curso completo (módulos → lecciones) con su
+  estado en un número fijo de consultas, sea cual sea el tamaño del curso.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Enrollment, Lesson, LessonProgress, Module, ModuleProgress
+
+
+def inicializar_progreso(enrollment):
+    """
+    Crea las filas de progreso de todas las lecciones y módulos del curso.
+    Es idempotente: las filas que ya existen no se tocan.
+    """
+    with transaction.atomic():
+        lesson_ids = Lesson.objects.filter(module__course_id=enrollment.course_id).values_list("pk", flat=True)
+        LessonProgress.objects.bulk_create(
+            [LessonProgress(enrollment=enrollment, lesson_id=pk) for pk in lesson_ids],
+            ignore_conflicts=True,
+        )
+        module_ids = Module.objects.filter(course_id=enrollment.course_id).values_list("pk", flat=True)
+        ModuleProgress.objects.bulk_create(
+            [ModuleProgress(enrollment=enrollment, module_id=pk) for pk in module_ids],
+            ignore_conflicts=True,
+        )
+
+
+def marcar(progress, completed):
+    """
+    Marca (o desmarca) una lección y ajusta los contadores en la misma transacción.
+    Devuelve ``True`` si el estado cambió.
+    """
+    with transaction.atomic():
+        # UPDATE condicional: dos peticiones simultáneas no cuentan la lección dos veces
+        cambiada = LessonProgress.objects.filter(pk=progress.pk, completed=not completed).update(
+            completed=completed,
+            completed_at=timezone.now() if completed else None,
+        )
+        if cambiada:
+            delta = 1 if completed else -1
+            Enrollment.objects.filter(pk=progress.enrollment_id).update(
+                completed_lessons=F("completed_lessons") + delta
+            )
+            module_id = Lesson.objects.filter(pk=progress.lesson_id).values_list("module_id", flat=True).get()
+            actualizados = ModuleProgress.objects.filter(
+                enrollment_id=progress.enrollment_id, module_id=module_id
+            ).update(completed_lessons=F("completed_lessons") + delta)
+            if not actualizados:
+                # Módulo añadido después de la inscripción
+                ModuleProgress.objects.create(
+                    enrollment_id=progress.enrollment_id, module_id=module_id,
+                    completed_lessons=max(delta, 0),
+                )
+    progress.refresh_from_db(fields=["completed", "completed_at"])
+    return bool(cambiada)
+
+
+def porcentaje(completadas, total):
+    return round(100 * completadas / total) if total else 0
+
+
+def arbol_progreso(enrollment):
+    """
+    Curso completo con el estado de cada lección y los contadores de cada módulo.
+
+    Consultas: módulos, lecciones, lecciones completadas y contadores de módulo
+    (4 en total, más la de la inscripción si no viene ya cargada).
+    """
+    course = enrollment.course
+    modules = list(Module.objects.filter(course=course).order_by("order", "pk"))
+    lessons = Lesson.objects.filter(module__course=course).order_by("order", "pk").values(
+        "pk", "module_id", "title", "slug"
+    )
+    completadas = set(
+        LessonProgress.objects.filter(enrollment=enrollment, completed=True).values_list("lesson_id", flat=True)
+    )
+    por_modulo = dict(
+        ModuleProgress.objects.filter(enrollment=enrollment).values_list("module_id", "completed_lessons")
+    )
+
+    lecciones_por_modulo = {module.pk: [] for module in modules}
+    for lesson in lessons:
+        lecciones_por_modulo[lesson["module_id"]].append({
+            "id": lesson["pk"],
+            "title": lesson["title"],
+            "slug": lesson["slug"],
+            "completed": lesson["pk"] in completadas,
+        })
+
+    arbol = []
+    total = 0
+    for module in modules:
+        lecciones = lecciones_por_modulo[module.pk]
+        total += len(lecciones)
+        arbol.append({
+            "id": module.pk,
+            "title": module.title,
+            "order": module.order,
+            "completed_lessons": por_modulo.get(module.pk, 0),
+            "total_lessons": len(lecciones),
+            "percent": porcentaje(por_modulo.get(module.pk, 0), len(lecciones)),
+            "lessons": lecciones,
+        })
+
+    return {
+        "course": {"id": course.pk, "title": course.title, "slug": course.slug},
+        "completed_lessons": enrollment.completed_lessons,
+        "total_lessons": total,
+        "percent": porcentaje(enrollment.completed_lessons, total),
+        "modules": arbol,
+    }
@@ -0,0 +1,66 @@
+# academia/signals.py
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import certificados, curriculo
+from .models import Certificate, Course, Enrollment, Lesson, LessonProgress, Module, ModuleProgress, Review
+from .tareas import generar_certificado
+
+
+@receiver(post_save, sender=Certificate)
+def renderizar_certificado(sender, instance, created, **kwargs):
+    """
+    El PDF se genera en segundo plano al emitir el certificado, así la primera
+    descarga ya es inmediata.
+    """
+    if created:
+        transaction.on_commit(lambda: generar_certificado.encolar(args=[instance.pk], unica=True))
+
+
+@receiver(post_delete, sender=Certificate)
+def borrar_pdf_certificado(sender, instance, **kwargs):
+    for pdf in certificados.directorio().glob(f"{instance.code}-*.pdf"):
+        pdf.unlink(missing_ok=True)
+
+
+@receiver([post_save, post_delete], sender=Review)
+def actualizar_valoracion_curso(sender, instance, **kwargs):
+    """
+    Mantiene Course.rating_avg/rating_count al crear, editar o borrar una reseña.
+    Se ejecuta dentro de la misma transacción que el cambio de la reseña.
+    """
+    Course.objects.filter(pk=instance.course_id).update_ratings()
+
+
+@receiver(pre_delete, sender=LessonProgress)
+def descontar_progreso(sender, instance, **kwargs):
+    """
+    Al borrar una lección completada (p. ej. en cascada con su lección) se
+    descuenta de los contadores de la inscripción y del módulo.
+    """
+    if not instance.completed:
+        return
+    Enrollment.objects.filter(pk=instance.enrollment_id, completed_lessons__gt=0).update(
+        completed_lessons=F("completed_lessons") - 1
+    )
+    ModuleProgress.objects.filter(
+        enrollment_id=instance.enrollment_id, module__lessons=instance.lesson_id, completed_lessons__gt=0
+    ).update(completed_lessons=F("completed_lessons") - 1)
+
+
+@receiver([post_save, post_delete], sender=Module)
+def invalidar_curriculo_modulo(sender, instance, **kwargs):
+    course_id = instance.course_id
+    transaction.on_commit(lambda: curriculo.invalidar(course_id))
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def invalidar_curriculo_leccion(sender, instance, **kwargs):
+    """
+    Cualquier cambio en una lección invalida el temario cacheado de su curso.
+    """
+    course_id = Module.objects.filter(pk=instance.module_id).values_list("course_id", flat=True).first()
+    if course_id is not None:  # al borrar un módulo en cascada ya lo invalida su propia señal
+        transaction.on_commit(lambda: curriculo.invalidar(course_id))
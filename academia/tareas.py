@@ -0,0 +1,17 @@
+# academia/tareas.py
+from tareas.cola import tarea
+
+from . import certificados
+from .models import Certificate
+
+
+@tarea()
+def generar_certificado(certificate_id):
+    """
+    Renderiza y guarda el PDF del certificado (ver academia/certificados.py).
+    """
+    certificate = (Certificate.objects
+                   .select_related("enrollment__user", "enrollment__course")
+                   .get(pk=certificate_id))
+    certificados.guardar(certificate)
+    return {"codigo": certificate.code, "version": certificados.version_plantilla()}
@@ -0,0 +1,151 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import signing
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from academia.models import Category, Course, Lesson, Module
+from config import slugs
+from config.paginacion import SAL, PaginadorKeyset
+
+
+def limpiar_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+class ListadoCursosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Category.objects.create(name="Aperturas")
+        for i in range(30):
+            Course.objects.create(
+                title=f"Curso {i}", short_description="Resumen", description="Descripción",
+                category=cls.categoria if i % 2 else None, is_published=True,
+                rating_avg=Decimal(i % 6), rating_count=i,
+            )
+
+    def setUp(self):
+        limpiar_caches()
+
+    def listado(self, **parametros):
+        respuesta = self.client.get(reverse("academia_listado"), parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta
+
+    def test_consultas_constantes(self):
+        # Página de cursos + total (que después queda en caché), con cualquier orden o filtro
+        for parametros in ({}, {"orden": "valoracion"}, {"orden": "populares", "valoracion_min": "2.5"},
+                           {"categoria": self.categoria.slug}):
+            with self.subTest(**parametros):
+                limpiar_caches()
+                with self.assertNumQueries(2):
+                    respuesta = self.listado(**parametros)
+                self.assertEqual(len(respuesta.context["cursos"]), 9)
+
+    def test_valoracion_minima(self):
+        respuesta = self.listado(valoracion_min="4")
+        self.assertTrue(respuesta.context["cursos"])
+        self.assertTrue(all(curso.rating_avg >= 4 for curso in respuesta.context["cursos"]))
+
+    def test_valoracion_minima_no_valida_se_ignora(self):
+        todos = [curso.pk for curso in self.listado().context["cursos"]]
+        for valor in ("nan", "inf", "-inf", "sNaN", "1e400", "-1", "6", "abc"):
+            with self.subTest(valor=valor):
+                self.assertEqual([curso.pk for curso in self.listado(valoracion_min=valor).context["cursos"]], todos)
+
+    def test_cursor_de_otro_orden_devuelve_la_primera_pagina(self):
+        for origen, destino in (("recientes", "valoracion"), ("valoracion", "populares"),
+                                ("populares", "recientes"), ("valoracion", "recientes")):
+            with self.subTest(origen=origen, destino=destino):
+                cursor = self.listado(orden=origen).context["page_obj"].next_page_number()
+                primera = [curso.pk for curso in self.listado(orden=destino).context["cursos"]]
+                respuesta = self.listado(orden=destino, page=cursor)
+                self.assertEqual([curso.pk for curso in respuesta.context["cursos"]], primera)
+                self.assertEqual(respuesta.context["page_obj"].number, 1)
+
+    def test_cursor_del_mismo_orden(self):
+        primera = self.listado(orden="valoracion").context["page_obj"]
+        segunda = self.listado(orden="valoracion", page=primera.next_page_number()).context["page_obj"]
+        self.assertEqual(segunda.number, 2)
+        self.assertFalse({curso.pk for curso in primera} & {curso.pk for curso in segunda})
+
+    def test_la_cota_del_cursor_es_la_que_recorre_el_indice(self):
+        cursor = self.listado().context["page_obj"].next_page_number()
+        with CaptureQueriesContext(connection) as consultas:
+            self.listado(page=cursor)
+        sql = consultas.captured_queries[0]["sql"]
+        self.assertIn("is_published", sql)
+        if connection.vendor == "sqlite":
+            self.assertIn('unlikely("academia_course"."created_at" <=', sql)
+
+    def test_cursor_no_valido(self):
+        paginador = PaginadorKeyset(Course.objects.order_by("-created_at"), 9)
+        # Firmado y del mismo orden, pero con valores que no son del tipo de la columna
+        mal_tipo = signing.dumps({"o": paginador.huella, "v": ["ayer", "x"], "n": 2, "a": False}, salt=SAL)
+        for page in ("abc", "0", "-1", "a" * 200, mal_tipo):
+            with self.subTest(page=page):
+                self.assertEqual(self.listado(page=page).context["page_obj"].number, 1)
+
+
+class DetalleCursoTests(TestCase):
+    def setUp(self):
+        limpiar_caches()
+
+    def test_curso_sin_publicar_se_puede_previsualizar(self):
+        self.client.force_login(User.objects.create_user("editora", is_staff=True))
+        borrador = Course.objects.create(title="Borrador", short_description="Resumen", description="Descripción")
+        respuesta = self.client.get(reverse("academia_curso_detalle", args=[borrador.slug]))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.context["curso"], borrador)
+
+
+class SlugLeccionesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.curso = Course.objects.create(title="Finales", short_description="Resumen", description="Descripción")
+        cls.otro = Course.objects.create(title="Aperturas", short_description="Resumen", description="Descripción")
+        cls.primero, cls.segundo = (Module.objects.create(course=cls.curso, title=f"Módulo {i}") for i in (1, 2))
+
+    def test_unico_dentro_del_curso(self):
+        self.assertEqual(Lesson.objects.create(module=self.primero, title="Introducción").slug, "introduccion")
+        self.assertEqual(Lesson.objects.create(module=self.segundo, title="Introducción").slug, "introduccion-2")
+        otra = Lesson.objects.create(module=Module.objects.create(course=self.otro, title="Único"), title="Introducción")
+        self.assertEqual((otra.course, otra.slug), (self.otro, "introduccion"))
+
+    def test_la_base_de_datos_rechaza_el_duplicado(self):
+        Lesson.objects.create(module=self.primero, title="Introducción")
+        with self.assertRaises(IntegrityError):
+            Lesson.objects.create(module=self.segundo, title="Otra", slug="introduccion")
+
+    def test_reintenta_si_otro_proceso_se_adelanta(self):
+        Lesson.objects.create(module=self.primero, title="Introducción")
+        slug_unico = slugs.slug_unico
+        # El primer cálculo devuelve el slug que otro proceso acaba de guardar
+        calculos = iter([lambda *args: "introduccion", slug_unico])
+        with mock.patch.object(slugs, "slug_unico", side_effect=lambda *args: next(calculos)(*args)) as calculo, \
+                transaction.atomic():
+            leccion = Lesson.objects.create(module=self.segundo, title="Introducción")
+            # El punto de guardado deja utilizable la transacción de fuera
+            self.assertEqual(Lesson.objects.filter(course=self.curso).count(), 2)
+        self.assertEqual(calculo.call_count, 2)
+        self.assertEqual(leccion.slug, "introduccion-2")
+
+    def test_el_modulo_se_lleva_sus_lecciones_a_otro_curso(self):
+        leccion = Lesson.objects.create(module=self.segundo, title="Introducción")
+        self.segundo.course = self.otro
+        self.segundo.save()
+        leccion.refresh_from_db()
+        self.assertEqual(leccion.course, self.otro)
+
+    def test_clean_avisa_del_slug_repetido(self):
+        Lesson.objects.create(module=self.primero, title="Introducción")
+        with self.assertRaises(ValidationError) as error:
+            Lesson(module=self.segundo, title="Otra", slug="introduccion").full_clean()
+        self.assertIn("slug", error.exception.message_dict)
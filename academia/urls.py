@@ -20,9 +20,13 @@ urlpatterns = [
     # Toggle progreso (AJAX)
     path('progress/<int:pk>/toggle/', views.toggle_progress, name='academia_toggle_progress'),
 
+    # Progreso del curso completo (JSON)
+    path('curso/<slug:slug>/progreso/', views.course_progress, name='academia_progreso'),
+
     # Añadir reseña
     path('curso/<slug:slug>/review/', views.add_review, name='academia_review'),
 
     # Certificado del curso
     path('curso/<slug:slug>/certificado/', views.certificate_view, name='academia_certificado'),
+    path('curso/<slug:slug>/certificado/pdf/', views.certificate_pdf, name='academia_certificado_pdf'),
 ]
@@ -1,24 +1,32 @@
+from decimal import Decimal, InvalidOperation
+
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import ListView, DetailView, TemplateView
 from django.contrib.auth.decorators import login_required
 from django.utils.decorators import method_decorator
-from django.http import JsonResponse
-from django.utils import timezone
-from django.template.loader import get_template
-from django.http import HttpResponse
-import weasyprint
+from django.http import Http404, JsonResponse
+
+from config.cache_paginas import cache_anonimo
+from config.paginacion import PaginadorKeyset
+from tareas.views import esperar
 
-from .models import Course, Module, Lesson, Enrollment, LessonProgress, Review, Certificate
+from . import certificados, curriculo, progreso
+from .models import Course, Lesson, Enrollment, LessonProgress, Review
+from .tareas import generar_certificado
 
 # =========================
 # Home
 # =========================
+@method_decorator(cache_anonimo("academia"), name="dispatch")
 class HomeView(TemplateView):
     template_name = "academia/home.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["latest_courses"] = Course.objects.filter(is_published=True).order_by("-created_at")[:6]
+        context["latest_courses"] = Course.objects.published().order_by("-created_at")[:6]
+        context["top_rated_courses"] = (Course.objects.published()
+                                        .filter(rating_count__gt=0)
+                                        .order_by("-rating_avg", "-rating_count")[:6])
         return context
 
 
@@ -31,30 +39,74 @@ class CourseListView(ListView):
     context_object_name = "cursos"
     paginate_by = 9
 
+    # ?orden=... (la valoración usa el índice course_pub_rating_idx)
+    ORDERINGS = {
+        "recientes": ("-created_at",),
+        "valoracion": ("-rating_avg", "-rating_count", "-created_at"),
+        "populares": ("-rating_count", "-rating_avg", "-created_at"),
+    }
+
     def get_queryset(self):
-        qs = Course.objects.filter(is_published=True).order_by("-created_at")
+        orden = self.request.GET.get("orden")
+        qs = Course.objects.published().order_by(*self.ORDERINGS.get(orden, self.ORDERINGS["recientes"]))
         category = self.request.GET.get("categoria")
         if category:
             qs = qs.filter(category__slug=category)
+        min_rating = self.valoracion_minima()
+        if min_rating:
+            qs = qs.filter(rating_avg__gte=min_rating)
         return qs
 
+    def valoracion_minima(self):
+        """
+        ?valoracion_min= como Decimal entre 0 y 5 (None si falta o no es válida: "nan", "inf", "9"...).
+        """
+        try:
+            valor = Decimal(self.request.GET.get("valoracion_min", ""))
+        except InvalidOperation:
+            return None
+        return valor if valor.is_finite() and 0 <= valor <= 5 else None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Filtros actuales para mantenerlos en los enlaces de paginación
+        params = self.request.GET.copy()
+        params.pop("page", None)
+        context["filtros"] = params.urlencode()
+        context["orden"] = self.request.GET.get("orden", "recientes")
+        return context
+
+    def paginate_queryset(self, queryset, page_size):
+        # Por cursor en vez de OFFSET (ver config/paginacion.py); las plantillas usan page_obj igual
+        paginator = PaginadorKeyset(queryset, page_size)
+        page = paginator.get_page(self.request.GET.get(self.page_kwarg))
+        return paginator, page, page.object_list, page.has_other_pages()
+
 
 # =========================
 # Detalle de curso
 # =========================
 class CourseDetailView(DetailView):
     model = Course
-    template_name = "academia/curso_detalle.html"
+    template_name = "academia/detalle.html"
+    context_object_name = "curso"
     slug_field = "slug"
     slug_url_kwarg = "slug"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         course = self.object
-        context["modules"] = course.modules.prefetch_related("lessons")
+        # Temario desde la caché (ver academia/curriculo.py)
+        curriculum = curriculo.obtener(course.pk)
+        context["modules"] = curriculum["modules"]
+        context["first_lesson"] = curriculum["lessons"][0] if curriculum["lessons"] else None
+        context["total_duration"] = curriculum["duration_minutes"]
         context["reviews"] = course.reviews.select_related("user")
         if self.request.user.is_authenticated:
-            context["enrolled"] = Enrollment.objects.filter(user=self.request.user, course=course).exists()
+            enrollment = (Enrollment.objects.select_related("certificate")
+                          .filter(user=self.request.user, course=course).first())
+            context["enrolled"] = enrollment is not None
+            context["certificate"] = getattr(enrollment, "certificate", None)
         return context
 
 
@@ -66,8 +118,8 @@ def enroll_course(request, slug):
     course = get_object_or_404(Course, slug=slug, is_published=True)
     enrollment, created = Enrollment.objects.get_or_create(user=request.user, course=course)
     if created:
-        # Aquí podrías generar certificado futuro o enviar email de bienvenida
-        pass
+        # Todas las filas de progreso de una vez (ver academia/progreso.py)
+        progreso.inicializar_progreso(enrollment)
     return redirect("academia_curso_detalle", slug=slug)
 
 
@@ -76,17 +128,33 @@ def enroll_course(request, slug):
 # =========================
 @login_required
 def lesson_view(request, course_slug, lesson_slug):
-    course = get_object_or_404(Course, slug=course_slug, is_published=True)
-    lesson = get_object_or_404(Lesson, module__course=course, slug=lesson_slug)
-    enrollment = Enrollment.objects.filter(user=request.user, course=course).first()
+    enrollment = (Enrollment.objects.select_related("course")
+                  .filter(user=request.user, course__slug=course_slug, course__is_published=True)
+                  .first())
     if not enrollment:
+        get_object_or_404(Course, slug=course_slug, is_published=True)
         return redirect("academia_curso_detalle", slug=course_slug)
+    course = enrollment.course
+
+    # Lección, anterior y siguiente desde el temario cacheado
+    curriculum = curriculo.obtener(course.pk)
+    previous_lesson, current, next_lesson = curriculo.vecinas(curriculum, lesson_slug)
+    if current is None:
+        raise Http404("Lección no encontrada")
+    lesson = get_object_or_404(Lesson, pk=current["id"])
 
+    # Existe desde la inscripción salvo para lecciones añadidas después
     progress, _ = LessonProgress.objects.get_or_create(enrollment=enrollment, lesson=lesson)
+    total_lessons = len(curriculum["lessons"])
     context = {
         "course": course,
         "lesson": lesson,
         "progress": progress,
+        "previous_lesson": previous_lesson,
+        "next_lesson": next_lesson,
+        "completed_lessons": enrollment.completed_lessons,
+        "total_lessons": total_lessons,
+        "percent": progreso.porcentaje(enrollment.completed_lessons, total_lessons),
     }
     return render(request, "academia/lesson_detalle.html", context)
 
@@ -97,10 +165,24 @@ def lesson_view(request, course_slug, lesson_slug):
 @login_required
 def toggle_progress(request, pk):
     progress = get_object_or_404(LessonProgress, pk=pk, enrollment__user=request.user)
-    progress.completed = not progress.completed
-    progress.completed_at = timezone.now() if progress.completed else None
-    progress.save()
-    return JsonResponse({"completed": progress.completed})
+    progreso.marcar(progress, not progress.completed)
+    completed_lessons = Enrollment.objects.values_list("completed_lessons", flat=True).get(pk=progress.enrollment_id)
+    return JsonResponse({"completed": progress.completed, "completed_lessons": completed_lessons})
+
+
+# =========================
+# Progreso del curso (API)
+# =========================
+@login_required
+def course_progress(request, slug):
+    """
+    Árbol del curso con el estado de cada lección, en un número fijo de consultas.
+    """
+    enrollment = get_object_or_404(
+        Enrollment.objects.select_related("course"),
+        user=request.user, course__slug=slug, course__is_published=True,
+    )
+    return JsonResponse(progreso.arbol_progreso(enrollment))
 
 
 # =========================
@@ -143,15 +225,11 @@ def certificate_pdf(request, slug):
     if not certificate:
         return redirect("academia_curso_detalle", slug=slug)
 
-    # Renderizar HTML
-    template = get_template("academia/certificate.html")
-    html = template.render({"course": course, "certificate": certificate})
-
-    # Generar PDF
-    pdf_file = weasyprint.HTML(string=html).write_pdf()
-
-    # Respuesta HTTP con PDF
-    response = HttpResponse(pdf_file, content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename="certificado_{certificate.code}.pdf"'
-    return response
+    # PDF guardado una sola vez por certificado y versión de la plantilla;
+    # si aún no existe se genera en segundo plano mientras el usuario espera
+    if not certificados.ruta(certificate).exists():
+        tarea = generar_certificado.encolar(args=[certificate.pk], usuario=request.user, unica=True)
+        if not certificados.ruta(certificate).exists():
+            return esperar(request, tarea, siguiente=request.get_full_path())
+    return certificados.respuesta(request, certificate)
 
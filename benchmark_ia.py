@@ -0,0 +1,80 @@
+"""
+Compara la generación una-pregunta-por-llamada (como hacía ia.views.chat_ia)
+con el motor de inferencia por lotes de ia/inferencia.py.
+
+Uso:
+    python benchmark_ia.py --preguntas 64 --concurrencia 16 --lote 8 --hilos 2
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+from ia.inferencia import MotorInferencia
+
+PREGUNTAS = [
+    "Hola Brayan, dame un consejo de ajedrez:",
+    "¿Cuál es la mejor apertura para principiantes?",
+    "¿Cómo se juega la defensa siciliana?",
+    "Explícame el enroque",
+    "¿Qué es una clavada en ajedrez?",
+    "Dame un ejercicio de táctica",
+    "¿Cómo mejorar en los finales de torres?",
+    "¿Qué significa controlar el centro?",
+]
+
+
+def secuencial(model, tokenizer, preguntas, parametros):
+    for pregunta in preguntas:
+        inputs = tokenizer(pregunta, return_tensors="pt")
+        outputs = model.generate(**inputs, pad_token_id=tokenizer.eos_token_id, **parametros)
+        tokenizer.decode(outputs[0])
+
+
+def por_lotes(motor, preguntas, parametros, concurrencia):
+    with ThreadPoolExecutor(max_workers=concurrencia) as clientes:
+        list(clientes.map(lambda p: motor.generar(p, **parametros), preguntas))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modelo", default="distilgpt2")
+    parser.add_argument("--preguntas", type=int, default=64)
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--lote", type=int, default=8)
+    parser.add_argument("--espera-ms", type=int, default=20)
+    parser.add_argument("--hilos", type=int, default=2)
+    args = parser.parse_args()
+
+    model = AutoModelForCausalLM.from_pretrained(args.modelo)
+    tokenizer = AutoTokenizer.from_pretrained(args.modelo)
+    preguntas = [PREGUNTAS[i % len(PREGUNTAS)] for i in range(args.preguntas)]
+    parametros = {"max_length": 100, "temperature": 0.7}
+
+    # Calentamiento para no medir la primera inicialización de PyTorch
+    secuencial(model, tokenizer, preguntas[:1], parametros)
+
+    inicio = time.perf_counter()
+    secuencial(model, tokenizer, preguntas, parametros)
+    t_secuencial = time.perf_counter() - inicio
+
+    motor = MotorInferencia(model, tokenizer, lote_maximo=args.lote,
+                            espera_maxima_ms=args.espera_ms, hilos=args.hilos)
+    inicio = time.perf_counter()
+    por_lotes(motor, preguntas, parametros, args.concurrencia)
+    t_lotes = time.perf_counter() - inicio
+    motor.cerrar()
+
+    print(f"Preguntas: {args.preguntas} | concurrencia: {args.concurrencia} | "
+          f"lote: {args.lote} | hilos: {args.hilos}")
+    print(f"Una por llamada: {t_secuencial:.2f} s  ({args.preguntas / t_secuencial:.2f} preguntas/s)")
+    print(f"Por lotes:       {t_lotes:.2f} s  ({args.preguntas / t_lotes:.2f} preguntas/s)")
+    print(f"Aceleración:     x{t_secuencial / t_lotes:.2f}")
+
+
+if __name__ == "__main__":
+    main()
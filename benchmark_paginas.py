@@ -0,0 +1,86 @@
+"""
+Peticiones por segundo de las páginas públicas sin caché y con la caché de
+páginas y fragmentos de config/cache_paginas.py.
+
+Las peticiones se hacen en el mismo proceso con el cliente de pruebas de
+Django (sin servidor HTTP), como visitante anónimo y como usuario identificado,
+contra la base de datos configurada.
+
+Uso:
+    python benchmark_paginas.py --peticiones 200 --concurrencia 4
+    python benchmark_paginas.py --usuario admin /tienda/ /blog/
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from config.cache_paginas import ALIAS
+
+PAGINAS = ["/", "/tienda/", "/cursos/", "/academia/", "/blog/", "/academia/cursos/"]
+
+# Antes: sin caché de páginas ni de fragmentos (el resto de alias se mantiene)
+SIN_CACHE = {**settings.CACHES, ALIAS: {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+def medir(url, peticiones, concurrencia, usuario=None):
+    host = next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+
+    def cliente():
+        c = Client(HTTP_HOST=host)
+        if usuario is not None:
+            c.force_login(usuario)
+        return c
+
+    clientes = [cliente() for _ in range(concurrencia)]
+    clientes[0].get(url)  # calentamiento: la primera petición rellena la caché
+
+    def lote(c, n):
+        for _ in range(n):
+            response = c.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+        connections.close_all()
+
+    por_cliente = peticiones // concurrencia
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as hilos:
+        list(hilos.map(lambda c: lote(c, por_cliente), clientes))
+    return por_cliente * concurrencia / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paginas", nargs="*", default=PAGINAS)
+    parser.add_argument("--peticiones", type=int, default=200)
+    parser.add_argument("--concurrencia", type=int, default=1)
+    parser.add_argument("--usuario", help="Mide también como este usuario identificado (fragmentos)")
+    args = parser.parse_args()
+
+    usuario = get_user_model().objects.get(username=args.usuario) if args.usuario else None
+    perfiles = [("anónimo", None)] + ([(args.usuario, usuario)] if usuario else [])
+
+    print(f"{'Página':<22}{'perfil':<12}{'sin caché':>12}{'con caché':>12}{'mejora':>9}")
+    for url in args.paginas:
+        for nombre, perfil in perfiles:
+            with override_settings(CACHES=SIN_CACHE):
+                antes = medir(url, args.peticiones, args.concurrencia, perfil)
+            caches[ALIAS].clear()
+            despues = medir(url, args.peticiones, args.concurrencia, perfil)
+            print(f"{url:<22}{nombre:<12}{antes:>10.0f}/s{despues:>10.0f}/s{despues / antes:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,18 @@
 from django.contrib import admin
-from django.http import HttpResponse
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
-import csv
 
-from .models import Categoria, Entrada
+from config.exportar import ExportacionMixin
+from config.imagenes import url_miniatura
+from tareas.views import esperar
+
+from .models import Categoria, Entrada, Etiqueta
+from .barra_lateral import invalidar_barra_lateral
+from .tareas import CAMPOS_EXPORTACION, exportar_entradas_csv
 
 
 @admin.register(Categoria)
-class CategoriaAdmin(admin.ModelAdmin):
+class CategoriaAdmin(ExportacionMixin, admin.ModelAdmin):
     list_display = ('id', 'nombre', 'slug', 'activa')
     search_fields = ('nombre', 'descripcion')
     list_filter = ('activa',)
@@ -22,8 +26,16 @@ class CategoriaAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(Etiqueta)
+class EtiquetaAdmin(ExportacionMixin, admin.ModelAdmin):
+    list_display = ('id', 'nombre', 'slug')
+    search_fields = ('nombre', 'slug')
+    ordering = ('nombre',)
+    list_per_page = 50
+
+
 @admin.register(Entrada)
-class EntradaAdmin(admin.ModelAdmin):
+class EntradaAdmin(ExportacionMixin, admin.ModelAdmin):
     # Columnas en la lista
     list_display = (
         'id', 'miniatura', 'titulo', 'categoria', 'autor',
@@ -62,7 +74,8 @@ class EntradaAdmin(admin.ModelAdmin):
         }),
     )
 
-    # Acciones en lote
+    # Acciones en lote (más exportar a CSV/JSON Lines en streaming, ver config/exportar.py)
+    campos_exportacion = CAMPOS_EXPORTACION
     actions = ['accion_publicar', 'accion_despublicar', 'accion_marcar_destacado',
                'accion_quitar_destacado', 'export_as_csv']
 
@@ -75,7 +88,7 @@ class EntradaAdmin(admin.ModelAdmin):
     def miniatura(self, obj):
         if getattr(obj, 'imagen_destacada', None):
             return format_html('<img src="{}" style="width: 80px; height: auto; object-fit: cover; border-radius:4px;" />',
-                               obj.imagen_destacada.url)
+                               url_miniatura(obj.imagen_destacada, 160) or obj.imagen_destacada.url)
         return "-"
     miniatura.short_description = "Imagen"
 
@@ -103,11 +116,13 @@ class EntradaAdmin(admin.ModelAdmin):
     # Acciones: publicar / despublicar
     def accion_publicar(self, request, queryset):
         updated = queryset.update(publicado=True)
+        invalidar_barra_lateral()  # update() no dispara señales
         self.message_user(request, _("%d entradas marcadas como publicadas.") % updated)
     accion_publicar.short_description = "Marcar seleccionadas como publicadas"
 
     def accion_despublicar(self, request, queryset):
         updated = queryset.update(publicado=False)
+        invalidar_barra_lateral()  # update() no dispara señales
         self.message_user(request, _("%d entradas despublicadas.") % updated)
     accion_despublicar.short_description = "Marcar seleccionadas como no publicadas"
 
@@ -128,29 +143,12 @@ class EntradaAdmin(admin.ModelAdmin):
             self.message_user(request, _("El modelo Entrada no tiene el campo 'destacado'."), level='warning')
     accion_quitar_destacado.short_description = "Quitar destacadas a las seleccionadas"
 
-    # Exportar seleccionadas a CSV
+    # Exportar seleccionadas a un CSV que se genera en segundo plano (ver blog/tareas.py)
     def export_as_csv(self, request, queryset):
-        meta = self.model._meta
-        field_names = ['id', 'titulo', 'slug', 'autor', 'categoria', 'publicado', 'fecha_publicacion']
-
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename=entradas_export.csv'
-        writer = csv.writer(response)
-
-        writer.writerow([meta.get_field(f).verbose_name.title() if hasattr(meta.get_field(f), 'verbose_name') else f for f in field_names])
-        for obj in queryset.select_related('autor', 'categoria'):
-            row = [
-                getattr(obj, 'id'),
-                getattr(obj, 'titulo'),
-                getattr(obj, 'slug'),
-                getattr(obj.autor, 'username', '') if getattr(obj, 'autor', None) else '',
-                getattr(obj.categoria, 'nombre', '') if getattr(obj, 'categoria', None) else '',
-                getattr(obj, 'publicado'),
-                getattr(obj, 'fecha_publicacion'),
-            ]
-            writer.writerow(row)
-        return response
-    export_as_csv.short_description = "Exportar seleccionadas a CSV"
+        ids = list(queryset.values_list('pk', flat=True))
+        tarea = exportar_entradas_csv.encolar(args=[ids], usuario=request.user)
+        return esperar(request, tarea)
+    export_as_csv.short_description = "Exportar seleccionadas a CSV (en segundo plano)"
 
     # Mensaje de ayuda en búsqueda (opcional)
     def changelist_view(self, request, extra_context=None):
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
+
+    def ready(self):
+        # Conectar las señales que invalidan la caché del blog
+        from . import signals  # noqa: F401
@@ -0,0 +1,40 @@
+# blog/barra_lateral.py
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Categoria, Entrada, Etiqueta
+
+CLAVE_CACHE = "blog:barra_lateral"
+
+
+def obtener_barra_lateral():
+    """
+    Devuelve el contexto de la barra lateral del blog ('categorias', 'recientes'
+    y la nube de 'etiquetas').
+
+    Se guarda en la caché de Django y se invalida con señales al guardar o borrar
+    una Entrada o Categoría (ver blog/signals.py). Si hay entradas programadas,
+    la caché caduca justo cuando se publica la siguiente.
+    """
+    datos = cache.get(CLAVE_CACHE)
+    if datos is None:
+        ahora = timezone.now()
+        datos = {
+            'categorias': list(Categoria.objects.filter(activa=True).order_by('nombre')),
+            'recientes': list(Entrada.objects.recientes(5)),
+            'etiquetas': list(Etiqueta.objects.nube(30)),
+        }
+        timeout = getattr(settings, 'BLOG_BARRA_LATERAL_TTL', 60 * 15)
+        siguiente = (Entrada.objects.filter(publicado=True, fecha_publicacion__gt=ahora)
+                     .order_by('fecha_publicacion')
+                     .values_list('fecha_publicacion', flat=True)
+                     .first())
+        if siguiente:
+            timeout = max(1, min(timeout, int((siguiente - ahora).total_seconds()) + 1))
+        cache.set(CLAVE_CACHE, datos, timeout)
+    return datos
+
+
+def invalidar_barra_lateral():
+    cache.delete(CLAVE_CACHE)
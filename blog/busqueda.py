@@ -0,0 +1,216 @@
+# blog/busqueda.py
+"""
+Búsqueda de texto completo en las entradas del blog.
+
+- SQLite: tabla virtual FTS5 ``blog_entrada_fts`` (sin acentos gracias a
+  ``unicode61 remove_diacritics 2``), sincronizada desde las señales de
+  ``Entrada`` (ver blog/signals.py) y ordenada por ``bm25``.
+- PostgreSQL: ``SearchVector`` con la configuración ``spanish_unaccent`` y un
+  índice GIN sobre la misma expresión (ver la migración 0003).
+- Otros motores: se mantiene la búsqueda con ``icontains``.
+
+Las palabras de la consulta se reducen a su raíz con un lematizador ligero
+para español y se buscan como prefijo: "aperturas" encuentra "apertura".
+"""
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+TABLA_FTS = "blog_entrada_fts"
+CONFIG_POSTGRES = "spanish_unaccent"
+
+# Marcadores del fragmento resaltado; se sustituyen por <mark> después de escapar el HTML
+_INICIO, _FIN = "\x02", "\x03"
+
+# Sufijos (sin tildes) que se eliminan para obtener la raíz, del más largo al más corto
+SUFIJOS = (
+    "amientos", "imientos", "aciones", "iciones", "amiento", "imiento", "idades",
+    "mente", "acion", "icion", "istas", "ables", "ibles", "idad", "ista", "able",
+    "ible", "osos", "osas", "ones", "oso", "osa", "es", "as", "os", "a", "o", "e", "s",
+)
+LONGITUD_MINIMA_RAIZ = 3
+
+
+def sin_acentos(texto):
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c)
+    )
+
+
+def raiz(palabra):
+    """
+    Lematizador ligero para español: minúsculas, sin tildes y sin sufijos comunes.
+    """
+    palabra = sin_acentos(palabra.lower())
+    for sufijo in SUFIJOS:
+        if palabra.endswith(sufijo) and len(palabra) - len(sufijo) >= LONGITUD_MINIMA_RAIZ:
+            return palabra[:-len(sufijo)]
+    return palabra
+
+
+def consulta_fts(texto):
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura: cada palabra
+    entre comillas (sin operadores) y como prefijo de su raíz.
+    """
+    palabras = re.findall(r"\w+", texto)
+    return " ".join(f'"{raiz(p)}"*' for p in palabras)
+
+
+def _motor():
+    if connection.vendor == "sqlite":
+        return "sqlite" if _tabla_fts_existe() else None
+    if connection.vendor == "postgresql":
+        return "postgresql"
+    return None
+
+
+def _tabla_fts_existe():
+    # Se comprueba una vez por conexión (la crea la migración 0003)
+    existe = getattr(connection, "_blog_tabla_fts", None)
+    if existe is None:
+        existe = TABLA_FTS in connection.introspection.table_names()
+        connection._blog_tabla_fts = existe
+    return existe
+
+
+def _resaltar(fragmento):
+    if not fragmento:
+        return None
+    html = escape(fragmento).replace(_INICIO, "<mark>").replace(_FIN, "</mark>")
+    return mark_safe(html)
+
+
+# -----------------------------
+# Sincronización del índice (SQLite)
+# -----------------------------
+
+def indexar(entrada):
+    if _motor() != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLA_FTS} WHERE rowid = %s", [entrada.pk])
+        cursor.execute(
+            f"INSERT INTO {TABLA_FTS} (rowid, titulo, contenido, etiquetas) VALUES (%s, %s, %s, %s)",
+            [entrada.pk, entrada.titulo, entrada.contenido, entrada.etiquetas],
+        )
+
+
+def desindexar(pk):
+    if _motor() != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLA_FTS} WHERE rowid = %s", [pk])
+
+
+# -----------------------------
+# Consultas
+# -----------------------------
+
+def _vector_postgres():
+    from django.contrib.postgres.search import SearchVector
+
+    return (
+        SearchVector("titulo", weight="A", config=CONFIG_POSTGRES)
+        + SearchVector("etiquetas", weight="A", config=CONFIG_POSTGRES)
+        + SearchVector("contenido", weight="B", config=CONFIG_POSTGRES)
+    )
+
+
+def _consulta_postgres(texto):
+    from django.contrib.postgres.search import SearchQuery
+
+    return SearchQuery(texto, config=CONFIG_POSTGRES, search_type="websearch")
+
+
+def buscar(texto, limite=None):
+    """
+    Devuelve los ids de las entradas publicadas que coinciden, del más al menos relevante.
+    """
+    from .models import Entrada
+
+    limite = limite or getattr(settings, "BLOG_BUSQUEDA_MAX_RESULTADOS", 1000)
+    publicadas = Entrada.objects.publicadas()
+    motor = _motor()
+
+    if motor == "sqlite":
+        consulta = consulta_fts(texto)
+        if not consulta:
+            return []
+        ids_publicadas, params = publicadas.order_by().values("pk").query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {TABLA_FTS} "
+                f"WHERE {TABLA_FTS} MATCH %s AND rowid IN ({ids_publicadas}) "
+                f"ORDER BY bm25({TABLA_FTS}, 10.0, 1.0, 5.0) LIMIT %s",
+                [consulta, *params, limite],
+            )
+            return [fila[0] for fila in cursor.fetchall()]
+
+    if motor == "postgresql":
+        from django.contrib.postgres.search import SearchRank
+
+        vector = _vector_postgres()
+        consulta = _consulta_postgres(texto)
+        return list(
+            publicadas.annotate(busqueda=vector, rango=SearchRank(vector, consulta))
+            .filter(busqueda=consulta)
+            .order_by("-rango", "-fecha_publicacion")
+            .values_list("pk", flat=True)[:limite]
+        )
+
+    return list(
+        publicadas.filter(
+            Q(titulo__icontains=texto) | Q(contenido__icontains=texto) | Q(etiquetas__icontains=texto)
+        )
+        .order_by("-fecha_publicacion")
+        .values_list("pk", flat=True)[:limite]
+    )
+
+
+def cargar_resultados(texto, ids):
+    """
+    Carga las entradas de ``ids`` (en ese orden) con su fragmento resaltado en ``.fragmento``.
+    Pensado para la página de resultados visible, no para todos los resultados.
+    """
+    from .models import Entrada
+
+    if not ids:
+        return []
+    entradas = Entrada.objects.select_related("autor", "categoria").in_bulk(ids)
+    fragmentos = {}
+    motor = _motor()
+
+    if motor == "sqlite":
+        marcadores = ", ".join(["%s"] * len(ids))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({TABLA_FTS}, 1, %s, %s, '…', 24) FROM {TABLA_FTS} "
+                f"WHERE {TABLA_FTS} MATCH %s AND rowid IN ({marcadores})",
+                [_INICIO, _FIN, consulta_fts(texto), *ids],
+            )
+            fragmentos = dict(cursor.fetchall())
+    elif motor == "postgresql":
+        from django.contrib.postgres.search import SearchHeadline
+
+        fragmentos = dict(
+            Entrada.objects.filter(pk__in=ids)
+            .annotate(fragmento=SearchHeadline(
+                "contenido", _consulta_postgres(texto), config=CONFIG_POSTGRES,
+                start_sel=_INICIO, stop_sel=_FIN, max_words=35, min_words=15,
+            ))
+            .values_list("pk", "fragmento")
+        )
+
+    resultados = []
+    for pk in ids:
+        entrada = entradas.get(pk)
+        if entrada is not None:
+            entrada.fragmento = _resaltar(fragmentos.get(pk))
+            resultados.append(entrada)
+    return resultados
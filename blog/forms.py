@@ -1,9 +1,10 @@
 # blog/forms.py
 from django import forms
 from django.core.exceptions import ValidationError
-from django.utils.text import slugify
 from .models import Entrada, Categoria
 
+from config.slugs import slug_unico
+
 class EntradaForm(forms.ModelForm):
     """
     Formulario para crear/editar entradas del blog.
@@ -69,7 +70,8 @@ class EntradaForm(forms.ModelForm):
         titulo = self.cleaned_data.get('titulo')
 
         if not slug and titulo:
-            slug = slugify(titulo)
+            # Sin slug escrito se usa el primero libre para el título (titulo, titulo-2...)
+            return slug_unico(self.instance, titulo)
 
         if not slug:
             raise ValidationError('El slug no puede estar vacío.')
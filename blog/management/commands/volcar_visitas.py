@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Entrada
+from blog.visitas import volcar
+
+
+class Command(BaseCommand):
+    help = "Vuelca a la base de datos las visitas del blog acumuladas en la caché"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lote", type=int, default=1000,
+                            help="Entradas que se consultan en la caché por iteración")
+
+    def handle(self, *args, **options):
+        ids = Entrada.objects.order_by().values_list('pk', flat=True)
+        total = 0
+        lote = []
+        for pk in ids.iterator(chunk_size=options["lote"]):
+            lote.append(pk)
+            if len(lote) >= options["lote"]:
+                total += volcar(lote)
+                lote = []
+        total += volcar(lote)
+        self.stdout.write(self.style.SUCCESS(f"{total} visitas volcadas"))
@@ -0,0 +1,58 @@
+# Índices de búsqueda de texto completo para blog.Entrada (ver blog/busqueda.py)
+
+from django.db import migrations
+
+TABLA_FTS = "blog_entrada_fts"
+INDICE_GIN = "blog_entrada_busqueda_gin"
+
+
+def crear_indice(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5("
+                "titulo, contenido, etiquetas, tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f"INSERT INTO {TABLA_FTS} (rowid, titulo, contenido, etiquetas) "
+                "SELECT id, titulo, contenido, etiquetas FROM blog_entrada"
+            )
+    elif connection.vendor == "postgresql":
+        # Configuración en español que además ignora las tildes
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        schema_editor.execute(
+            "DO $$ BEGIN "
+            "IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'spanish_unaccent') THEN "
+            "CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish); "
+            "ALTER TEXT SEARCH CONFIGURATION spanish_unaccent "
+            "ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem; "
+            "END IF; END $$"
+        )
+        # Misma expresión que blog.busqueda._vector_postgres para que el índice se use
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {INDICE_GIN} ON blog_entrada USING gin (("
+            "setweight(to_tsvector('spanish_unaccent'::regconfig, COALESCE(titulo::text, '')), 'A') || "
+            "setweight(to_tsvector('spanish_unaccent'::regconfig, COALESCE(etiquetas::text, '')), 'A') || "
+            "setweight(to_tsvector('spanish_unaccent'::regconfig, COALESCE(contenido::text, '')), 'B')"
+            "))"
+        )
+
+
+def borrar_indice(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {TABLA_FTS}")
+    elif connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP INDEX IF EXISTS {INDICE_GIN}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_entrada_destacado_entrada_visitas_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
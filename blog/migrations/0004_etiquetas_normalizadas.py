@@ -0,0 +1,54 @@
+# Generated by Django 6.0.1 on 2026-10-17 22:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_busqueda_texto_completo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Etiqueta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, verbose_name='Nombre')),
+                ('slug', models.SlugField(max_length=60, unique=True, verbose_name='Slug')),
+            ],
+            options={
+                'verbose_name': 'Etiqueta',
+                'verbose_name_plural': 'Etiquetas',
+                'ordering': ['nombre'],
+            },
+        ),
+        migrations.CreateModel(
+            name='EntradaEtiqueta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('orden', models.PositiveSmallIntegerField(default=0)),
+                ('entrada', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entrada_etiquetas', to='blog.entrada')),
+                ('etiqueta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entrada_etiquetas', to='blog.etiqueta')),
+            ],
+            options={
+                'verbose_name': 'Etiqueta de entrada',
+                'verbose_name_plural': 'Etiquetas de entradas',
+                'ordering': ['orden'],
+            },
+        ),
+        migrations.AddField(
+            model_name='entrada',
+            name='etiquetas_normalizadas',
+            field=models.ManyToManyField(blank=True, related_name='entradas', through='blog.EntradaEtiqueta', to='blog.etiqueta', verbose_name='Etiquetas normalizadas'),
+        ),
+        migrations.AddIndex(
+            model_name='entradaetiqueta',
+            index=models.Index(fields=['etiqueta', 'entrada'], name='blog_etiqueta_entrada_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='entradaetiqueta',
+            constraint=models.UniqueConstraint(fields=('entrada', 'etiqueta'), name='blog_entrada_etiqueta_unica'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Rellena las etiquetas normalizadas a partir del texto separado por comas
+
+from django.db import migrations
+from django.utils.text import slugify
+
+
+def separar_etiquetas(apps, schema_editor):
+    Entrada = apps.get_model('blog', 'Entrada')
+    Etiqueta = apps.get_model('blog', 'Etiqueta')
+    EntradaEtiqueta = apps.get_model('blog', 'EntradaEtiqueta')
+
+    # Misma normalización que blog.models.separar_etiquetas
+    por_entrada = {}
+    nombres = {}
+    for pk, texto in Entrada.objects.exclude(etiquetas='').values_list('pk', 'etiquetas').iterator():
+        slugs = []
+        for nombre in texto.split(','):
+            nombre = nombre.strip()[:50]
+            slug = slugify(nombre)
+            if slug and slug not in slugs:
+                slugs.append(slug)
+                nombres.setdefault(slug, nombre)
+        por_entrada[pk] = slugs
+
+    Etiqueta.objects.bulk_create(
+        [Etiqueta(nombre=nombre, slug=slug) for slug, nombre in nombres.items()],
+        ignore_conflicts=True, batch_size=500,
+    )
+    ids = dict(Etiqueta.objects.values_list('slug', 'pk'))
+    EntradaEtiqueta.objects.bulk_create(
+        [
+            EntradaEtiqueta(entrada_id=pk, etiqueta_id=ids[slug], orden=orden)
+            for pk, slugs in por_entrada.items()
+            for orden, slug in enumerate(slugs)
+        ],
+        ignore_conflicts=True, batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_etiquetas_normalizadas'),
+    ]
+
+    operations = [
+        migrations.RunPython(separar_etiquetas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.1 on 2026-10-17 12:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_separar_etiquetas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entrada',
+            index=models.Index(condition=models.Q(('publicado', True)), fields=['-fecha_publicacion', '-id'], name='entrada_pub_recientes_idx'),
+        ),
+    ]
@@ -1,23 +1,13 @@
-from django.db import models
+from functools import partial
+
+from django.db import models, transaction
+from django.db.models import Count, Q
 from django.utils.text import slugify
 from django.contrib.auth.models import User
 from django.core.validators import MinLengthValidator
 from django.utils import timezone
 
-
-def unique_slugify(instance, value, slug_field_name="slug"):
-    """
-    Genera un slug único basado en 'value'.
-    Si existe, añade sufijos -2, -3, ...
-    """
-    base_slug = slugify(value)[:50]  # límite razonable
-    slug = base_slug
-    ModelClass = instance.__class__
-    n = 2
-    while ModelClass.objects.filter(**{slug_field_name: slug}).exclude(pk=instance.pk).exists():
-        slug = f"{base_slug}-{n}"
-        n += 1
-    return slug
+from config.slugs import guardar_con_slug
 
 
 class Categoria(models.Model):
@@ -51,9 +41,62 @@ class Categoria(models.Model):
         return self.nombre
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = unique_slugify(self, self.nombre)
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            guardar_con_slug(self, self.nombre, partial(super().save, *args, **kwargs))
+
+
+def separar_etiquetas(texto):
+    """
+    Convierte "Táctica, finales, tactica" en [("Táctica", "tactica"), ("finales", "finales")]:
+    pares (nombre, slug) sin vacíos ni duplicados, en el orden escrito.
+    """
+    vistas = set()
+    resultado = []
+    for nombre in (texto or "").split(","):
+        nombre = nombre.strip()[:50]
+        slug = slugify(nombre)
+        if slug and slug not in vistas:
+            vistas.add(slug)
+            resultado.append((nombre, slug))
+    return resultado
+
+
+class EtiquetaQuerySet(models.QuerySet):
+    def nube(self, limite=30):
+        """
+        Etiquetas con el número de entradas publicadas de cada una, en una sola consulta.
+        """
+        publicadas = Q(
+            entrada_etiquetas__entrada__publicado=True,
+            entrada_etiquetas__entrada__fecha_publicacion__lte=timezone.now(),
+        )
+        return (self.annotate(total=Count('entrada_etiquetas', filter=publicadas))
+                .filter(total__gt=0)
+                .order_by('-total', 'nombre')[:limite])
+
+
+class Etiqueta(models.Model):
+    nombre = models.CharField(
+        max_length=50,
+        verbose_name="Nombre"
+    )
+    slug = models.SlugField(
+        max_length=60,
+        unique=True,
+        verbose_name="Slug"
+    )
+
+    objects = EtiquetaQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Etiqueta"
+        verbose_name_plural = "Etiquetas"
+        ordering = ['nombre']
+
+    def __str__(self):
+        return self.nombre
 
 
 class EntradaQuerySet(models.QuerySet):
@@ -66,6 +109,15 @@ class EntradaQuerySet(models.QuerySet):
     def recientes(self, limite=5):
         return self.publicadas().order_by('-fecha_publicacion')[:limite]
 
+    def con_etiquetas(self):
+        """
+        Precarga las etiquetas normalizadas (en su orden) para etiquetas_lista().
+        """
+        return self.prefetch_related(models.Prefetch(
+            'entrada_etiquetas',
+            queryset=EntradaEtiqueta.objects.select_related('etiqueta').order_by('orden'),
+        ))
+
 
 class Entrada(models.Model):
     titulo = models.CharField(
@@ -104,6 +156,14 @@ class Entrada(models.Model):
         help_text="Separar con comas",
         verbose_name="Etiquetas"
     )
+    # Índice normalizado de 'etiquetas' (se sincroniza al guardar)
+    etiquetas_normalizadas = models.ManyToManyField(
+        Etiqueta,
+        through='EntradaEtiqueta',
+        related_name='entradas',
+        blank=True,
+        verbose_name="Etiquetas normalizadas"
+    )
     imagen_destacada = models.ImageField(
         upload_to='blog/',
         blank=True,
@@ -157,6 +217,9 @@ class Entrada(models.Model):
         indexes = [
             models.Index(fields=['slug']),
             models.Index(fields=['publicado', 'fecha_publicacion']),
+            # Listados paginados por cursor (blog/views.py ORDEN_ENTRADAS)
+            models.Index(fields=['-fecha_publicacion', '-id'], condition=models.Q(publicado=True),
+                         name='entrada_pub_recientes_idx'),
             models.Index(fields=['destacado']),
             models.Index(fields=['visitas']),
         ]
@@ -165,9 +228,6 @@ class Entrada(models.Model):
         return self.titulo
 
     def save(self, *args, **kwargs):
-        # Slug único
-        if not self.slug:
-            self.slug = unique_slugify(self, self.titulo)
         # Resumen automático si está vacío
         if not self.resumen:
             self.resumen = (self.contenido.strip().replace("\n", " ")[:297] + '...') if len(self.contenido) > 300 else self.contenido
@@ -177,10 +237,50 @@ class Entrada(models.Model):
         if not self.meta_description:
             base = self.resumen or self.contenido
             self.meta_description = base[:160]
-        super().save(*args, **kwargs)
+        # Slug único
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            guardar_con_slug(self, self.titulo, partial(super().save, *args, **kwargs))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'etiquetas' in update_fields:
+            self.sincronizar_etiquetas()
+
+    def sincronizar_etiquetas(self):
+        """
+        Actualiza las etiquetas normalizadas a partir del texto 'etiquetas'.
+        Solo escribe si han cambiado.
+        """
+        deseadas = separar_etiquetas(self.etiquetas)
+        actuales = list(self.entrada_etiquetas.order_by('orden').values_list('etiqueta__slug', flat=True))
+        if actuales == [slug for _, slug in deseadas]:
+            return
+
+        with transaction.atomic():
+            slugs = [slug for _, slug in deseadas]
+            existentes = set(Etiqueta.objects.filter(slug__in=slugs).values_list('slug', flat=True))
+            nuevas = [Etiqueta(nombre=nombre, slug=slug) for nombre, slug in deseadas if slug not in existentes]
+            if nuevas:
+                Etiqueta.objects.bulk_create(nuevas, ignore_conflicts=True)
+            ids = dict(Etiqueta.objects.filter(slug__in=slugs).values_list('slug', 'pk'))
+            self.entrada_etiquetas.all().delete()
+            EntradaEtiqueta.objects.bulk_create([
+                EntradaEtiqueta(entrada=self, etiqueta_id=ids[slug], orden=orden)
+                for orden, slug in enumerate(slugs)
+            ])
+
+        # La nube de etiquetas de la barra lateral depende de esta relación
+        from .barra_lateral import invalidar_barra_lateral
+        invalidar_barra_lateral()
 
     def etiquetas_lista(self):
-        return [et.strip() for et in self.etiquetas.split(",") if et.strip()]
+        """
+        Nombres de las etiquetas. Usa las normalizadas si se precargaron con
+        con_etiquetas(); si no, separa el texto sin consultar la base de datos.
+        """
+        if 'entrada_etiquetas' in getattr(self, '_prefetched_objects_cache', {}):
+            return [rel.etiqueta.nombre for rel in self.entrada_etiquetas.all()]
+        return [nombre for nombre, _ in separar_etiquetas(self.etiquetas)]
 
     def tiempo_lectura_min(self):
         """
@@ -193,10 +293,14 @@ class Entrada(models.Model):
     def incrementar_visitas(self, save=True):
         """
         Incrementa el contador de visitas. Llamar desde la vista cuando se muestre la entrada.
+        Con save=True la visita se acumula en la caché y se vuelca a la base de datos
+        en bloque más tarde (ver blog/visitas.py), sin escribir en cada petición.
         """
-        self.visitas = (self.visitas or 0) + 1
         if save:
-            self.save(update_fields=['visitas'])
+            from .visitas import registrar_visita
+            self.visitas = (self.visitas or 0) + registrar_visita(self.pk)
+        else:
+            self.visitas = (self.visitas or 0) + 1
         return self.visitas
 
     def miniatura_url(self):
@@ -208,3 +312,32 @@ class Entrada(models.Model):
             return self.imagen_destacada.url if self.imagen_destacada else None
         except Exception:
             return None
+
+
+class EntradaEtiqueta(models.Model):
+    entrada = models.ForeignKey(
+        Entrada,
+        on_delete=models.CASCADE,
+        related_name='entrada_etiquetas'
+    )
+    etiqueta = models.ForeignKey(
+        Etiqueta,
+        on_delete=models.CASCADE,
+        related_name='entrada_etiquetas'
+    )
+    orden = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Etiqueta de entrada"
+        verbose_name_plural = "Etiquetas de entradas"
+        ordering = ['orden']
+        constraints = [
+            models.UniqueConstraint(fields=['entrada', 'etiqueta'], name='blog_entrada_etiqueta_unica'),
+        ]
+        indexes = [
+            # Búsqueda de entradas por etiqueta (la restricción única cubre entrada → etiqueta)
+            models.Index(fields=['etiqueta', 'entrada'], name='blog_etiqueta_entrada_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.entrada} · {self.etiqueta}"
@@ -0,0 +1,34 @@
+# blog/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import busqueda
+from .barra_lateral import invalidar_barra_lateral
+from .models import Categoria, Entrada
+
+
+@receiver([post_save, post_delete], sender=Entrada)
+@receiver([post_save, post_delete], sender=Categoria)
+def invalidar_cache_blog(sender, update_fields=None, **kwargs):
+    """
+    Cualquier cambio en entradas o categorías invalida la barra lateral cacheada.
+    Guardar solo el contador de visitas no afecta a la barra lateral.
+    """
+    if update_fields and set(update_fields) <= {'visitas'}:
+        return
+    invalidar_barra_lateral()
+
+
+@receiver(post_save, sender=Entrada)
+def indexar_entrada(sender, instance, update_fields=None, **kwargs):
+    """
+    Mantiene el índice de búsqueda de texto completo al día.
+    """
+    if update_fields and not set(update_fields) & {'titulo', 'contenido', 'etiquetas'}:
+        return
+    busqueda.indexar(instance)
+
+
+@receiver(post_delete, sender=Entrada)
+def desindexar_entrada(sender, instance, **kwargs):
+    busqueda.desindexar(instance.pk)
@@ -0,0 +1,24 @@
+# blog/tareas.py
+from config.exportar import cabecera, lineas_csv
+from tareas.cola import nuevo_fichero, tarea
+
+from .models import Entrada
+
+# Columnas de las exportaciones de entradas (también las usa EntradaAdmin)
+CAMPOS_EXPORTACION = (
+    'id', 'titulo', 'slug', 'autor__username', 'categoria__nombre', 'publicado', 'fecha_publicacion',
+)
+
+
+@tarea()
+def exportar_entradas_csv(ids):
+    """
+    Escribe las entradas indicadas en un CSV descargable desde la tarea.
+    """
+    ruta, resultado = nuevo_fichero('entradas_export.csv')
+    cabeceras = [cabecera(Entrada, campo) for campo in CAMPOS_EXPORTACION]
+    entradas = Entrada.objects.filter(pk__in=ids).order_by('pk')
+    with open(ruta, 'w', newline='', encoding='utf-8') as fichero:
+        fichero.writelines(lineas_csv(entradas, CAMPOS_EXPORTACION, cabeceras))
+    resultado["filas"] = len(ids)
+    return resultado
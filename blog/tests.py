@@ -0,0 +1,291 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import visitas
+from blog.barra_lateral import obtener_barra_lateral
+from blog.models import Categoria, Entrada, Etiqueta, separar_etiquetas
+from config import imagenes
+
+
+def limpiar_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+@override_settings(BLOG_VISITAS_VOLCADO_AUTOMATICO=False)
+class ConsultasVistasTests(TestCase):
+    """
+    Consultas de las vistas públicas del blog con la barra lateral ya en caché.
+
+    Cada página muestra 10 entradas con autor y categoría: si alguna se cargara
+    por separado (N+1), el número de consultas crecería en 10 o más.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        autor = User.objects.create_user("autora", password="clave-segura-123")
+        categorias = [Categoria.objects.create(nombre=f"Categoría {i}") for i in range(3)]
+        for i in range(40):
+            Entrada.objects.create(
+                titulo=f"Entrada de prueba {i}", contenido="Texto de la entrada " * 20,
+                autor=autor, categoria=categorias[i % 3], etiquetas="python, django",
+            )
+        cls.entrada = Entrada.objects.first()
+
+    def setUp(self):
+        limpiar_caches()
+        obtener_barra_lateral()
+        # El fondo de base.html encola la generación de sus derivadas en la primera visita
+        imagenes.miniaturas("img/fondo.png", 1536)
+
+    def assertConsultas(self, numero, url):
+        with self.assertNumQueries(numero):
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta
+
+    def test_listado(self):
+        # Entradas de la página + total (que después queda en caché)
+        respuesta = self.assertConsultas(2, reverse('blog:lista'))
+        self.assertEqual(len(respuesta.context['page_obj']), 10)
+
+    def test_listado_por_categoria(self):
+        self.assertConsultas(3, reverse('blog:por_categoria', args=[self.entrada.categoria.slug]))
+
+    def test_listado_por_etiqueta(self):
+        # Entradas + etiquetas precargadas + total
+        self.assertConsultas(3, reverse('blog:por_etiqueta', args=['python']))
+
+    def test_archivo(self):
+        fecha = self.entrada.fecha_publicacion
+        self.assertConsultas(2, reverse('blog:archivo', args=[fecha.year, fecha.month]))
+
+    def test_detalle(self):
+        # Entrada (con autor y categoría) + relacionadas; la visita se acumula en la caché
+        self.assertConsultas(2, reverse('blog:detalle', args=[self.entrada.slug]))
+
+    def test_barra_lateral_en_cache(self):
+        limpiar_caches()
+        self.client.get(reverse('blog:detalle', args=[self.entrada.slug]))
+        self.assertConsultas(2, reverse('blog:detalle', args=[self.entrada.slug]))
+
+
+class VisitantesMixin:
+    HILOS = 8
+    VISITAS_POR_HILO = 250
+
+    def visitar(self, inicio):
+        inicio.wait()
+        for i in range(self.VISITAS_POR_HILO):
+            visitas.registrar_visita(self.entradas[i % len(self.entradas)].pk)
+
+    def lanzar(self):
+        inicio = threading.Event()
+        hilos = [threading.Thread(target=self.visitar, args=(inicio,)) for _ in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        inicio.set()
+        return hilos
+
+    def total_en_bd(self):
+        return sum(Entrada.objects.filter(pk__in=[e.pk for e in self.entradas]).values_list('visitas', flat=True))
+
+
+@override_settings(BLOG_VISITAS_VOLCADO_AUTOMATICO=False)
+class VisitasConcurrentesTests(VisitantesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.entradas = [Entrada.objects.create(titulo=f"Entrada visitada {i}", contenido="Texto") for i in range(3)]
+
+    def setUp(self):
+        limpiar_caches()
+
+    def test_no_se_pierden_visitas_concurrentes(self):
+        for hilo in self.lanzar():
+            hilo.join()
+        self.assertEqual(visitas.volcar(), self.HILOS * self.VISITAS_POR_HILO)
+        self.assertEqual(self.total_en_bd(), self.HILOS * self.VISITAS_POR_HILO)
+
+    def test_volcado_mientras_llegan_visitas(self):
+        volcadas = 0
+        hilos = self.lanzar()
+        while any(hilo.is_alive() for hilo in hilos):
+            volcadas += visitas.volcar([e.pk for e in self.entradas])
+        for hilo in hilos:
+            hilo.join()
+        volcadas += visitas.volcar([e.pk for e in self.entradas])
+        self.assertEqual(volcadas, self.HILOS * self.VISITAS_POR_HILO)
+        self.assertEqual(self.total_en_bd(), self.HILOS * self.VISITAS_POR_HILO)
+        self.assertEqual(sum(visitas.visitas_pendientes(e.pk) for e in self.entradas), 0)
+
+    def test_otro_volcado_lee_las_mismas_visitas(self):
+        # Orden exacto del fallo: los dos leen el contador antes de que ninguno lo reste
+        entrada = self.entradas[0]
+        for _ in range(10):
+            visitas.registrar_visita(entrada.pk)
+        cache = visitas._cache()
+        leer = cache.get_many
+        anidados = []
+
+        def leer_y_adelantarse(claves):
+            valores = leer(claves)
+            if not anidados:
+                anidados.append(None)
+                anidados[0] = visitas.volcar([entrada.pk])
+            return valores
+
+        with mock.patch.object(cache, "get_many", side_effect=leer_y_adelantarse):
+            self.assertEqual(visitas.volcar([entrada.pk]), 0)
+        self.assertEqual(anidados, [10])
+        self.assertEqual(self.total_en_bd(), 10)
+        self.assertEqual(visitas.visitas_pendientes(entrada.pk), 0)
+        visitas.registrar_visita(entrada.pk)
+        self.assertEqual(visitas.volcar([entrada.pk]), 1)
+
+
+@override_settings(BLOG_VISITAS_VOLCADO_AUTOMATICO=False)
+class VolcadosConcurrentesTests(VisitantesMixin, TransactionTestCase):
+    HILOS = 4
+
+    def setUp(self):
+        limpiar_caches()
+        self.entradas = [Entrada.objects.create(titulo=f"Entrada volcada {i}", contenido="Texto") for i in range(3)]
+
+    def test_varios_volcados_a_la_vez(self):
+        # Hilo de cada proceso + cron sobre la misma caché: ninguna visita se escribe dos veces
+        ids = [e.pk for e in self.entradas]
+        volcadas, terminado = [], threading.Event()
+
+        def volcar_en_bucle():
+            try:
+                while not terminado.is_set():
+                    try:
+                        volcadas.append(visitas.volcar(ids))
+                    except OperationalError:
+                        pass  # SQLite en memoria: "table is locked"; las visitas vuelven a la caché
+            finally:
+                connection.close()
+
+        volcadores = [threading.Thread(target=volcar_en_bucle) for _ in range(3)]
+        for hilo in volcadores:
+            hilo.start()
+        for hilo in self.lanzar():
+            hilo.join()
+        terminado.set()
+        for hilo in volcadores:
+            hilo.join()
+        volcadas.append(visitas.volcar(ids))
+        self.assertEqual(sum(volcadas), self.HILOS * self.VISITAS_POR_HILO)
+        self.assertEqual(self.total_en_bd(), self.HILOS * self.VISITAS_POR_HILO)
+
+
+class EtiquetasTests(TestCase):
+    def setUp(self):
+        limpiar_caches()
+
+    def etiquetas(self, entrada):
+        return list(entrada.entrada_etiquetas.order_by('orden').values_list('etiqueta__slug', flat=True))
+
+    def test_separar_etiquetas(self):
+        self.assertEqual(separar_etiquetas(" Táctica, finales,, tactica ,  "),
+                         [("Táctica", "tactica"), ("finales", "finales")])
+        self.assertEqual(separar_etiquetas(None), [])
+
+    def test_sincroniza_al_guardar_y_comparte_etiquetas(self):
+        primera = Entrada.objects.create(titulo="Primera", contenido="Texto", etiquetas="Finales, Táctica")
+        segunda = Entrada.objects.create(titulo="Segunda", contenido="Texto", etiquetas="táctica, aperturas")
+        self.assertEqual(self.etiquetas(primera), ["finales", "tactica"])
+        self.assertEqual(self.etiquetas(segunda), ["tactica", "aperturas"])
+        # "táctica" reutiliza la etiqueta creada con la primera entrada (y su nombre)
+        self.assertEqual(dict(Etiqueta.objects.values_list('slug', 'nombre')),
+                         {"finales": "Finales", "tactica": "Táctica", "aperturas": "aperturas"})
+
+        segunda.etiquetas = "aperturas"
+        segunda.save()
+        self.assertEqual(self.etiquetas(segunda), ["aperturas"])
+        self.assertEqual(self.etiquetas(primera), ["finales", "tactica"])
+
+    def test_sin_cambios_no_escribe(self):
+        entrada = Entrada.objects.create(titulo="Entrada", contenido="Texto", etiquetas="python, django")
+        # Solo la lectura de las etiquetas actuales
+        with self.assertNumQueries(1):
+            entrada.sincronizar_etiquetas()
+        entrada.etiquetas = "django, python"
+        entrada.save()
+        self.assertEqual(self.etiquetas(entrada), ["django", "python"])
+
+    def test_update_fields_sin_etiquetas_no_sincroniza(self):
+        entrada = Entrada.objects.create(titulo="Entrada", contenido="Texto", etiquetas="python")
+        entrada.etiquetas = "django"
+        entrada.save(update_fields=['titulo'])
+        self.assertEqual(self.etiquetas(entrada), ["python"])
+
+    def test_listado_por_etiqueta_exacta(self):
+        final = Entrada.objects.create(titulo="Un final", contenido="Texto", etiquetas="final")
+        Entrada.objects.create(titulo="Varios finales", contenido="Texto", etiquetas="finales")
+        Entrada.objects.create(titulo="Borrador", contenido="Texto", etiquetas="final", publicado=False)
+        respuesta = self.client.get(reverse('blog:por_etiqueta', args=['Final']))
+        self.assertEqual([entrada.pk for entrada in respuesta.context['page_obj']], [final.pk])
+
+    def test_etiquetas_lista_con_y_sin_precarga(self):
+        Entrada.objects.create(titulo="Entrada", contenido="Texto", etiquetas="Finales, python")
+        sin_precarga = Entrada.objects.get()
+        with self.assertNumQueries(0):
+            self.assertEqual(sin_precarga.etiquetas_lista(), ["Finales", "python"])
+        precargada = Entrada.objects.con_etiquetas().get()
+        with self.assertNumQueries(0):
+            self.assertEqual(precargada.etiquetas_lista(), ["Finales", "python"])
+
+    def test_nube_cuenta_solo_entradas_publicadas(self):
+        for i in range(3):
+            Entrada.objects.create(titulo=f"Python {i}", contenido="Texto", etiquetas="python, django" if i else "python")
+        Entrada.objects.create(titulo="Oculta", contenido="Texto", etiquetas="django, oculta", publicado=False)
+        Entrada.objects.create(titulo="Programada", contenido="Texto", etiquetas="django",
+                               fecha_publicacion=timezone.now() + timedelta(days=1))
+        self.assertEqual([(etiqueta.slug, etiqueta.total) for etiqueta in Etiqueta.objects.nube()],
+                         [("python", 3), ("django", 2)])
+
+    def test_la_barra_lateral_ve_las_etiquetas_nuevas(self):
+        Entrada.objects.create(titulo="Entrada", contenido="Texto", etiquetas="python")
+        self.assertEqual([e.slug for e in obtener_barra_lateral()['etiquetas']], ["python"])
+        Entrada.objects.create(titulo="Otra", contenido="Texto", etiquetas="django, python")
+        self.assertEqual([e.slug for e in obtener_barra_lateral()['etiquetas']], ["python", "django"])
+
+
+class BusquedaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(12):
+            Entrada.objects.create(titulo=f"Aperturas de ajedrez {i}",
+                                   contenido="La defensa siciliana es una apertura muy popular.")
+        Entrada.objects.create(titulo="Finales de torre", contenido="Técnica de finales.")
+
+    def setUp(self):
+        limpiar_caches()
+
+    def test_resultados_con_fragmento_resaltado(self):
+        respuesta = self.client.get(reverse('blog:buscar'), {'q': 'siciliana'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTemplateUsed(respuesta, 'blog/listado.html')
+        self.assertContains(respuesta, 'Resultados de búsqueda: "siciliana"')
+        self.assertContains(respuesta, '<mark>siciliana</mark>', count=10)
+        self.assertNotIn('Finales de torre', [entrada.titulo for entrada in respuesta.context['page_obj']])
+
+    def test_paginacion_conserva_la_consulta(self):
+        respuesta = self.client.get(reverse('blog:buscar'), {'q': 'aperturas'})
+        self.assertContains(respuesta, 'href="?q=aperturas&amp;page=2"')
+        respuesta = self.client.get(reverse('blog:buscar'), {'q': 'aperturas', 'page': 2})
+        self.assertEqual(len(respuesta.context['page_obj']), 2)
+
+    def test_sin_consulta_lista_las_entradas(self):
+        respuesta = self.client.get(reverse('blog:buscar'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.context['page_obj']), 10)
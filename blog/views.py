@@ -1,14 +1,22 @@
 from datetime import datetime
 
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Q
 from django.utils import timezone
+from django.utils.text import slugify
 from django.core.paginator import Paginator
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
+from config import estadisticas
+from config.cache_paginas import cache_anonimo
+from config.paginacion import PaginadorKeyset
 
 from .models import Entrada, Categoria
 from .forms import EntradaForm
+from .barra_lateral import obtener_barra_lateral
+from . import busqueda
+
+# Orden de los listados paginados por cursor (índice entrada_pub_recientes_idx)
+ORDEN_ENTRADAS = ('-fecha_publicacion', '-id')
 
 # Helper para comprobar staff
 def is_staff(user):
@@ -36,34 +44,28 @@ def crear_entrada(request):
             return redirect('blog:detalle', slug=entrada.slug)
     else:
         form = EntradaForm()
-    categorias = Categoria.objects.filter(activa=True).order_by('nombre')
-    recientes = Entrada.objects.recientes(5)
     return render(request, 'blog/crear_entrada.html', {
         'form': form,
-        'categorias': categorias,
-        'recientes': recientes,
+        **obtener_barra_lateral(),
     })
 
 # -----------------------------
 # Vistas públicas del blog
 # -----------------------------
 
+@cache_anonimo("blog")
 def post_list(request):
     """
     Lista general de entradas publicadas con paginación.
     """
     posts_qs = Entrada.objects.publicadas().select_related('autor', 'categoria')
-    paginator = Paginator(posts_qs, 10)  # 10 entradas por página
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    categorias = Categoria.objects.filter(activa=True).order_by('nombre')
-    recientes = Entrada.objects.recientes(5)
+    # 10 entradas por página, por cursor (ver config/paginacion.py)
+    paginator = PaginadorKeyset(posts_qs, 10, orden=ORDEN_ENTRADAS, total='blog:lista')
+    page_obj = paginator.get_page(request.GET.get('page'))
 
     return render(request, 'blog/listado.html', {
         'page_obj': page_obj,
-        'categorias': categorias,
-        'recientes': recientes,
+        **obtener_barra_lateral(),
     })
 
 
@@ -97,14 +99,11 @@ def post_detail(request, slug):
         categoria=post.categoria
     ).exclude(pk=post.pk)[:3]
 
-    categorias = Categoria.objects.filter(activa=True).order_by('nombre')
-    recientes = Entrada.objects.recientes(5)
-
-    return render(request, 'blog/post_detail.html', {
+    return render(request, 'blog/detalle.html', {
+        'articulo': post,
         'post': post,
         'relacionados': relacionados,
-        'categorias': categorias,
-        'recientes': recientes,
+        **obtener_barra_lateral(),
         'preview': preview,
     })
 
@@ -120,18 +119,13 @@ def post_por_categoria(request, slug):
     categoria = get_object_or_404(Categoria, slug=slug, activa=True)
     posts_qs = Entrada.objects.por_categoria(slug).select_related('autor', 'categoria')
 
-    paginator = Paginator(posts_qs, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    recientes = Entrada.objects.recientes(5)
-    categorias = Categoria.objects.filter(activa=True).order_by('nombre')
+    paginator = PaginadorKeyset(posts_qs, 10, orden=ORDEN_ENTRADAS, total=f'blog:categoria:{slug}')
+    page_obj = paginator.get_page(request.GET.get('page'))
 
-    return render(request, 'blog/post_por_categoria.html', {
+    return render(request, 'blog/listado.html', {
         'categoria': categoria,
         'page_obj': page_obj,
-        'categorias': categorias,
-        'recientes': recientes,
+        **obtener_barra_lateral(),
     })
 
 
@@ -139,20 +133,19 @@ def post_por_etiqueta(request, etiqueta):
     """
     Lista de entradas filtradas por etiqueta (solo publicadas).
     """
-    posts_qs = Entrada.objects.publicadas().filter(etiquetas__icontains=etiqueta)
+    # Coincidencia exacta sobre la etiqueta normalizada ("final" ya no encuentra "finales")
+    posts_qs = (Entrada.objects.publicadas()
+                .filter(entrada_etiquetas__etiqueta__slug=slugify(etiqueta))
+                .select_related('autor', 'categoria')
+                .con_etiquetas())
 
-    paginator = Paginator(posts_qs, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = PaginadorKeyset(posts_qs, 10, orden=ORDEN_ENTRADAS, total=f'blog:etiqueta:{slugify(etiqueta)}')
+    page_obj = paginator.get_page(request.GET.get('page'))
 
-    recientes = Entrada.objects.recientes(5)
-    categorias = Categoria.objects.filter(activa=True).order_by('nombre')
-
-    return render(request, 'blog/post_por_etiqueta.html', {
+    return render(request, 'blog/listado.html', {
         'etiqueta': etiqueta,
         'page_obj': page_obj,
-        'categorias': categorias,
-        'recientes': recientes,
+        **obtener_barra_lateral(),
     })
 
 
@@ -167,21 +160,16 @@ def post_archivo(request, year, month):
     posts_qs = Entrada.objects.publicadas().filter(
         fecha_publicacion__year=year,
         fecha_publicacion__month=month
-    )
+    ).select_related('autor', 'categoria')
 
-    paginator = Paginator(posts_qs, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-
-    recientes = Entrada.objects.recientes(5)
-    categorias = Categoria.objects.filter(activa=True).order_by('nombre')
+    paginator = PaginadorKeyset(posts_qs, 10, orden=ORDEN_ENTRADAS, total=f'blog:archivo:{year}-{month}')
+    page_obj = paginator.get_page(request.GET.get('page'))
 
-    return render(request, 'blog/post_archivo.html', {
+    return render(request, 'blog/listado.html', {
         'page_obj': page_obj,
         'year': year,
         'month': month,
-        'categorias': categorias,
-        'recientes': recientes,
+        **obtener_barra_lateral(),
     })
 
 
@@ -191,30 +179,24 @@ def post_archivo(request, year, month):
 
 def post_buscar(request):
     """
-    Búsqueda de entradas por título, contenido o etiquetas (solo publicadas).
+    Búsqueda de texto completo por título, contenido o etiquetas (solo publicadas),
+    ordenada por relevancia y con fragmentos resaltados (ver blog/busqueda.py).
     """
     query = request.GET.get('q', '').strip()
-    posts_qs = Entrada.objects.publicadas()
-
-    if query:
-        posts_qs = posts_qs.filter(
-            Q(titulo__icontains=query) |
-            Q(contenido__icontains=query) |
-            Q(etiquetas__icontains=query)
-        ).distinct()
-
-    paginator = Paginator(posts_qs.order_by('-fecha_publicacion'), 10)
     page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
 
-    recientes = Entrada.objects.recientes(5)
-    categorias = Categoria.objects.filter(activa=True).order_by('nombre')
+    if query:
+        page_obj = Paginator(busqueda.buscar(query), 10).get_page(page_number)
+        # Solo se cargan (y se resaltan) las entradas de la página visible
+        page_obj.object_list = busqueda.cargar_resultados(query, list(page_obj.object_list))
+    else:
+        posts_qs = Entrada.objects.publicadas().select_related('autor', 'categoria')
+        page_obj = PaginadorKeyset(posts_qs, 10, orden=ORDEN_ENTRADAS, total='blog:lista').get_page(page_number)
 
-    return render(request, 'blog/post_buscar.html', {
+    return render(request, 'blog/listado.html', {
         'query': query,
         'page_obj': page_obj,
-        'categorias': categorias,
-        'recientes': recientes,
+        **obtener_barra_lateral(),
     })
 
 
@@ -224,7 +206,6 @@ def post_buscar(request):
 
 from cursos.models import Curso
 from tienda.models import Producto
-from django.contrib.auth.models import User
 
 def home(request):
     """
@@ -235,9 +216,8 @@ def home(request):
     posts_recientes = Entrada.objects.publicadas().order_by('-fecha_publicacion')[:3]
     productos_destacados = Producto.objects.filter(destacado=True)[:4]
 
-    total_cursos = Curso.objects.count()
-    total_posts = Entrada.objects.publicadas().count()
-    total_usuarios = User.objects.count()
+    # Contadores precalculados: ningún COUNT(*) por visita
+    cifras = estadisticas.obtener()
 
     year = datetime.now().year
 
@@ -245,9 +225,10 @@ def home(request):
         'cursos_destacados': cursos_destacados,
         'posts_recientes': posts_recientes,
         'productos_destacados': productos_destacados,
-        'total_cursos': total_cursos,
-        'total_posts': total_posts,
-        'total_usuarios': total_usuarios,
+        'total_cursos': cifras['cursos'],
+        'total_posts': cifras['entradas'],
+        'total_usuarios': cifras['usuarios'],
+        'estadisticas': cifras,
         'testimonios': [],
         'year': year,
     })
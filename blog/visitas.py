@@ -0,0 +1,154 @@
+# blog/visitas.py
+"""
+Contador de visitas con escritura diferida.
+
+Cada visita solo incrementa un contador en la caché (``cache.incr`` es atómico),
+sin escribir en la base de datos. Periódicamente las visitas acumuladas se
+vuelcan con un ``UPDATE ... SET visitas = visitas + n`` por cada grupo de
+entradas con el mismo incremento:
+
+- Un hilo en segundo plano de cada proceso vuelca cada ``BLOG_VISITAS_INTERVALO``
+  segundos las entradas que ese proceso ha visto, y también al terminar.
+- ``manage.py volcar_visitas`` vuelca todas las entradas (útil en cron cuando la
+  caché es compartida, p. ej. Redis, y sobrevive a los reinicios de los workers).
+
+Varios volcados pueden coincidir (el hilo de cada proceso y el cron sobre la
+misma caché): cada uno reclama primero las visitas que ha leído restándolas
+con ``cache.decr`` y solo escribe las que eran suyas. Si otro se le adelantó,
+el contador queda por debajo de cero y devuelve la diferencia, así ninguna
+visita se cuenta dos veces. Por eso la caché tiene que admitir valores
+negativos en ``decr`` (LocMem y Redis sí; Memcached los deja en cero).
+
+Como mucho se pierden las visitas de un intervalo si un proceso muere de golpe
+con una caché local.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+
+PREFIJO = "blog:visitas:"
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pendientes = set()
+_hilo_pid = None
+
+
+def _cache():
+    return caches[getattr(settings, 'BLOG_VISITAS_CACHE', 'default')]
+
+
+def registrar_visita(entrada_id):
+    """
+    Suma una visita pendiente y devuelve cuántas hay sin volcar para esa entrada.
+    """
+    pendientes = _sumar(_cache(), f"{PREFIJO}{entrada_id}", 1)
+    with _lock:
+        _pendientes.add(entrada_id)
+    _arrancar_volcado()
+    return pendientes
+
+
+def _sumar(cache, clave, n):
+    try:
+        return cache.incr(clave, n)
+    except ValueError:
+        # La clave no existe todavía; add() evita pisar a otro proceso que la cree a la vez
+        if cache.add(clave, n, timeout=None):
+            return n
+        return cache.incr(clave, n)
+
+
+def visitas_pendientes(entrada_id):
+    return max(0, _cache().get(f"{PREFIJO}{entrada_id}") or 0)
+
+
+def _reclamar(cache, clave, n):
+    """
+    Resta ``n`` visitas leídas de ``clave`` y devuelve cuántas eran de este volcado.
+    """
+    try:
+        restantes = cache.decr(clave, n)
+    except ValueError:  # la clave ha desaparecido (desalojada de la caché)
+        return 0
+    # Antes del decr había restantes + n: si eran menos de n, otro volcado se llevó el resto
+    propias = min(n, max(0, restantes + n))
+    if propias < n:
+        cache.incr(clave, n - propias)
+    return propias
+
+
+def volcar(ids=None):
+    """
+    Escribe en la base de datos las visitas acumuladas y devuelve cuántas se volcaron.
+
+    Sin ``ids`` se vuelcan las entradas vistas por este proceso.
+    """
+    from .models import Entrada
+
+    if ids is None:
+        with _lock:
+            ids = list(_pendientes)
+            _pendientes.clear()
+    if not ids:
+        return 0
+
+    cache = _cache()
+    claves = {f"{PREFIJO}{pk}": pk for pk in ids}
+    # Restar (no borrar) antes del UPDATE: las visitas que lleguen mientras tanto se conservan
+    # y otro volcado simultáneo ya no puede escribir las mismas
+    valores = {}
+    for clave, n in cache.get_many(claves).items():
+        if n and n > 0 and (propias := _reclamar(cache, clave, n)):
+            valores[clave] = propias
+
+    # Un solo UPDATE por cada incremento distinto
+    por_incremento = defaultdict(list)
+    for clave, n in valores.items():
+        por_incremento[n].append(claves[clave])
+    try:
+        with transaction.atomic():
+            for n, pks in por_incremento.items():
+                Entrada.objects.filter(pk__in=pks).update(visitas=F('visitas') + n)
+    except Exception:
+        # Se devuelven a la caché para el siguiente volcado
+        for clave, n in valores.items():
+            _sumar(cache, clave, n)
+        with _lock:
+            _pendientes.update(claves.values())
+        raise
+    return sum(valores.values())
+
+
+def _bucle_volcado(intervalo):
+    while True:
+        time.sleep(intervalo)
+        try:
+            volcar()
+        except Exception:
+            logger.exception("Error volcando las visitas del blog")
+
+
+def _arrancar_volcado():
+    """
+    Arranca (una vez por proceso) el hilo que vuelca las visitas periódicamente.
+    """
+    global _hilo_pid
+    if _hilo_pid == os.getpid() or not getattr(settings, 'BLOG_VISITAS_VOLCADO_AUTOMATICO', True):
+        return
+    with _lock:
+        if _hilo_pid == os.getpid():
+            return
+        _hilo_pid = os.getpid()
+    intervalo = getattr(settings, 'BLOG_VISITAS_INTERVALO', 30)
+    threading.Thread(target=_bucle_volcado, args=(intervalo,), name="blog-visitas", daemon=True).start()
+    atexit.register(volcar)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class ConfigConfig(AppConfig):
+    name = 'config'
+    verbose_name = 'Configuración del sitio'
+
+    def ready(self):
+        # Generar las derivadas de las imágenes al subirlas
+        from . import checks, signals  # noqa: F401 (checks registra las comprobaciones)
+        signals.conectar()
@@ -1,5 +1,8 @@
 import os
 from django.core.asgi import get_asgi_application
 
+# 📌 Servidor ASGI (ej: uvicorn config.asgi:application)
+# Las vistas asíncronas como ia.views.chat_ia_stream envían la respuesta
+# token a token sin ocupar un hilo por conexión.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 application = get_asgi_application()
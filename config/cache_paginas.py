@@ -0,0 +1,128 @@
+"""
+Caché de páginas completas para visitantes anónimos y de fragmentos de plantilla.
+
+Cada página cacheada depende de uno o varios *grupos* (``"tienda"``,
+``"blog"``...). Cada grupo tiene un número de versión en la caché que forma
+parte de la clave de las páginas y fragmentos que dependen de él. Guardar o
+borrar un objeto de un modelo del grupo incrementa su versión (ver
+``config/signals.py``). Así se invalidan exactamente las páginas que usan ese
+modelo, sin tener que recorrer ni borrar claves; las entradas antiguas
+caducan solas.
+
+- ``@cache_anonimo("tienda")`` en una vista guarda la respuesta completa por
+  URL e idioma. Solo se usa con visitantes sin sesión ni mensajes: su página
+  es la misma para todos. Las respuestas que ponen cookies (sesión, CSRF) no
+  se guardan.
+- En plantillas, ``{% version_cache "tienda" as version %}`` (``{% load
+  cache_sitio %}``) da la versión para usarla en ``{% cache ... using="paginas" %}``
+  y cachear los fragmentos que se repiten para los usuarios identificados.
+
+Todo se guarda en el alias ``"paginas"`` de ``CACHES``, separado del resto de
+datos cacheados para que las páginas no desalojen otras entradas, durante
+``CACHE_PAGINAS_TTL`` segundos como mucho.
+
+Con varios procesos (gunicorn, uWSGI...) ese alias tiene que ser una caché
+compartida (Redis, Memcached): con LocMem cada proceso tiene sus propias
+versiones y la invalidación solo llega al que guardó el objeto; los demás
+sirven su copia hasta que caduca. ``manage.py check --deploy`` lo avisa
+(``config.W001``, ver config/checks.py).
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import translation
+
+# Modelos de los que depende cada grupo: al guardarlos o borrarlos cambia su versión
+GRUPOS = {
+    "academia": ("academia.Course", "academia.Category", "academia.Review"),
+    "blog": ("blog.Entrada", "blog.Categoria", "blog.Etiqueta"),
+    "cursos": ("cursos.Curso", "cursos.Categoria"),
+    "tienda": ("tienda.Producto", "tienda.Categoria"),
+}
+
+# Alias de CACHES para páginas, fragmentos y versiones (las plantillas usan {% cache ... using="paginas" %})
+ALIAS = "paginas"
+
+PREFIJO_VERSION = "paginas:version:"
+PREFIJO_PAGINA = "paginas:respuesta:"
+
+# Cookies que indican contenido propio del visitante (mensajes del framework messages)
+_COOKIES_PERSONALES = ("messages",)
+
+
+def ttl():
+    """
+    Segundos que se guardan las páginas y fragmentos cacheados.
+    """
+    return getattr(settings, "CACHE_PAGINAS_TTL", 60 * 5)
+
+
+def version(grupo):
+    cache = caches[ALIAS]
+    clave = PREFIJO_VERSION + grupo
+    actual = cache.get(clave)
+    if actual is None:
+        # Si la versión se pierde (reinicio, desalojo) no se reutiliza un número antiguo
+        cache.add(clave, time.time_ns(), None)
+        actual = cache.get(clave)
+    return actual
+
+
+def invalidar(*grupos):
+    cache = caches[ALIAS]
+    for grupo in grupos:
+        try:
+            cache.incr(PREFIJO_VERSION + grupo)
+        except ValueError:
+            cache.add(PREFIJO_VERSION + grupo, time.time_ns(), None)
+
+
+def clave_pagina(request, grupos):
+    versiones = ",".join(f"{grupo}={version(grupo)}" for grupo in grupos)
+    url = request.build_absolute_uri()
+    resumen = hashlib.md5(f"{url}|{translation.get_language()}|{versiones}".encode()).hexdigest()
+    return PREFIJO_PAGINA + resumen
+
+
+def _anonimo_sin_estado(request):
+    if request.method not in ("GET", "HEAD"):
+        return False
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return False
+    if any(cookie in request.COOKIES for cookie in _COOKIES_PERSONALES):
+        return False
+    return not request.user.is_authenticated
+
+
+def cache_anonimo(*grupos, timeout=None):
+    """
+    Decorador de vistas: cachea la respuesta completa para visitantes anónimos.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(request, *args, **kwargs):
+            if not _anonimo_sin_estado(request):
+                return vista(request, *args, **kwargs)
+
+            cache = caches[ALIAS]
+            clave = clave_pagina(request, grupos)
+            response = cache.get(clave)
+            if response is not None:
+                response["X-Cache"] = "HIT"
+                return response
+
+            response = vista(request, *args, **kwargs)
+            if hasattr(response, "render") and not response.is_rendered:
+                response.render()
+            # get_token() marca CSRF_COOKIE_NEEDS_UPDATE: la página lleva un token propio
+            if (response.status_code == 200 and not response.streaming and not response.cookies
+                    and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+                    and not (hasattr(request, "session") and request.session.modified)):
+                cache.set(clave, response, timeout if timeout is not None else ttl())
+                response["X-Cache"] = "MISS"
+            return response
+        return envoltura
+    return decorador
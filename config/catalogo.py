@@ -0,0 +1,215 @@
+"""
+Importación y exportación masiva del catálogo (productos de la tienda y cursos).
+
+Lo usan los comandos ``import_catalog`` y ``export_catalog``. Los ficheros
+son CSV con cabecera o JSON Lines (un objeto por línea) con las columnas de
+``CATALOGOS``; la categoría va por nombre y la imagen por ruta.
+
+La importación lee el fichero en streaming y escribe por lotes con
+``bulk_create(update_conflicts=True)``: los objetos que ya existen (mismo
+``sku`` o ``slug``) se actualizan y el resto se crean, con una consulta por
+lote. Cada producto necesita su ``sku`` (así volver a importar una exportación
+no duplica nada); los cursos sin ``slug`` se reconocen por su título y los
+nuevos reciben un slug libre. Las categorías se resuelven con un diccionario
+en memoria y solo se crean las que faltan. ``import_catalog`` hace toda la
+importación en una transacción: si un lote falla no queda nada a medias.
+
+``bulk_create`` no envía señales: al terminar se invalidan las páginas
+cacheadas del grupo y se invalidan las estadísticas. Las
+miniaturas de las imágenes se generan después con ``generar_derivadas``.
+"""
+import csv
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+
+from . import cache_paginas, estadisticas
+from .slugs import slug_unico
+
+
+@dataclass(frozen=True)
+class Catalogo:
+    modelo: str
+    clave: str          # campo único por el que se reconoce un objeto ya importado
+    columnas: tuple     # columnas del fichero, en el orden de exportación
+    grupo: str          # grupo de config/cache_paginas.py que se invalida al importar
+
+    @property
+    def model(self):
+        return apps.get_model(self.modelo)
+
+
+CATALOGOS = {
+    "productos": Catalogo(
+        modelo="tienda.Producto",
+        clave="sku",
+        columnas=("sku", "nombre", "autor", "descripcion", "precio", "stock", "categoria", "imagen"),
+        grupo="tienda",
+    ),
+    "cursos": Catalogo(
+        modelo="cursos.Curso",
+        clave="slug",
+        columnas=("slug", "titulo", "descripcion", "nivel", "categoria", "instructor", "duracion",
+                  "precio", "fecha_inicio", "imagen"),
+        grupo="cursos",
+    ),
+}
+
+FORMATOS = ("csv", "jsonl")
+
+
+def formato_de(ruta, formato=None):
+    if formato:
+        return formato
+    return "jsonl" if str(ruta).endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+# -----------------------------
+# Exportación
+# -----------------------------
+
+def campos_exportacion(catalogo):
+    """
+    Rutas de ``values_list`` para las columnas (la categoría se exporta por nombre).
+    """
+    return [f"{columna}__nombre" if columna == "categoria" else columna for columna in catalogo.columnas]
+
+
+# -----------------------------
+# Lectura
+# -----------------------------
+
+def leer(fichero, formato):
+    """
+    Filas del fichero como ``(número de línea, diccionario)``, sin cargarlo entero en memoria.
+    Una línea JSON que no se puede leer da ``None`` en lugar del diccionario.
+    """
+    if formato == "csv":
+        lector = csv.DictReader(fichero)
+        for fila in lector:
+            yield lector.line_num, fila
+    else:
+        for numero, linea in enumerate(fichero, 1):
+            if linea.strip():
+                try:
+                    fila = json.loads(linea)
+                except json.JSONDecodeError:
+                    fila = None
+                yield numero, fila if isinstance(fila, dict) else None
+
+
+# -----------------------------
+# Importación
+# -----------------------------
+
+class Importador:
+    """
+    Convierte filas en objetos del modelo y los guarda por lotes.
+    """
+
+    def __init__(self, catalogo, imagenes=None):
+        self.catalogo = catalogo
+        self.model = catalogo.model
+        self.imagenes = Path(imagenes) if imagenes else None
+        campo_categoria = self.model._meta.get_field("categoria")
+        self.modelo_categoria = campo_categoria.related_model
+        self.categoria_obligatoria = not campo_categoria.null
+        # nombre -> pk; las que falten se crean la primera vez que aparecen
+        self.categorias = dict(self.modelo_categoria.objects.values_list("nombre", "pk"))
+        # Cursos sin slug en el fichero: se reconocen por su título
+        self.deriva_clave = catalogo.clave == "slug"
+        self.slugs = dict(self.model.objects.values_list("titulo", "slug")) if self.deriva_clave else {}
+        # Slugs asignados en esta importación que aún no están en la base de datos
+        self.slugs_nuevos = set()
+        self.imagenes_adjuntas = 0
+
+    def objeto(self, fila):
+        """
+        Instancia sin guardar a partir de una fila. Lanza ``ValidationError`` si algún valor no es válido.
+        """
+        valores, errores = {}, {}
+        clave = self.catalogo.clave
+        if not self.deriva_clave and fila.get(clave) in ("", None):
+            # Con la referencia por defecto (aleatoria) cada importación crearía otro producto
+            errores[clave] = ["Obligatorio: es lo que reconoce el objeto al volver a importarlo."]
+        for columna in self.catalogo.columnas:
+            if columna not in fila or columna in ("categoria", "imagen") or columna in errores:
+                continue
+            campo = self.model._meta.get_field(columna)
+            valor = fila[columna]
+            if valor in ("", None):
+                valor = None if campo.null else campo.get_default()
+            try:
+                valores[columna] = campo.clean(valor, None)
+            except ValidationError as exc:
+                errores[columna] = exc.messages
+        if errores:
+            raise ValidationError(errores)
+
+        objeto = self.model(**valores)
+        if "categoria" in fila:
+            objeto.categoria_id = self.categoria(fila["categoria"])
+        if objeto.categoria_id is None and self.categoria_obligatoria:
+            raise ValidationError({"categoria": ["La categoría es obligatoria."]})
+        if fila.get("imagen"):
+            objeto.imagen = self.imagen(fila["imagen"])
+        if self.deriva_clave and not objeto.slug:
+            objeto.slug = self.slugs.get(objeto.titulo) or self.slug_nuevo(objeto)
+        return objeto
+
+    def slug_nuevo(self, objeto):
+        # Nunca el de otro curso que ya exista (se sobrescribiría) ni el de otra fila de la importación
+        slug = slug_unico(objeto, objeto.titulo, ocupados=self.slugs_nuevos)
+        self.slugs_nuevos.add(slug)
+        self.slugs[objeto.titulo] = slug
+        return slug
+
+    def categoria(self, nombre):
+        nombre = (nombre or "").strip()
+        if not nombre:
+            return None
+        if nombre not in self.categorias:
+            # save() (y no bulk_create) para que las categorías con slug lo generen
+            self.categorias[nombre] = self.modelo_categoria.objects.create(nombre=nombre).pk
+        return self.categorias[nombre]
+
+    def imagen(self, ruta):
+        """
+        Nombre en el almacenamiento de la imagen. Con ``imagenes`` se copia desde
+        ese directorio (si no estaba ya copiada); sin él, ``ruta`` ya es un nombre del almacenamiento.
+        """
+        if self.imagenes is None:
+            return ruta
+        origen = self.imagenes / ruta
+        if not origen.is_file():
+            raise ValidationError({"imagen": [f"No existe {origen}"]})
+        campo = self.model._meta.get_field("imagen")
+        nombre = campo.generate_filename(None, origen.name)
+        if campo.storage.exists(nombre) and campo.storage.size(nombre) == origen.stat().st_size:
+            return nombre
+        with origen.open("rb") as fichero:
+            self.imagenes_adjuntas += 1
+            return campo.storage.save(nombre, File(fichero, name=origen.name))
+
+    def guardar(self, objetos, columnas):
+        """
+        Inserta o actualiza un lote. Devuelve cuántos objetos se han escrito.
+        """
+        clave = self.catalogo.clave
+        # Si la clave se repite en el lote gana la última fila (un mismo lote no puede tocar dos veces una fila)
+        por_clave = {getattr(objeto, clave): objeto for objeto in objetos}
+        actualizables = [columna for columna in columnas if columna != clave] + ["fecha_actualizacion"]
+        self.model.objects.bulk_create(
+            por_clave.values(), update_conflicts=True,
+            unique_fields=[clave], update_fields=actualizables,
+        )
+        return len(por_clave)
+
+    def terminar(self):
+        transaction.on_commit(lambda: cache_paginas.invalidar(self.catalogo.grupo))
+        transaction.on_commit(estadisticas.invalidar)
@@ -0,0 +1,27 @@
+"""
+Comprobaciones del sistema (``manage.py check --deploy``).
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from . import cache_paginas
+
+# Alias de CACHES cuyas invalidaciones (señales) tienen que llegar a todos los procesos
+ALIAS_COMPARTIDOS = ("default", cache_paginas.ALIAS)
+BACKENDS_LOCALES = ("django.core.cache.backends.locmem.LocMemCache",)
+
+
+@register(Tags.caches, deploy=True)
+def caches_compartidas(app_configs, **kwargs):
+    avisos = []
+    for alias in ALIAS_COMPARTIDOS:
+        backend = settings.CACHES.get(alias, {}).get("BACKEND")
+        if backend in BACKENDS_LOCALES:
+            avisos.append(Warning(
+                f"La caché '{alias}' es local a cada proceso ({backend}).",
+                hint=("Con varios workers, las invalidaciones (páginas, temario de los cursos, barra lateral "
+                      "del blog, estadísticas) solo llegan al proceso que guarda el objeto y los demás sirven "
+                      "datos viejos hasta que caducan. Usa una caché compartida (Redis, Memcached)."),
+                id="config.W001",
+            ))
+    return avisos
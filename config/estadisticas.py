@@ -0,0 +1,144 @@
+"""
+Estadísticas del sitio (cursos, artículos, usuarios...) para las portadas y el
+panel de administración.
+
+Los contadores se calculan con una sola consulta que combina un ``COUNT(*)``
+por cada estadística y se guardan en la caché sin caducidad. Las páginas
+leen la caché y solo vuelven a contar (en el mismo proceso, con esa única
+consulta):
+
+- cuando se invalidan: al crear o borrar un objeto de los modelos contados, al
+  guardar una entrada del blog (puede publicarse o despublicarse) o al
+  importar el catálogo — ver ``config/signals.py``;
+- cuando pasan ``ESTADISTICAS_TTL`` segundos o se publica una entrada
+  programada.
+
+Invalidar no borra las cifras: incrementa una versión en la caché y las
+guardadas pasan a estar obsoletas. Solo la petición que consigue el bloqueo
+(``cache.add``) las recuenta; mientras tanto las demás siguen sirviendo las
+anteriores, así una ráfaga de pedidos o registros no lanza un recuento por
+petición.
+
+Con una caché local (LocMem) cada proceso guarda sus propias cifras y la
+invalidación solo llega al proceso que guardó el objeto: los demás se
+actualizan al caducar. Con una caché compartida (Redis, Memcached...) llega a
+todos (ver el aviso ``config.W001``).
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+CLAVE_CACHE = "estadisticas:sitio"
+CLAVE_VERSION = "estadisticas:version"
+CLAVE_RECALCULO = "estadisticas:recalculando"
+# Segundos que se sirven las cifras caducadas si la petición que las recuenta no termina
+ESPERA_RECALCULO = 60
+
+# Modelos cuyo número de filas cambia alguna estadística (ver config/signals.py)
+MODELOS = (
+    "cursos.Curso", "blog.Entrada", "tienda.Producto", "tienda.Pedido", "academia.Enrollment",
+    settings.AUTH_USER_MODEL,
+)
+
+
+def _conjuntos():
+    from academia.models import Enrollment
+    from blog.models import Entrada
+    from cursos.models import Curso
+    from tienda.models import Pedido, Producto
+
+    return {
+        "cursos": Curso.objects.all(),
+        "entradas": Entrada.objects.publicadas(),
+        "usuarios": get_user_model().objects.filter(is_active=True),
+        "productos": Producto.objects.all(),
+        "pedidos": Pedido.objects.all(),
+        "inscripciones": Enrollment.objects.all(),
+    }
+
+
+def calcular():
+    """
+    Cuenta todas las estadísticas con una única consulta::
+
+        SELECT (SELECT COUNT(*) FROM (<cursos>) AS cursos), (SELECT COUNT(*) FROM (<entradas>) ...), ...
+    """
+    conjuntos = _conjuntos()
+    columnas, parametros = [], []
+    for nombre, queryset in conjuntos.items():
+        sql, params = queryset.order_by().values("pk").query.sql_with_params()
+        columnas.append(f"(SELECT COUNT(*) FROM ({sql}) AS {connection.ops.quote_name(nombre)})")
+        parametros.extend(params)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT " + ", ".join(columnas), parametros)
+        fila = cursor.fetchone()
+    return dict(zip(conjuntos, fila))
+
+
+def recalcular():
+    """
+    Calcula las estadísticas y las guarda en la caché. Devuelve el diccionario guardado.
+    """
+    from blog.models import Entrada
+
+    ahora = timezone.now()
+    caduca = ahora + timedelta(seconds=getattr(settings, "ESTADISTICAS_TTL", 60 * 15))
+    # Una entrada programada cambia el número de artículos al publicarse
+    siguiente = (Entrada.objects.filter(publicado=True, fecha_publicacion__gt=ahora)
+                 .order_by("fecha_publicacion")
+                 .values_list("fecha_publicacion", flat=True)
+                 .first())
+    if siguiente:
+        caduca = min(caduca, siguiente)
+    # La versión se lee antes de contar: una invalidación durante el recuento deja las cifras obsoletas
+    version = _version()
+    datos = {**calcular(), "calculadas": ahora, "caduca": caduca, "version": version}
+    cache.set(CLAVE_CACHE, datos, None)
+    return datos
+
+
+def _version():
+    actual = cache.get(CLAVE_VERSION)
+    if actual is None:
+        # Si la versión se pierde (reinicio, desalojo) no se reutiliza un número antiguo
+        cache.add(CLAVE_VERSION, time.time_ns(), None)
+        actual = cache.get(CLAVE_VERSION)
+    return actual
+
+
+def invalidar():
+    """
+    Marca como obsoletas las cifras guardadas (se siguen sirviendo hasta que una petición las recuenta).
+    """
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.add(CLAVE_VERSION, time.time_ns(), None)
+
+
+def obtener():
+    """
+    Estadísticas del sitio desde la caché::
+
+        {"cursos": 12, "entradas": 48, "usuarios": 1530, "productos": 20,
+         "pedidos": 310, "inscripciones": 95, "calculadas": datetime, "caduca": datetime, "version": 7}
+
+    Si han caducado o están obsoletas se recuentan; si otra petición ya lo está
+    haciendo, se devuelven las anteriores.
+    """
+    guardado = cache.get_many([CLAVE_CACHE, CLAVE_VERSION])
+    datos = guardado.get(CLAVE_CACHE)
+    if datos is None:
+        return recalcular()
+    vigentes = datos["caduca"] > timezone.now() and datos.get("version") == guardado.get(CLAVE_VERSION)
+    if not vigentes and cache.add(CLAVE_RECALCULO, True, ESPERA_RECALCULO):
+        try:
+            datos = recalcular()
+        finally:
+            cache.delete(CLAVE_RECALCULO)
+    return datos
@@ -0,0 +1,273 @@
+"""
+Derivadas de imágenes: miniaturas de ancho fijo en WebP/AVIF y en el formato
+original (JPEG o PNG si tiene transparencia).
+
+Se generan con Pillow al subir la imagen (tarea ``config.generar_derivadas``)
+o con ``manage.py generar_derivadas``; nunca durante una petición: si una
+plantilla pide derivadas que aún no existen (p. ej. otros anchos, o un estático
+recién desplegado) se encola su generación y mientras tanto se enlaza el
+original. Un fichero que Pillow no puede leer se registra en el log y también
+se enlaza tal cual. Se guardan en ``MEDIA_ROOT/<IMAGENES_DIR>/`` con un nombre
+que incluye el hash del contenido del original: si la imagen cambia, cambia la
+URL y los navegadores no sirven una copia vieja, así que las derivadas se
+pueden cachear sin caducidad.
+
+En plantillas se usa el tag ``{% imagen %}`` (``{% load imagenes %}``), que
+emite un ``<picture>`` con una ``<source>`` por formato moderno y un ``<img>``
+con ``srcset``. Acepta un ``ImageField`` o la ruta de un estático
+(``'img/logo.png'``).
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+logger = logging.getLogger(__name__)
+
+# Campos de imagen cuyas derivadas se generan al guardar el objeto (ver config/apps.py)
+CAMPOS = (
+    ("tienda.Producto", "imagen"),
+    ("cursos.Curso", "imagen"),
+    ("academia.Course", "cover_image"),
+    ("blog.Entrada", "imagen_destacada"),
+)
+
+PREFIJO_CACHE = "imagenes:"
+PREFIJO_PEDIDA = "imagenes:pedida:"
+
+# Segundos antes de volver a encolar unas derivadas que se pidieron y aún no están
+ESPERA_GENERACION = 60 * 5
+
+# Errores de Pillow con un fichero que no es una imagen válida (o está truncado)
+_ERRORES_LECTURA = (UnidentifiedImageError, Image.DecompressionBombError, OSError)
+
+# Parámetros de codificación por formato
+_GUARDADO = {
+    "avif": {"format": "AVIF", "quality": 55, "speed": 6},
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+    "png": {"format": "PNG", "optimize": True},
+}
+_TIPOS = {"avif": "image/avif", "webp": "image/webp", "jpg": "image/jpeg", "png": "image/png"}
+
+
+def anchos_por_defecto():
+    return tuple(getattr(settings, "IMAGENES_ANCHOS", (160, 320, 640, 1024)))
+
+
+def formatos_modernos():
+    """
+    Formatos que se generan además del original, según lo que soporte Pillow.
+    """
+    formatos = getattr(settings, "IMAGENES_FORMATOS", ("avif", "webp"))
+    return tuple(formato for formato in formatos if features.check(formato))
+
+
+def directorio():
+    return Path(settings.MEDIA_ROOT) / getattr(settings, "IMAGENES_DIR", "derivadas")
+
+
+def _url(relativa):
+    return f"{settings.MEDIA_URL}{getattr(settings, 'IMAGENES_DIR', 'derivadas')}/{relativa}"
+
+
+def origen(fuente):
+    """
+    Ruta en disco del original: un ``FieldFile`` o la ruta de un estático. ``None`` si no existe.
+    """
+    if not fuente:
+        return None
+    if isinstance(fuente, str):
+        encontrada = finders.find(fuente)
+        if encontrada is None and settings.STATIC_ROOT:
+            encontrada = Path(settings.STATIC_ROOT) / fuente
+        ruta = Path(encontrada) if encontrada else None
+    else:
+        try:
+            ruta = Path(fuente.path)
+        except (NotImplementedError, ValueError):  # almacenamiento remoto o campo vacío
+            return None
+    return ruta if ruta is not None and ruta.is_file() else None
+
+
+def _hash(ruta):
+    resumen = hashlib.sha256()
+    with open(ruta, "rb") as fichero:
+        for bloque in iter(lambda: fichero.read(1 << 16), b""):
+            resumen.update(bloque)
+    return resumen.hexdigest()[:16]
+
+
+def _manifiesto(clave):
+    return directorio() / "manifiestos" / f"{clave}.json"
+
+
+def _guardar(destino, escribir):
+    # Escritura atómica: una petición simultánea nunca sirve una imagen (o un manifiesto) a medias
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=destino.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fichero:
+            escribir(fichero)
+        os.replace(temporal, destino)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+
+
+def _transparente(imagen):
+    if imagen.mode in ("RGBA", "LA", "PA"):
+        return imagen.getchannel("A").getextrema()[0] < 255
+    return "transparency" in imagen.info
+
+
+def generar(ruta, anchos=None):
+    """
+    Genera (si faltan) las derivadas de la imagen en ``ruta`` y devuelve su descripción::
+
+        {"hash": "3fa2…", "ancho": 1536, "alto": 1024, "original": "png",
+         "formatos": {"avif": [(320, url), ...], "webp": [...], "png": [...]}}
+    """
+    anchos = sorted(set(anchos or anchos_por_defecto()))
+    contenido = _hash(ruta)
+    carpeta = directorio() / contenido[:2]
+
+    with Image.open(ruta) as abierta:
+        imagen = ImageOps.exif_transpose(abierta)
+        ancho, alto = imagen.size
+        transparente = _transparente(imagen)
+        imagen = imagen.convert("RGBA" if transparente else "RGB")
+
+        original = "png" if transparente else "jpg"
+        # Nunca se amplía: los anchos mayores (o casi iguales) que el original se sustituyen por él
+        validos = [a for a in anchos if a < ancho * 0.9]
+        if not validos or anchos[-1] >= ancho:
+            validos.append(ancho)
+
+        formatos = {formato: [] for formato in (*formatos_modernos(), original)}
+        for a in validos:
+            reducida = None
+            for formato, lista in formatos.items():
+                relativa = f"{contenido[:2]}/{contenido}-{a}.{formato}"
+                destino = carpeta / f"{contenido}-{a}.{formato}"
+                if not destino.exists():
+                    if reducida is None:
+                        reducida = imagen if a == ancho else imagen.resize(
+                            (a, max(1, round(alto * a / ancho))), Image.Resampling.LANCZOS
+                        )
+                    _guardar(destino, lambda fichero: reducida.save(fichero, **_GUARDADO[formato]))
+                lista.append((a, _url(relativa)))
+
+    return {"hash": contenido, "ancho": ancho, "alto": alto, "original": original, "formatos": formatos}
+
+
+def derivadas(fuente, anchos=None, crear=False):
+    """
+    Descripción de las derivadas de ``fuente`` (ver ``generar``), o ``None`` si
+    no hay imagen, no se puede leer o sus derivadas todavía no existen.
+
+    Sin ``crear`` (plantillas) no se codifica nada: si faltan las derivadas se
+    encola su generación y se devuelve ``None``. Con ``crear=True`` (tareas y
+    ``manage.py generar_derivadas``) se generan en el momento.
+
+    La descripción se guarda por ruta, tamaño y fecha del original en un
+    manifiesto junto a las derivadas (lo ven todos los procesos) y en la caché:
+    una vez generadas, pedirlas solo cuesta un ``stat`` del fichero.
+    """
+    ruta = origen(fuente)
+    if ruta is None:
+        return None
+    anchos = tuple(sorted(set(anchos or anchos_por_defecto())))
+    try:
+        estado = ruta.stat()
+        clave = hashlib.md5(
+            f"{ruta}:{estado.st_size}:{estado.st_mtime_ns}:{anchos}:{formatos_modernos()}".encode()
+        ).hexdigest()
+        info = cache.get(PREFIJO_CACHE + clave)
+        if info is None:
+            info = _leer_manifiesto(clave)
+            if info is None and crear:
+                info = _crear(ruta, anchos, clave)
+            elif info is None:
+                _pedir(fuente, anchos, clave)
+                # Con TAREAS_SINCRONAS la tarea ya se ha ejecutado
+                info = _leer_manifiesto(clave)
+                if info is None:
+                    return None
+            cache.set(PREFIJO_CACHE + clave, info, None)
+    except _ERRORES_LECTURA:
+        logger.warning("No se pueden generar las derivadas de %s", ruta, exc_info=True)
+        return None
+    return None if info.get("error") else info
+
+
+def _crear(ruta, anchos, clave):
+    try:
+        info = generar(ruta, anchos)
+    except _ERRORES_LECTURA:
+        logger.warning("No se pueden generar las derivadas de %s", ruta, exc_info=True)
+        # Se anota el fallo: las plantillas enlazan el original sin volver a encolar la tarea
+        info = {"error": True}
+    _guardar(_manifiesto(clave), lambda fichero: fichero.write(json.dumps(info).encode()))
+    return info
+
+
+def _leer_manifiesto(clave):
+    try:
+        return json.loads(_manifiesto(clave).read_bytes())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _pedir(fuente, anchos, clave):
+    """
+    Encola la generación de las derivadas, como mucho una vez cada ``ESPERA_GENERACION`` segundos.
+    """
+    if not cache.add(PREFIJO_PEDIDA + clave, True, ESPERA_GENERACION):
+        return
+    from .tareas import generar_derivadas, generar_derivadas_estatico  # config.tareas importa este módulo
+
+    if isinstance(fuente, str):
+        generar_derivadas_estatico.encolar(args=[fuente, list(anchos)], unica=True)
+    elif fuente.instance.pk is not None:
+        generar_derivadas.encolar(
+            args=[fuente.instance._meta.label, fuente.instance.pk, fuente.field.name, list(anchos)], unica=True,
+        )
+
+
+def miniaturas(fuente, ancho):
+    """
+    ``{formato: URL}`` de la derivada más pequeña con al menos ``ancho`` píxeles
+    (o la mayor que haya) en cada formato generado, los modernos primero.
+    Vacío si no hay imagen.
+    """
+    info = derivadas(fuente, (*anchos_por_defecto(), ancho))
+    if info is None:
+        return {}
+    return {
+        formato: next((url for a, url in candidatas if a >= ancho), candidatas[-1][1])
+        for formato, candidatas in info["formatos"].items()
+    }
+
+
+def url_miniatura(fuente, ancho, formato=None):
+    """
+    URL de la miniatura de ``fuente`` en ``formato``. Por defecto, o si ese
+    formato no se genera (Pillow sin soporte, ``IMAGENES_FORMATOS``), en el
+    primero disponible.
+    """
+    urls = miniaturas(fuente, ancho)
+    if not urls:
+        return ""
+    return urls.get(formato) or next(iter(urls.values()))
+
+
+def tipo(formato):
+    return _TIPOS[formato]
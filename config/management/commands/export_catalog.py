@@ -0,0 +1,36 @@
+import sys
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand
+
+from config import catalogo as cat
+from config.exportar import lineas_csv, lineas_jsonl
+
+
+class Command(BaseCommand):
+    help = "Exporta productos o cursos a CSV o JSON Lines (el formato que lee import_catalog)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("catalogo", choices=sorted(cat.CATALOGOS))
+        parser.add_argument("fichero", nargs="?", default="-", help="Ruta de salida ('-' o nada: salida estándar)")
+        parser.add_argument("--formato", choices=cat.FORMATOS,
+                            help="Por defecto según la extensión (.jsonl/.ndjson/.json o CSV)")
+        parser.add_argument("--lote", type=int, default=2000, help="Filas leídas por consulta")
+
+    def handle(self, *args, **options):
+        catalogo = cat.CATALOGOS[options["catalogo"]]
+        formato = cat.formato_de(options["fichero"], options["formato"])
+        campos = cat.campos_exportacion(catalogo)
+        queryset = catalogo.model.objects.order_by("pk")
+        if formato == "csv":
+            lineas = lineas_csv(queryset, campos, catalogo.columnas, options["lote"])
+        else:
+            lineas = lineas_jsonl(queryset, campos, options["lote"], claves=catalogo.columnas)
+
+        if options["fichero"] == "-":
+            salida = nullcontext(sys.stdout)
+        else:
+            salida = open(options["fichero"], "w", encoding="utf-8", newline="")
+        with salida as destino:
+            for bloque in lineas:
+                destino.write(bloque)
@@ -0,0 +1,76 @@
+import json
+
+from django.apps import apps
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from config import imagenes
+
+EXTENSIONES = (".jpg", ".jpeg", ".png", ".webp")
+
+
+class Command(BaseCommand):
+    help = "Genera las miniaturas WebP/AVIF de las imágenes subidas y de los estáticos"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sin-estaticos", action="store_true",
+                            help="No procesa las imágenes de los directorios de estáticos")
+        parser.add_argument("--limpiar", action="store_true",
+                            help="Borra las derivadas de imágenes que ya no existen")
+        parser.add_argument("--lote", type=int, default=200,
+                            help="Objetos que se leen de la base de datos por iteración")
+
+    def handle(self, *args, **options):
+        if options["limpiar"] and options["sin_estaticos"]:
+            raise CommandError("--limpiar necesita procesar también los estáticos")
+        en_uso = set()
+        errores = 0
+
+        for modelo, campo in imagenes.CAMPOS:
+            objetos = (apps.get_model(modelo).objects
+                       .exclude(**{campo: ""}).exclude(**{f"{campo}__isnull": True})
+                       .only("pk", campo).order_by("pk"))
+            for objeto in objetos.iterator(chunk_size=options["lote"]):
+                errores += self._generar(getattr(objeto, campo), en_uso, f"{modelo} {objeto.pk}")
+
+        if not options["sin_estaticos"]:
+            # Solo los estáticos del proyecto (STATICFILES_DIRS), no los de las apps externas
+            finder = finders.get_finder("django.contrib.staticfiles.finders.FileSystemFinder")
+            for ruta, _ in finder.list([]):
+                if ruta.lower().endswith(EXTENSIONES):
+                    errores += self._generar(ruta, en_uso, ruta)
+
+        self.stdout.write(self.style.SUCCESS(f"{len(en_uso)} imágenes procesadas, {errores} errores"))
+
+        if options["limpiar"]:
+            borradas = 0
+            for derivada in imagenes.directorio().glob("*/*"):
+                if derivada.parent.name == "manifiestos":
+                    huerfana = derivada.suffix == ".json" and self._hash_manifiesto(derivada) not in en_uso
+                else:
+                    huerfana = derivada.suffix != ".tmp" and derivada.name.split("-", 1)[0] not in en_uso
+                if huerfana:
+                    derivada.unlink(missing_ok=True)
+                    borradas += 1
+            self.stdout.write(f"{borradas} derivadas huérfanas borradas")
+
+    def _generar(self, fuente, en_uso, nombre):
+        try:
+            info = imagenes.derivadas(fuente, crear=True)
+        except Exception as exc:
+            self.stderr.write(f"{nombre}: {exc}")
+            return 1
+        if info is None:
+            if imagenes.origen(fuente) is None:
+                return 0
+            # El motivo queda en el log de config.imagenes
+            self.stderr.write(f"{nombre}: no es una imagen válida")
+            return 1
+        en_uso.add(info["hash"])
+        return 0
+
+    def _hash_manifiesto(self, ruta):
+        try:
+            return json.loads(ruta.read_bytes())["hash"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
@@ -0,0 +1,91 @@
+import sys
+import time
+from contextlib import nullcontext
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from config import catalogo as cat
+
+ERRORES_MOSTRADOS = 20
+
+
+class Command(BaseCommand):
+    help = ("Importa productos o cursos desde un CSV o JSON Lines: crea los nuevos y actualiza "
+            "los existentes (mismo sku o slug) por lotes")
+
+    def add_arguments(self, parser):
+        parser.add_argument("catalogo", choices=sorted(cat.CATALOGOS))
+        parser.add_argument("fichero", help="Ruta del fichero o '-' para la entrada estándar")
+        parser.add_argument("--formato", choices=cat.FORMATOS,
+                            help="Por defecto según la extensión (.jsonl/.ndjson/.json o CSV)")
+        parser.add_argument("--lote", type=int, default=1000, help="Filas por INSERT")
+        parser.add_argument("--imagenes", help="Directorio del que se copian las imágenes de la columna 'imagen'")
+
+    def handle(self, *args, **options):
+        catalogo = cat.CATALOGOS[options["catalogo"]]
+        formato = cat.formato_de(options["fichero"], options["formato"])
+        importador = cat.Importador(catalogo, options["imagenes"])
+
+        if options["fichero"] == "-":
+            fichero = nullcontext(sys.stdin)
+        else:
+            try:
+                fichero = open(options["fichero"], encoding="utf-8-sig", newline="")
+            except OSError as exc:
+                raise CommandError(exc)
+
+        inicio = time.perf_counter()
+        escritas = errores = 0
+        lote, columnas = [], None
+        # Todo o nada: si un lote falla se deshacen también los anteriores (y las categorías creadas)
+        with fichero as entrada, transaction.atomic():
+            for numero, fila in cat.leer(entrada, formato):
+                if fila is None:
+                    errores += self._error(errores, numero, "JSON no válido")
+                    continue
+                if columnas is None:
+                    # Se actualizan solo las columnas que trae el fichero
+                    columnas = [columna for columna in catalogo.columnas if columna in fila]
+                    if catalogo.clave not in columnas and not importador.deriva_clave:
+                        raise CommandError(f"Falta la columna '{catalogo.clave}': sin ella cada importación "
+                                           "duplicaría los objetos")
+                try:
+                    lote.append(importador.objeto(fila))
+                except ValidationError as exc:
+                    errores += self._error(errores, numero, "; ".join(
+                        f"{campo}: {' '.join(mensajes)}" for campo, mensajes in exc.message_dict.items()
+                    ))
+                    continue
+                if len(lote) >= options["lote"]:
+                    escritas += self._guardar(importador, lote, columnas, numero)
+                    lote = []
+                    if options["verbosity"] > 1:
+                        self.stdout.write(f"  {escritas:,} filas ({escritas / (time.perf_counter() - inicio):,.0f}/s)")
+            if lote:
+                escritas += self._guardar(importador, lote, columnas, numero)
+            importador.terminar()
+
+        segundos = time.perf_counter() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"{escritas:,} filas importadas en {segundos:.1f} s ({escritas / max(segundos, 1e-6):,.0f} filas/s), "
+            f"{errores} errores"
+        ))
+        if importador.imagenes_adjuntas:
+            self.stdout.write(f"{importador.imagenes_adjuntas} imágenes copiadas: "
+                              "ejecuta `manage.py generar_derivadas --sin-estaticos` para sus miniaturas")
+
+    def _guardar(self, importador, lote, columnas, numero):
+        try:
+            return importador.guardar(lote, columnas)
+        except IntegrityError as exc:
+            # p. ej. un título de curso repetido con otro slug
+            raise CommandError(f"Lote que termina en la línea {numero}: {exc}. No se ha importado nada.")
+
+    def _error(self, errores, numero, mensaje):
+        if errores < ERRORES_MOSTRADOS:
+            self.stderr.write(f"Línea {numero}: {mensaje}")
+        elif errores == ERRORES_MOSTRADOS:
+            self.stderr.write("(no se muestran más errores)")
+        return 1
@@ -0,0 +1,77 @@
+import json
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+PAGINAS = ("/", "/tienda/listado/", "/blog/", "/academia/cursos/")
+
+_REFERENCIA = re.compile(r'(?:href|src)="(%s[^"?#]+)' % re.escape(settings.STATIC_URL))
+
+
+class Command(BaseCommand):
+    help = ("Bytes de estáticos (CSS, JS, imágenes) que descarga cada página: originales "
+            "sin comprimir frente a los minificados y comprimidos que deja collectstatic")
+
+    def add_arguments(self, parser):
+        parser.add_argument("paginas", nargs="*", default=PAGINAS,
+                            help="Rutas a medir (por defecto: inicio, tienda, blog y academia)")
+
+    def handle(self, *args, **options):
+        manifiesto = Path(settings.STATIC_ROOT) / "staticfiles.json"
+        if not manifiesto.exists():
+            raise CommandError(
+                "No hay manifiesto en STATIC_ROOT: ejecuta `DJANGO_ENV=production manage.py collectstatic`"
+            )
+        # nombre con hash -> nombre original
+        originales = {v: k for k, v in json.loads(manifiesto.read_text())["paths"].items()}
+
+        hosts = [host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"]
+        cliente = Client(HTTP_HOST=hosts[0] if hosts else "localhost", raise_request_exception=False)
+
+        self.stdout.write(f"{'Página':<24}{'ficheros':>9}{'antes':>12}{'primera':>12}{'repetida':>12}")
+        totales = [0, 0, 0]
+        for pagina in options["paginas"]:
+            response = cliente.get(pagina)
+            if response.status_code != 200:
+                self.stderr.write(f"{pagina}: respuesta {response.status_code}, se omite")
+                continue
+            nombres = dict.fromkeys(
+                url[len(settings.STATIC_URL):] for url in _REFERENCIA.findall(response.content.decode())
+            )
+            antes = primera = repetida = 0
+            for nombre in nombres:
+                original = originales.get(nombre, nombre)
+                encontrado = finders.find(original)
+                antes += _original(encontrado)
+                servido = _servido(Path(settings.STATIC_ROOT) / nombre)
+                primera += servido
+                # Con hash en el nombre se sirve como "immutable": la visita repetida no lo pide
+                if nombre == original:
+                    repetida += servido
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"  {original:<45}{_original(encontrado):>12,}{servido:>12,}")
+            for i, valor in enumerate((antes, primera, repetida)):
+                totales[i] += valor
+            self.stdout.write(f"{pagina:<24}{len(nombres):>9}{antes:>12,}{primera:>12,}{repetida:>12,}")
+        self.stdout.write(f"{'Total':<33}{totales[0]:>12,}{totales[1]:>12,}{totales[2]:>12,}")
+        self.stdout.write(
+            "antes: ficheros originales sin comprimir; primera: variante más pequeña (br, gz o "
+            "sin comprimir) en la primera visita; repetida: lo que se vuelve a descargar con la caché llena"
+        )
+
+
+def _original(encontrado):
+    return Path(encontrado).stat().st_size if encontrado else 0
+
+
+def _servido(ruta):
+    """
+    Bytes que WhiteNoise envía a un navegador que acepta brotli y gzip.
+    """
+    candidatas = [ruta.with_name(ruta.name + extension) for extension in (".br", ".gz")] + [ruta]
+    tamanos = [candidata.stat().st_size for candidata in candidatas if candidata.exists()]
+    return min(tamanos, default=0)
@@ -0,0 +1,242 @@
+"""
+Paginación por cursor (keyset) para listados largos.
+
+El ``Paginator`` de Django pide cada página con ``OFFSET``: la base de datos
+recorre y descarta todas las filas anteriores, así que la página 5.000 cuesta
+5.000 veces más que la primera, y además hace un ``COUNT(*)`` en cada visita.
+``PaginadorKeyset`` pide la página siguiente "a partir de la última fila vista"
+(``WHERE (fecha, id) < (última fecha, último id)``), que con un índice sobre
+esas columnas cuesta lo mismo en cualquier página.
+
+La posición se guarda en un cursor opaco y firmado que sustituye al número de
+página en ``?page=``. El cursor lleva una huella del orden: el de otro orden
+(p. ej. tras cambiar ``?orden=`` conservando ``?page=``) devuelve la primera página. La página devuelta imita a la de Django
+(``has_next``, ``next_page_number``, ``number``, ``paginator.num_pages``...)
+y ``next_page_number`` / ``previous_page_number`` devuelven el cursor, así que
+las plantillas que enlazan con ``?page={{ page_obj.next_page_number }}``
+funcionan sin cambios. Un número de página (enlaces antiguos) se sirve con
+``OFFSET`` como antes.
+
+El total es opcional y aproximado: un ``COUNT(*)`` guardado en la caché
+``PAGINACION_TOTAL_TTL`` segundos (``total=False`` lo desactiva y
+``paginator.num_pages`` pasa a ser ``None``).
+
+Las columnas del orden no pueden ser nulas; el ``pk`` se añade al final si no
+está, para que el orden sea total.
+"""
+import datetime
+import hashlib
+import math
+from collections.abc import Sequence
+from decimal import Decimal
+from functools import cached_property, reduce
+from operator import or_
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.db.models import BooleanField, F, Func, Q
+from django.db.models.lookups import GreaterThanOrEqual, LessThanOrEqual
+
+SAL = "config.paginacion"
+PREFIJO_TOTAL = "paginacion:total:"
+
+
+def _serializable(valor):
+    # isoformat conserva los microsegundos (DjangoJSONEncoder los recorta y el cursor dejaría de ser exacto)
+    if isinstance(valor, (datetime.date, datetime.time)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+class _Improbable(Func):
+    """
+    ``unlikely(condición)`` en SQLite; la condición tal cual en el resto de bases de datos.
+
+    Sin estadísticas, SQLite da el mismo coste a dos cotas sobre la misma columna
+    y recorre el índice desde la primera que aparece en el ``WHERE`` (p. ej. la
+    ``fecha_publicacion <= ahora`` de ``publicadas()``, que está antes que las del
+    cursor). ``unlikely`` no cambia el resultado, pero le indica que la cota del
+    cursor descarta casi todas las filas y que es la que debe usar.
+    """
+    function = "unlikely"
+    output_field = BooleanField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        return compiler.compile(self.source_expressions[0])
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+class PaginadorKeyset:
+    def __init__(self, queryset, per_page, orden=None, total=True):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        orden = list(orden or queryset.query.order_by or queryset.model._meta.ordering)
+        opts = queryset.model._meta
+        if not any(campo.lstrip("-") in ("pk", opts.pk.name) for campo in orden):
+            orden.append(("-" if orden and orden[-1].startswith("-") else "") + "pk")
+        # [(nombre, campo del modelo, descendente)]
+        self.orden = [
+            (nombre.lstrip("-"), opts.pk if nombre.lstrip("-") == "pk" else opts.get_field(nombre.lstrip("-")),
+             nombre.startswith("-"))
+            for nombre in orden
+        ]
+        self.total = total
+
+    # -----------------------------
+    # Total aproximado
+    # -----------------------------
+
+    @cached_property
+    def count(self):
+        """
+        Número de resultados según un ``COUNT(*)`` cacheado (o ``None`` si se ha desactivado).
+
+        La clave de la caché sale de la consulta SQL, o de ``total`` si es un
+        texto: hace falta cuando la consulta cambia en cada petición (p. ej.
+        filtra por ``timezone.now()``).
+        """
+        if not self.total:
+            return None
+        if isinstance(self.total, str):
+            clave = PREFIJO_TOTAL + self.total
+        else:
+            sql, params = self.queryset.order_by().query.sql_with_params()
+            clave = PREFIJO_TOTAL + hashlib.md5(f"{sql}|{params}".encode()).hexdigest()
+        total = cache.get(clave)
+        if total is None:
+            total = self.queryset.order_by().count()
+            cache.set(clave, total, getattr(settings, "PAGINACION_TOTAL_TTL", 60 * 5))
+        return total
+
+    @property
+    def num_pages(self):
+        if self.count is None:
+            return None
+        return max(1, math.ceil(self.count / self.per_page))
+
+    # -----------------------------
+    # Cursores
+    # -----------------------------
+
+    @cached_property
+    def huella(self):
+        """
+        Resumen del orden (modelo, columnas y sentido) que se firma dentro de cada cursor.
+        """
+        orden = ",".join(("-" if descendente else "") + nombre for nombre, _, descendente in self.orden)
+        return hashlib.md5(f"{self.queryset.model._meta.label}:{orden}".encode()).hexdigest()[:8]
+
+    def cursor(self, objeto, numero, hacia_atras=False):
+        valores = [_serializable(getattr(objeto, campo.attname)) for _, campo, _ in self.orden]
+        return signing.dumps({"o": self.huella, "v": valores, "n": numero, "a": hacia_atras},
+                             salt=SAL, compress=True)
+
+    def _leer_cursor(self, token):
+        try:
+            datos = signing.loads(token, salt=SAL)
+            if datos["o"] != self.huella:
+                return None  # cursor de otro orden o de otro listado
+            valores = [campo.to_python(valor) for (_, campo, _), valor in zip(self.orden, datos["v"], strict=True)]
+            return valores, max(1, int(datos["n"])), bool(datos["a"])
+        except (signing.BadSignature, ValidationError, KeyError, TypeError, ValueError):
+            return None
+
+    def _despues_de(self, valores, hacia_atras):
+        """
+        Filtro "filas posteriores a ``valores``" en el orden del listado (anteriores si ``hacia_atras``).
+        """
+        condiciones = []
+        for i, (nombre, _, descendente) in enumerate(self.orden):
+            operador = "lt" if descendente != hacia_atras else "gt"
+            iguales = {self.orden[j][0]: valores[j] for j in range(i)}
+            condiciones.append(Q(**iguales, **{f"{nombre}__{operador}": valores[i]}))
+        # La cota sobre la primera columna es redundante, pero permite recorrer el índice por rango
+        nombre, _, descendente = self.orden[0]
+        cota = (LessThanOrEqual if descendente != hacia_atras else GreaterThanOrEqual)(F(nombre), valores[0])
+        return Q(_Improbable(cota)) & reduce(or_, condiciones)
+
+    def _ordenado(self, hacia_atras=False):
+        return self.queryset.order_by(*[
+            ("-" if descendente != hacia_atras else "") + nombre for nombre, _, descendente in self.orden
+        ])
+
+    # -----------------------------
+    # Páginas
+    # -----------------------------
+
+    def get_page(self, page):
+        """
+        Página del cursor ``page`` (la primera si falta o no es válido, como ``Paginator.get_page``).
+        """
+        page = str(page or "")
+        if page.isdigit() and int(page) > 1:
+            return self._pagina_por_numero(int(page))
+        leido = self._leer_cursor(page) if page and not page.isdigit() else None
+        if leido is None:
+            filas = list(self._ordenado()[:self.per_page + 1])
+            return PaginaKeyset(filas[:self.per_page], 1, self, anterior=False, siguiente=len(filas) > self.per_page)
+
+        valores, numero, hacia_atras = leido
+        queryset = self._ordenado(hacia_atras)
+        queryset = queryset.filter(self._despues_de(valores, hacia_atras))
+        filas = list(queryset[:self.per_page + 1])
+        if not filas:
+            # Se han borrado las filas de esa página: se vuelve al principio
+            return self.get_page(None)
+        hay_mas = len(filas) > self.per_page
+        filas = filas[:self.per_page]
+        if hacia_atras:
+            filas.reverse()
+            return PaginaKeyset(filas, numero if hay_mas else 1, self, anterior=hay_mas, siguiente=True)
+        return PaginaKeyset(filas, numero, self, anterior=True, siguiente=hay_mas)
+
+    def _pagina_por_numero(self, numero):
+        inicio = (numero - 1) * self.per_page
+        filas = list(self._ordenado()[inicio:inicio + self.per_page + 1])
+        if not filas:
+            return self.get_page(None)
+        return PaginaKeyset(filas[:self.per_page], numero, self, anterior=True, siguiente=len(filas) > self.per_page)
+
+
+class PaginaKeyset(Sequence):
+    """
+    Página con la interfaz de ``django.core.paginator.Page`` que usan las plantillas.
+    """
+
+    def __init__(self, object_list, number, paginator, anterior, siguiente):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._anterior = anterior and bool(object_list)
+        self._siguiente = siguiente and bool(object_list)
+
+    def __repr__(self):
+        return f"<Página {self.number} (cursor)>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, indice):
+        return self.object_list[indice]
+
+    def has_next(self):
+        return self._siguiente
+
+    def has_previous(self):
+        return self._anterior
+
+    def has_other_pages(self):
+        return self._anterior or self._siguiente
+
+    def next_page_number(self):
+        # Cursor de la página siguiente (va en ?page= como el número de página)
+        return self.paginator.cursor(self.object_list[-1], self.number + 1)
+
+    def previous_page_number(self):
+        return self.paginator.cursor(self.object_list[0], max(1, self.number - 1), hacia_atras=True)
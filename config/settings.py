@@ -34,6 +34,8 @@ INSTALLED_APPS = [
     'blog',
     'usuarios',
     'ia',
+    'tareas',
+    'config',  # utilidades del sitio: imágenes responsive, caché de páginas
 
     # Apps externas (ejemplo: crispy forms, rest framework)
     # 'crispy_forms',
@@ -43,6 +45,7 @@ INSTALLED_APPS = [
 # 🛡️ Middleware
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',  # estáticos con compresión y caché (ver config/estaticos.py)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -66,6 +69,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'tienda.context_processors.carrito',
             ],
         },
     },
@@ -83,6 +87,39 @@ DATABASES = {
     }
 }
 
+# ⚡ Caché
+# Con varios workers, 'default' y 'paginas' tienen que ser una caché compartida (Redis/Memcached):
+# con LocMem las invalidaciones solo llegan al proceso que guarda el objeto (aviso config.W001 de `check --deploy`)
+# 'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'academia-bryan',
+    },
+    # Contadores con escritura diferida: sin expiración y con margen para no descartarlos
+    'contadores': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'academia-bryan-contadores',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    # Páginas completas y fragmentos de plantilla (config/cache_paginas.py)
+    'paginas': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'academia-bryan-paginas',
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    },
+}
+BLOG_BARRA_LATERAL_TTL = 60 * 15  # segundos máximos que se reutiliza la barra lateral del blog
+BLOG_VISITAS_CACHE = 'contadores'  # alias de CACHES donde se acumulan las visitas
+BLOG_VISITAS_INTERVALO = 30        # segundos entre volcados de visitas a la base de datos
+BLOG_VISITAS_VOLCADO_AUTOMATICO = True  # False si se vuelca solo con `manage.py volcar_visitas`
+BLOG_BUSQUEDA_MAX_RESULTADOS = 1000     # resultados (por relevancia) que se paginan en la búsqueda
+ACADEMIA_CURRICULO_TTL = 60 * 5         # temario de cada curso (se invalida al cambiar módulos/lecciones)
+CACHE_PAGINAS_TTL = 60 * 5              # páginas completas para anónimos (se invalidan al cambiar sus modelos)
+ESTADISTICAS_TTL = 60 * 15              # segundos que se reutilizan las cifras del sitio antes de recontarlas
+PAGINACION_TOTAL_TTL = 60 * 5           # total aproximado de los listados paginados por cursor
+
 # 🔐 Autenticación
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -110,10 +147,23 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']  # carpeta global de estáticos
 STATIC_ROOT = BASE_DIR / 'staticfiles'    # carpeta para collectstatic en producción
+# En producción collectstatic minifica, añade el hash al nombre y comprime (gzip/brotli)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': 'config.estaticos.EstaticosMinificados' if ENVIRONMENT == 'production'
+        else 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+WHITENOISE_MANIFEST_STRICT = False  # los estáticos que no están en el manifiesto se buscan en disco
 
 # 📂 Archivos multimedia
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+CERTIFICADOS_DIR = 'certificados'         # PDF de certificados ya generados (dentro de MEDIA_ROOT)
+IMAGENES_DIR = 'derivadas'                # miniaturas WebP/AVIF generadas (dentro de MEDIA_ROOT)
+IMAGENES_ANCHOS = (160, 320, 640, 1024)   # anchos (px) de las miniaturas del srcset
+IMAGENES_FORMATOS = ('avif', 'webp')      # formatos modernos (se omiten los que Pillow no soporte)
 
 # 📧 Configuración de email (ejemplo, para notificaciones)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
@@ -125,5 +175,30 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 # EMAIL_HOST_USER = 'tu_email'
 # EMAIL_HOST_PASSWORD = 'tu_password'
 
+# 🤖 Inteligencia artificial (app ia)
+IA_MODELO = "distilgpt2"    # se carga de forma perezosa en el primer uso
+IA_BACKEND = "pytorch"      # pytorch | int8 | onnx (ver ia/backends.py)
+IA_ONNX_DIR = BASE_DIR / 'modelos_onnx'  # grafos ONNX exportados
+IA_SAFETENSORS = None       # None: safetensors si existen, si no .bin | True: solo safetensors | False: solo .bin
+IA_PRECARGAR = ENVIRONMENT == 'production'  # precargar en el maestro de gunicorn (gunicorn.conf.py)
+IA_LOTE_MAXIMO = 8          # máximo de preguntas que se generan juntas en un lote
+IA_ESPERA_MAXIMA_MS = 20    # tiempo máximo de espera para completar un lote
+IA_HILOS = 2                # lotes que se generan en paralelo
+IA_RELLENO_MAXIMO = 32      # diferencia máxima de longitud (en tokens) dentro de un lote
+IA_CACHE_ACTIVA = True      # cachear respuestas (fuerza generación determinista)
+IA_CACHE_MAX_ENTRADAS = 1024  # tamaño de la LRU en memoria de cada proceso
+IA_CACHE_TTL = 60 * 60 * 24   # segundos que se conserva una respuesta
+IA_CACHE_ALIAS = None       # alias de CACHES para el nivel persistente (ej: 'default')
+
+# 🧵 Tareas en segundo plano (app tareas, ejecutadas con `manage.py run_workers`)
+TAREAS_SINCRONAS = False        # True: se ejecutan al encolarlas (desarrollo sin trabajadores)
+TAREAS_PROCESOS = 2             # procesos trabajadores por defecto
+TAREAS_INTERVALO = 1.0          # segundos de espera con la cola vacía
+TAREAS_REINTENTO_SEGUNDOS = 10  # espera antes del primer reintento (luego se duplica)
+TAREAS_LATIDO = 30              # segundos entre renovaciones del latido de una tarea en curso
+TAREAS_TIEMPO_MAXIMO = 600      # segundos sin latido tras los que una tarea "en curso" se da por abandonada
+TAREAS_RETENCION_DIAS = 7       # días que se conservan las tareas terminadas y sus ficheros
+TAREAS_RESULTADOS_DIR = BASE_DIR / 'resultados_tareas'  # ficheros generados (no públicos)
+
 # ⚙️ Configuración por defecto
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -0,0 +1,56 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from . import cache_paginas, estadisticas
+from .imagenes import CAMPOS
+from .tareas import generar_derivadas
+
+
+def conectar():
+    for modelo, campo in CAMPOS:
+        post_save.connect(encolar_derivadas, sender=apps.get_model(modelo),
+                          dispatch_uid=f"imagenes:{modelo}.{campo}")
+    for modelos in cache_paginas.GRUPOS.values():
+        for modelo in modelos:
+            for senal in (post_save, post_delete):
+                senal.connect(invalidar_paginas, sender=apps.get_model(modelo),
+                              dispatch_uid=f"paginas:{modelo}")
+    for modelo in estadisticas.MODELOS:
+        for senal in (post_save, post_delete):
+            senal.connect(actualizar_estadisticas, sender=apps.get_model(modelo),
+                          dispatch_uid=f"estadisticas:{modelo}")
+
+
+def encolar_derivadas(sender, instance, update_fields=None, **kwargs):
+    """
+    Encola la generación de las derivadas de las imágenes del objeto guardado.
+    """
+    etiqueta = sender._meta.label
+    for modelo, campo in CAMPOS:
+        if modelo != etiqueta or not getattr(instance, campo):
+            continue
+        if update_fields is not None and campo not in update_fields:
+            continue  # p. ej. contadores de visitas: la imagen no ha cambiado
+        transaction.on_commit(lambda campo=campo: generar_derivadas.encolar(
+            args=[etiqueta, instance.pk, campo], unica=True,
+        ))
+
+
+def invalidar_paginas(sender, **kwargs):
+    """
+    Cambia la versión de los grupos de páginas cacheadas que dependen del modelo.
+    """
+    etiqueta = sender._meta.label
+    grupos = [grupo for grupo, modelos in cache_paginas.GRUPOS.items() if etiqueta in modelos]
+    transaction.on_commit(lambda: cache_paginas.invalidar(*grupos))
+
+
+def actualizar_estadisticas(sender, created=True, **kwargs):
+    """
+    Marca como obsoletas las estadísticas del sitio si el número de filas puede haber cambiado.
+    """
+    # Solo las entradas del blog cuentan según su estado (publicada o no)
+    if not created and sender._meta.label != "blog.Entrada":
+        return
+    transaction.on_commit(estadisticas.invalidar)
@@ -0,0 +1,86 @@
+"""
+Slugs únicos para los modelos con campo ``slug``.
+
+``slug_unico`` trae con una sola consulta todos los slugs que pueden chocar
+(``titulo`` y ``titulo-*``) y elige en Python el primer sufijo libre:
+``titulo``, ``titulo-2``, ``titulo-3``... Da igual cuántos objetos compartan
+título: siempre es una consulta.
+
+``guardar_con_slug`` asigna el slug y guarda. Si otro proceso se queda el
+mismo slug entre la consulta y el INSERT, la restricción ``unique`` lanza
+``IntegrityError``; entonces se calcula otro y se reintenta.
+
+Uso en ``Model.save``::
+
+    if self.slug:
+        super().save(*args, **kwargs)
+    else:
+        guardar_con_slug(self, self.titulo, partial(super().save, *args, **kwargs))
+"""
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Reintentos si otro proceso se adelanta con el mismo slug
+INTENTOS = 5
+
+
+def _candidatos(instance, campo, ambito):
+    queryset = type(instance)._default_manager.filter(**(ambito or {}))
+    if instance.pk is not None:
+        queryset = queryset.exclude(pk=instance.pk)
+    return queryset
+
+
+def slug_unico(instance, valor, campo="slug", ambito=None, ocupados=()):
+    """
+    Primer slug libre para ``valor`` en el modelo de ``instance``.
+
+    ``ambito`` limita la unicidad a un subconjunto (p. ej. las lecciones de un
+    mismo curso: ``{"course": curso}``). ``ocupados`` son slugs ya
+    repartidos que aún no se han guardado (p. ej. en una importación por lotes).
+    """
+    modelo = type(instance)
+    longitud = modelo._meta.get_field(campo).max_length
+    base = slugify(valor)[:longitud].strip("-") or modelo._meta.model_name
+    candidatos = _candidatos(instance, campo, ambito)
+    acortada = False
+
+    while True:
+        en_uso = set(
+            candidatos
+            .filter(Q(**{campo: base}) | Q(**{f"{campo}__startswith": f"{base}-"}))
+            .values_list(campo, flat=True)
+        ) | set(ocupados)
+        if base not in en_uso and not acortada:
+            return base
+        patron = re.compile(rf"{re.escape(base)}-(\d+)")
+        usados = {int(encontrado[1]) for slug in en_uso if (encontrado := patron.fullmatch(slug))}
+        n = 2
+        while n in usados:
+            n += 1
+        sufijo = f"-{n}"
+        if len(base) + len(sufijo) <= longitud:
+            return base + sufijo
+        # El sufijo no cabe: se acorta la base (otra consulta, solo con títulos muy largos)
+        base, acortada = base[:longitud - len(sufijo)].rstrip("-"), True
+
+
+def guardar_con_slug(instance, valor, guardar, campo="slug", ambito=None):
+    """
+    Asigna a ``instance`` un slug único a partir de ``valor`` y llama a ``guardar()``.
+    """
+    for intento in range(INTENTOS):
+        setattr(instance, campo, slug_unico(instance, valor, campo, ambito))
+        try:
+            # Punto de guardado: el error no invalida la transacción que haya abierta
+            with transaction.atomic():
+                return guardar()
+        except IntegrityError:
+            ocupado = _candidatos(instance, campo, ambito).filter(**{campo: getattr(instance, campo)}).exists()
+            if not ocupado or intento == INTENTOS - 1:
+                # Otra restricción, o demasiada concurrencia con el mismo título
+                setattr(instance, campo, "")
+                raise
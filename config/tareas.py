@@ -0,0 +1,37 @@
+# config/tareas.py
+from django.apps import apps
+from django.db import transaction
+
+from tareas.cola import tarea
+
+from . import cache_paginas, imagenes
+
+
+def _resumen(info):
+    if info is None:
+        return None
+    return {formato: len(lista) for formato, lista in info["formatos"].items()}
+
+
+@tarea()
+def generar_derivadas(modelo, pk, campo, anchos=None):
+    """
+    Genera las miniaturas WebP/AVIF de la imagen ``campo`` del objeto indicado.
+    """
+    objeto = apps.get_model(modelo).objects.filter(pk=pk).first()
+    if objeto is None:
+        return None
+    info = imagenes.derivadas(getattr(objeto, campo), anchos, crear=True)
+    if info is not None:
+        # Las páginas cacheadas mientras tanto enlazaban el original
+        grupos = [grupo for grupo, modelos in cache_paginas.GRUPOS.items() if modelo in modelos]
+        transaction.on_commit(lambda: cache_paginas.invalidar(*grupos))
+    return _resumen(info)
+
+
+@tarea()
+def generar_derivadas_estatico(ruta, anchos=None):
+    """
+    Genera las miniaturas de un estático (p. ej. ``'img/fondo.png'``) que una plantilla pidió y aún no existían.
+    """
+    return _resumen(imagenes.derivadas(ruta, anchos, crear=True))
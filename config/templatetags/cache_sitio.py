@@ -0,0 +1,24 @@
+from django import template
+
+from config import cache_paginas
+
+register = template.Library()
+
+
+# Versión de un grupo de la caché de páginas (para las claves de {% cache %})
+@register.simple_tag
+def version_cache(grupo):
+    """
+    Uso en plantilla::
+
+        {% load cache cache_sitio %}
+        {% version_cache "tienda" as version %}{% ttl_cache as ttl %}
+        {% cache ttl tienda_destacados version using="paginas" %}...{% endcache %}
+    """
+    return cache_paginas.version(grupo)
+
+
+# Segundos que se guardan los fragmentos (CACHE_PAGINAS_TTL)
+@register.simple_tag
+def ttl_cache():
+    return cache_paginas.ttl()
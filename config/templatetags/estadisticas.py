@@ -0,0 +1,18 @@
+from django import template
+
+from config import estadisticas
+
+register = template.Library()
+
+
+# Cifras del sitio precalculadas (panel de administración y portadas)
+@register.simple_tag
+def estadisticas_sitio():
+    """
+    Uso en plantilla::
+
+        {% load estadisticas %}
+        {% estadisticas_sitio as cifras %}
+        {{ cifras.cursos }} cursos, {{ cifras.usuarios }} usuarios
+    """
+    return estadisticas.obtener()
@@ -0,0 +1,81 @@
+from django import template
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from config import imagenes
+
+register = template.Library()
+
+
+def _extra(clase, estilo):
+    return flatatt({nombre: valor for nombre, valor in (("class", clase), ("style", estilo)) if valor})
+
+
+def _srcset(lista):
+    return ", ".join(f"{url} {ancho}w" for ancho, url in lista)
+
+
+# Imagen responsive con formatos modernos
+@register.simple_tag
+def imagen(fuente, alt="", sizes="100vw", anchos="", clase="", estilo="", loading="lazy"):
+    """
+    Emite un ``<picture>`` con ``srcset`` en AVIF/WebP y el formato original.
+    ``fuente`` es un ``ImageField`` o la ruta de un estático.
+    Uso en plantilla::
+
+        {% imagen producto.imagen alt=producto.nombre sizes="(max-width: 600px) 100vw, 300px" %}
+        {% imagen 'img/logo.png' alt="Logo" sizes="90px" anchos="90,180" loading="eager" %}
+    """
+    lista_anchos = [int(a) for a in str(anchos).split(",") if a.strip()] or None
+    info = imagenes.derivadas(fuente, lista_anchos)
+    if info is None:
+        if not fuente:
+            return ""
+        # Original que no está en disco (p. ej. almacenamiento remoto): se enlaza tal cual
+        url = static(fuente) if isinstance(fuente, str) else fuente.url
+        return format_html('<img src="{}" alt="{}"{} loading="{}">', url, alt, _extra(clase, estilo), loading)
+
+    *modernos, original = info["formatos"].items()
+    fuentes = format_html_join(
+        "", '<source type="{}" srcset="{}" sizes="{}">',
+        ((imagenes.tipo(formato), _srcset(lista), sizes) for formato, lista in modernos),
+    )
+    formato, lista = original
+    # El src por defecto es la derivada más grande que no supera los 1024 px
+    src = next((url for ancho, url in reversed(lista) if ancho <= 1024), lista[0][1])
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}"{} loading="{}" decoding="async"></picture>',
+        fuentes, src, _srcset(lista), sizes, alt, _extra(clase, estilo), loading,
+    )
+
+
+# URL de una miniatura de ancho fijo
+@register.simple_tag
+def miniatura(fuente, ancho, formato=None):
+    """
+    Uso en plantilla: <img src="{% miniatura producto.imagen 160 %}">
+    """
+    url = imagenes.url_miniatura(fuente, int(ancho), formato)
+    if url or not fuente:
+        return url
+    return static(fuente) if isinstance(fuente, str) else fuente.url
+
+
+# Fondo CSS con formatos modernos
+@register.simple_tag
+def image_set(fuente, ancho):
+    """
+    Valor CSS ``image-set()`` con la miniatura en cada formato generado (solo
+    esos: si Pillow no tiene AVIF, no aparece). Uso en plantilla::
+
+        body { background-image: {% image_set 'img/fondo.png' 1536 %}; }
+    """
+    urls = imagenes.miniaturas(fuente, int(ancho))
+    if not urls:
+        if not fuente:
+            return ""
+        return format_html('url("{}")', static(fuente) if isinstance(fuente, str) else fuente.url)
+    return format_html("image-set({})", format_html_join(
+        ", ", 'url("{}") type("{}")', ((url, imagenes.tipo(formato)) for formato, url in urls.items()),
+    ))
@@ -0,0 +1,308 @@
+import io
+import json
+import tempfile
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from config import estadisticas, imagenes
+from config.exportar import lineas_csv, lineas_jsonl
+from cursos.models import Categoria as CategoriaCurso, Curso
+from tareas import cola
+from tareas.models import Tarea
+from tienda.models import Pedido, Producto
+
+
+def crear_pedidos(n):
+    Pedido.objects.bulk_create(
+        [Pedido(nombre=f"Cliente {i}", apellidos="Pérez Gómez", telefono="555000", email=f"c{i}@example.com",
+                direccion="Calle Mayor 1", total=Decimal("19.90")) for i in range(n)],
+        batch_size=1000,
+    )
+
+
+class ExportacionTests(TestCase):
+    CAMPOS = ["id", "nombre", "apellidos", "email", "direccion", "total", "fecha"]
+
+    def pico_memoria(self, generador):
+        """
+        Memoria máxima (bytes) mientras se consume el generador, sin guardar lo que produce.
+        """
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            bytes_producidos = sum(len(bloque) for bloque in generador)
+            return tracemalloc.get_traced_memory()[1] - base, bytes_producidos
+        finally:
+            tracemalloc.stop()
+
+    def test_memoria_acotada(self):
+        crear_pedidos(2000)
+        pequena, _ = self.pico_memoria(lineas_csv(Pedido.objects.all(), self.CAMPOS, self.CAMPOS, 500))
+        crear_pedidos(18000)
+        for lineas in (lineas_csv(Pedido.objects.all(), self.CAMPOS, self.CAMPOS, 500),
+                       lineas_jsonl(Pedido.objects.all(), self.CAMPOS, 500)):
+            grande, producidos = self.pico_memoria(lineas)
+            # Diez veces más filas casi no cambian el pico, que queda muy por debajo de lo exportado
+            self.assertLess(grande, pequena * 1.5)
+            self.assertLess(grande, producidos / 2)
+
+    def test_lineas_csv(self):
+        crear_pedidos(3)
+        texto = "".join(lineas_csv(Pedido.objects.order_by("id"), ["nombre", "total"], ["Nombre", "Total"], 2))
+        self.assertEqual(texto.splitlines(), ["Nombre,Total", "Cliente 0,19.90", "Cliente 1,19.90", "Cliente 2,19.90"])
+
+    def test_accion_del_admin_en_streaming(self):
+        crear_pedidos(5)
+        self.client.force_login(User.objects.create_superuser("admin", "admin@example.com", "clave-segura-123"))
+        respuesta = self.client.post(reverse("admin:tienda_pedido_changelist"), {
+            "action": "exportar_jsonl",
+            "_selected_action": list(Pedido.objects.values_list("pk", flat=True)),
+        })
+        self.assertIsInstance(respuesta, StreamingHttpResponse)
+        self.assertEqual(respuesta["Content-Disposition"], 'attachment; filename="pedido_export.jsonl"')
+        self.assertEqual(len(b"".join(respuesta.streaming_content).splitlines()), 5)
+
+
+class ImagenesTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media = Path(media.name)
+        ajustes = override_settings(MEDIA_ROOT=media.name)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def fondo(self):
+        respuesta = self.client.get(reverse("tienda:carrito"))
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.content.decode().split("background-image:", 1)[1].split(";", 1)[0]
+
+    def ejecutar_tareas(self):
+        while (pendiente := cola.reclamar()) is not None:
+            cola.ejecutar(pendiente)
+
+    def producto(self, contenido):
+        (self.media / "productos").mkdir()
+        (self.media / "productos" / "foto.png").write_bytes(contenido)
+        return Producto.objects.create(nombre="Tablero", descripcion="Tablero", precio=Decimal("30.00"),
+                                       stock=1, imagen="productos/foto.png")
+
+    def png(self):
+        salida = io.BytesIO()
+        Image.new("RGB", (800, 600), "navy").save(salida, "PNG")
+        return salida.getvalue()
+
+    @override_settings(IMAGENES_FORMATOS=("webp",))
+    def test_formato_no_generado(self):
+        self.fondo()
+        self.ejecutar_tareas()
+        # Pedir AVIF sin generarlo devuelve otro formato disponible en lugar de fallar
+        self.assertTrue(imagenes.url_miniatura("img/fondo.png", 1536, "avif").endswith(".webp"))
+        fondo = self.fondo()
+        self.assertIn('type("image/webp")', fondo)
+        self.assertNotIn("avif", fondo)
+
+    @override_settings(IMAGENES_FORMATOS=())
+    def test_solo_formato_original(self):
+        self.fondo()
+        self.ejecutar_tareas()
+        fondo = self.fondo()
+        self.assertNotIn("webp", fondo)
+        self.assertEqual(fondo.count("url("), 1)
+
+    def test_no_se_generan_durante_la_peticion(self):
+        # El fondo de base.html aún no tiene derivadas: se enlaza el original y se encola la tarea
+        self.assertEqual(self.fondo(), ' url("/static/img/fondo.png")')
+        self.assertFalse((self.media / "derivadas").exists())
+        self.assertEqual(Tarea.objects.filter(nombre="config.generar_derivadas_estatico").count(), 1)
+        self.fondo()  # no se vuelve a encolar
+        self.assertEqual(Tarea.objects.count(), 1)
+
+        self.ejecutar_tareas()
+        caches["default"].clear()  # otro proceso: lee el manifiesto que dejó el trabajador
+        self.assertIn("image-set(", self.fondo())
+
+    def test_al_subir_la_imagen(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            producto = self.producto(self.png())
+        self.ejecutar_tareas()
+        respuesta = self.client.get(reverse("tienda:detalle", args=[producto.pk]))
+        self.assertContains(respuesta, "<picture>")
+        self.assertContains(respuesta, 'type="image/webp"')
+
+    def test_imagen_no_valida(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            producto = self.producto(b"esto no es una imagen")
+        with self.assertLogs("config.imagenes", "WARNING"):
+            self.ejecutar_tareas()
+        self.assertEqual(Tarea.objects.get().estado, Tarea.COMPLETADA)
+
+        respuesta = self.client.get(reverse("tienda:detalle", args=[producto.pk]))
+        self.assertContains(respuesta, '<img src="/media/productos/foto.png"')
+        self.assertNotContains(respuesta, "<picture>")
+        self.assertEqual(imagenes.url_miniatura(producto.imagen, 160), "")
+        # El fallo queda anotado: no se vuelve a intentar en cada visita
+        self.assertFalse(Tarea.objects.filter(estado=Tarea.PENDIENTE, nombre="config.generar_derivadas").exists())
+
+    def test_imagen_no_valida_al_generarla_en_la_peticion(self):
+        # Sin trabajadores (TAREAS_SINCRONAS) la tarea se ejecuta al encolarla desde la plantilla
+        producto = self.producto(b"\x89PNG\r\n\x1a\n truncado")
+        with self.settings(TAREAS_SINCRONAS=True), self.assertLogs("config.imagenes", "WARNING"):
+            respuesta = self.client.get(reverse("tienda:detalle", args=[producto.pk]))
+        self.assertContains(respuesta, '<img src="/media/productos/foto.png"')
+
+
+class CachePaginasTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.producto = Producto.objects.create(nombre="Tablero de torneo", descripcion="Tablero", precio=Decimal("30"))
+
+    def renombrar_sin_senales(self):
+        # update() no envía señales: la versión del grupo no cambia y solo caduca por TTL
+        Producto.objects.filter(pk=self.producto.pk).update(nombre="Reloj de ajedrez")
+
+    def test_pagina_y_fragmentos_hasta_que_caducan(self):
+        self.client.get(reverse("tienda:home"))
+        self.renombrar_sin_senales()
+        self.assertContains(self.client.get(reverse("tienda:home")), "Tablero de torneo")
+
+    @override_settings(CACHE_PAGINAS_TTL=0)
+    def test_usan_cache_paginas_ttl(self):
+        self.client.get(reverse("tienda:home"))
+        self.renombrar_sin_senales()
+        self.assertContains(self.client.get(reverse("tienda:home")), "Reloj de ajedrez")
+
+
+class EstadisticasTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def test_se_recuentan_al_crear_un_objeto(self):
+        self.assertEqual(estadisticas.obtener()["usuarios"], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user("nuevo", password="clave-segura-123")
+        # Sin trabajadores: el mismo proceso vuelve a contar en la siguiente petición
+        with self.assertNumQueries(2):
+            self.assertEqual(estadisticas.obtener()["usuarios"], 1)
+        with self.assertNumQueries(0):
+            estadisticas.obtener()
+
+    def test_caducadas_se_recuentan(self):
+        datos = estadisticas.obtener()
+        caches["default"].set(estadisticas.CLAVE_CACHE, {**datos, "caduca": timezone.now() - timedelta(1)}, None)
+        Pedido.objects.create(nombre="Ana", apellidos="Pérez", telefono="1", email="ana@example.com")
+        self.assertEqual(estadisticas.obtener()["pedidos"], 1)
+
+    def test_caducadas_mientras_otra_peticion_recuenta(self):
+        datos = {**estadisticas.obtener(), "caduca": timezone.now() - timedelta(1)}
+        caches["default"].set(estadisticas.CLAVE_CACHE, datos, None)
+        caches["default"].add(estadisticas.CLAVE_RECALCULO, True)
+        with self.assertNumQueries(0):
+            self.assertEqual(estadisticas.obtener(), datos)
+
+    def test_invalidar_no_provoca_un_recuento_por_peticion(self):
+        anteriores = estadisticas.obtener()
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(5):
+                User.objects.create_user(f"usuario{i}", password="clave-segura-123")
+        # Otra petición tiene el bloqueo: las demás sirven las cifras obsoletas sin consultar
+        caches["default"].add(estadisticas.CLAVE_RECALCULO, True)
+        for _ in range(10):
+            with self.assertNumQueries(0):
+                self.assertEqual(estadisticas.obtener()["usuarios"], anteriores["usuarios"])
+        caches["default"].delete(estadisticas.CLAVE_RECALCULO)
+        with self.assertNumQueries(2):
+            self.assertEqual(estadisticas.obtener()["usuarios"], 5)
+        with self.assertNumQueries(0):
+            estadisticas.obtener()
+
+    def test_invalidacion_durante_el_recuento(self):
+        calcular = estadisticas.calcular
+
+        def calcular_e_invalidar():
+            datos = calcular()
+            estadisticas.invalidar()  # llega un pedido mientras se cuenta
+            return datos
+
+        with mock.patch.object(estadisticas, "calcular", side_effect=calcular_e_invalidar):
+            estadisticas.obtener()
+        with self.assertNumQueries(2):
+            estadisticas.obtener()
+
+
+class ImportacionCatalogoTests(TestCase):
+    CURSO = {"descripcion": "Descripción", "categoria": "Táctica", "instructor": "Ana", "duracion": "10",
+             "precio": "20.00", "fecha_inicio": "2026-01-10"}
+
+    def setUp(self):
+        carpeta = tempfile.TemporaryDirectory()
+        self.addCleanup(carpeta.cleanup)
+        self.carpeta = Path(carpeta.name)
+
+    def importar(self, catalogo, filas, *opciones):
+        ruta = self.carpeta / "catalogo.jsonl"
+        ruta.write_text("".join(json.dumps(fila) + "\n" for fila in filas), encoding="utf-8")
+        salida, errores = io.StringIO(), io.StringIO()
+        call_command("import_catalog", catalogo, str(ruta), *opciones, stdout=salida, stderr=errores)
+        return errores.getvalue()
+
+    def test_exportar_e_importar_no_duplica(self):
+        for i in range(3):
+            Producto.objects.create(nombre=f"Libro {i}", descripcion="Libro", precio=Decimal("9.90"), stock=i)
+        ruta = self.carpeta / "productos.csv"
+        call_command("export_catalog", "productos", str(ruta), stdout=io.StringIO())
+        call_command("import_catalog", "productos", str(ruta), stdout=io.StringIO())
+        call_command("import_catalog", "productos", str(ruta), stdout=io.StringIO())
+        self.assertEqual(Producto.objects.count(), 3)
+
+    def test_producto_sin_sku(self):
+        errores = self.importar("productos", [
+            {"sku": "", "nombre": "Sin referencia", "descripcion": "-", "precio": "1.00", "stock": 1},
+            {"sku": "L-1", "nombre": "Con referencia", "descripcion": "-", "precio": "1.00", "stock": 1},
+        ])
+        self.assertIn("Línea 1: sku: Obligatorio", errores)
+        self.assertEqual(list(Producto.objects.values_list("sku", flat=True)), ["L-1"])
+
+    def test_fichero_sin_columna_sku(self):
+        with self.assertRaisesMessage(CommandError, "Falta la columna 'sku'"):
+            self.importar("productos", [{"nombre": "Libro", "descripcion": "-", "precio": "1.00", "stock": 1}])
+        self.assertFalse(Producto.objects.exists())
+
+    def test_slug_de_curso_nuevo_no_pisa_otro_curso(self):
+        self.importar("cursos", [{"slug": "tactica", "titulo": "Curso de táctica", **self.CURSO}])
+        self.importar("cursos", [{"titulo": "Táctica", **self.CURSO}, {"titulo": "¡Táctica!", **self.CURSO}])
+        self.assertEqual(dict(Curso.objects.values_list("slug", "titulo")), {
+            "tactica": "Curso de táctica", "tactica-2": "Táctica", "tactica-3": "¡Táctica!",
+        })
+        # Al reimportar, el curso sin slug se reconoce por su título
+        self.importar("cursos", [{"titulo": "Táctica", **self.CURSO, "duracion": "12"}])
+        self.assertEqual(Curso.objects.get(slug="tactica-2").duracion, 12)
+        self.assertEqual(Curso.objects.count(), 3)
+
+    def test_un_lote_que_falla_deshace_toda_la_importacion(self):
+        self.importar("cursos", [{"slug": "existente", "titulo": "Existente", **self.CURSO}])
+        filas = [
+            {"slug": "nuevo", "titulo": "Nuevo", **self.CURSO, "categoria": "Finales"},
+            {"slug": "otro", "titulo": "Existente", **self.CURSO},  # título único repetido
+        ]
+        with self.assertRaisesMessage(CommandError, "No se ha importado nada"):
+            self.importar("cursos", filas, "--lote", "1")
+        self.assertEqual(list(Curso.objects.values_list("slug", flat=True)), ["existente"])
+        self.assertFalse(CategoriaCurso.objects.filter(nombre="Finales").exists())
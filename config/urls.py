@@ -18,6 +18,7 @@ urlpatterns = [
     path('blog/', include('blog.urls')),         # rutas de la app blog
     path('usuarios/', include('usuarios.urls')), # rutas de la app usuarios
     path('ia/', include('ia.urls')),             # rutas de la app IA
+    path('tareas/', include('tareas.urls')),     # estado de las tareas en segundo plano
 ]
 
 # 📂 Configuración para servir archivos estáticos y multimedia en desarrollo
@@ -1,9 +1,13 @@
 from django.shortcuts import render
+
+from . import estadisticas
+from .cache_paginas import cache_anonimo
 from cursos.models import Curso
 from tienda.models import Producto
 from blog.models import Entrada  # suponiendo que tu app blog tenga un modelo Entrada
 # si tu app IA tiene un modelo, también lo puedes importar
 
+@cache_anonimo("cursos", "tienda", "blog")
 def inicio(request):
     # 📚 Cursos destacados
     cursos_destacados = Curso.objects.all().order_by('-fecha_inicio')[:3]
@@ -18,6 +22,8 @@ def inicio(request):
         'cursos_destacados': cursos_destacados,
         'productos_destacados': productos_destacados,
         'entradas_blog': entradas_blog,
+        # 📊 Cifras del sitio (precalculadas, ver config/estadisticas.py)
+        'estadisticas': estadisticas.obtener(),
     }
 
     return render(request, 'index.html', contexto)
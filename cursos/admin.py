@@ -1,17 +1,18 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from config.exportar import ExportacionMixin
 from .models import Curso, Categoria   
 
 # --- Registrar Categoría ---
 @admin.register(Categoria)
-class CategoriaAdmin(admin.ModelAdmin):
+class CategoriaAdmin(ExportacionMixin, admin.ModelAdmin):
     list_display = ('id', 'nombre', 'slug', 'descripcion')   # columnas en listado
     search_fields = ('nombre','descripcion',)               # barra de búsqueda
     prepopulated_fields = {"slug": ("nombre",)}  # autocompletar slug
 
 # --- Registrar Curso ---
 @admin.register(Curso)
-class CursoAdmin(admin.ModelAdmin):
+class CursoAdmin(ExportacionMixin, admin.ModelAdmin):
     # Campos que se muestran en la lista de cursos
     list_display = (
         'id', 'titulo', 'nivel', 'instructor', 'precio',
@@ -1,7 +1,10 @@
+from functools import partial
+
 from django.db import models
-from django.utils.text import slugify
 from django.urls import reverse
 
+from config.slugs import guardar_con_slug
+
 class Categoria(models.Model):
     nombre = models.CharField(max_length=100, unique=True)
     slug = models.SlugField(unique=True, blank=True)
@@ -15,9 +18,10 @@ class Categoria(models.Model):
         return self.nombre
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.nombre)
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            guardar_con_slug(self, self.nombre, partial(super().save, *args, **kwargs))
         
 class Curso(models.Model):
     """
@@ -72,9 +76,10 @@ class Curso(models.Model):
         """
         Genera automáticamente el slug a partir del título si no existe.
         """
-        if not self.slug:
-            self.slug = slugify(self.titulo)
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            guardar_con_slug(self, self.titulo, partial(super().save, *args, **kwargs))
 
     # Métodos auxiliares
     def get_absolute_url(self):
@@ -1,5 +1,6 @@
 from django.shortcuts import render, get_object_or_404
 from django.http import HttpRequest, HttpResponse
+from config.cache_paginas import cache_anonimo
 from .models import Curso
 
 # Página principal de Cursos
@@ -16,6 +17,7 @@ def home(request: HttpRequest) -> HttpResponse:
 
 
 # Listado de cursos
+@cache_anonimo("cursos")
 def lista_cursos(request: HttpRequest) -> HttpResponse:
     """
     Muestra el listado completo de cursos disponibles.
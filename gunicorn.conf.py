@@ -0,0 +1,35 @@
+"""
+Configuración de gunicorn.
+
+Uso:
+    gunicorn -c gunicorn.conf.py
+
+Con ``preload_app`` Django se carga una sola vez en el proceso maestro. Si
+``IA_PRECARGAR`` está activo, el modelo de la app IA también se carga ahí,
+antes de crear los workers: todos comparten las páginas de memoria de los
+pesos (copy-on-write) en lugar de cargar cada uno su propia copia.
+"""
+import gc
+import os
+
+os.environ.setdefault("DJANGO_ENV", "production")
+
+wsgi_app = "config.wsgi:application"
+bind = os.getenv("GUNICORN_BIND", "127.0.0.1:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "3"))
+preload_app = True
+
+
+def when_ready(server):
+    # Se ejecuta en el maestro, con la aplicación ya cargada y antes del fork.
+    from django.conf import settings
+
+    if getattr(settings, "IA_PRECARGAR", False):
+        from ia.modelos import registro
+
+        registro.precargar()
+        server.log.info("Modelo de IA precargado en el proceso maestro")
+
+    # Congelar los objetos actuales para que el recolector de basura de los
+    # workers no los toque y no rompa el copy-on-write de sus páginas.
+    gc.freeze()
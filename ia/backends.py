@@ -0,0 +1,114 @@
+"""
+Backends de inferencia de la app IA.
+
+Cada backend sabe cargar un par ``(model, tokenizer)`` compatible con
+``model.generate``; el motor de ``ia/inferencia.py`` no distingue entre ellos.
+El backend se elige con ``IA_BACKEND``:
+
+- ``pytorch``: el modelo original en fp32.
+- ``int8``: cuantización dinámica int8 de las capas lineales (CPU).
+- ``onnx``: grafo exportado a ONNX Runtime con reutilización de la caché KV
+  (requiere ``optimum[onnxruntime]``).
+"""
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from django.conf import settings
+
+
+class BackendInferencia(ABC):
+    """
+    Interfaz común: ``cargar(nombre)`` devuelve ``(model, tokenizer)``.
+    """
+    nombre = ""
+
+    @abstractmethod
+    def cargar(self, nombre):
+        ...
+
+    def cargar_tokenizer(self, nombre):
+        from transformers import AutoTokenizer
+
+        return AutoTokenizer.from_pretrained(nombre)
+
+
+class BackendPyTorch(BackendInferencia):
+    nombre = "pytorch"
+
+    def cargar_modelo(self, nombre):
+        from transformers import AutoModelForCausalLM
+
+        # Con safetensors los pesos se leen de un fichero mapeado en memoria. Con
+        # IA_SAFETENSORS=None se usan si el modelo los trae y, si no, el .bin.
+        model = AutoModelForCausalLM.from_pretrained(
+            nombre, use_safetensors=getattr(settings, "IA_SAFETENSORS", None),
+        )
+        model.eval()
+        return model
+
+    def cargar(self, nombre):
+        return self.cargar_modelo(nombre), self.cargar_tokenizer(nombre)
+
+
+class BackendCuantizado(BackendPyTorch):
+    nombre = "int8"
+
+    def cargar(self, nombre):
+        import torch
+
+        model = self.cargar_modelo(nombre)
+        _conv1d_a_linear(model)
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return model, self.cargar_tokenizer(nombre)
+
+
+class BackendONNX(BackendInferencia):
+    nombre = "onnx"
+
+    def cargar(self, nombre):
+        try:
+            from optimum.onnxruntime import ORTModelForCausalLM
+        except ImportError as exc:
+            raise ImportError("El backend 'onnx' requiere instalar optimum[onnxruntime]") from exc
+
+        # La exportación es lenta: se hace una vez y se reutiliza el grafo guardado.
+        directorio = Path(getattr(settings, "IA_ONNX_DIR", settings.BASE_DIR / "modelos_onnx")) / nombre.replace("/", "--")
+        if (directorio / "model.onnx").exists():
+            model = ORTModelForCausalLM.from_pretrained(directorio, use_cache=True)
+        else:
+            model = ORTModelForCausalLM.from_pretrained(nombre, export=True, use_cache=True)
+            model.save_pretrained(directorio)
+        return model, self.cargar_tokenizer(nombre)
+
+
+def _conv1d_a_linear(modulo):
+    """
+    GPT-2 usa ``Conv1D`` (pesos traspuestos) en lugar de ``nn.Linear``; se
+    sustituyen para que la cuantización dinámica pueda aplicarse a todas las capas.
+    """
+    import torch
+    from transformers.pytorch_utils import Conv1D
+
+    for nombre, hijo in modulo.named_children():
+        if isinstance(hijo, Conv1D):
+            entrada, salida = hijo.weight.shape
+            lineal = torch.nn.Linear(entrada, salida)
+            lineal.weight.data = hijo.weight.data.t().contiguous()
+            lineal.bias.data = hijo.bias.data
+            setattr(modulo, nombre, lineal)
+        else:
+            _conv1d_a_linear(hijo)
+
+
+BACKENDS = {
+    backend.nombre: backend
+    for backend in (BackendPyTorch, BackendCuantizado, BackendONNX)
+}
+
+
+def obtener_backend(nombre=None):
+    nombre = nombre or getattr(settings, "IA_BACKEND", "pytorch")
+    try:
+        return BACKENDS[nombre]()
+    except KeyError:
+        raise ValueError(f"Backend de IA desconocido: {nombre!r} (opciones: {', '.join(BACKENDS)})")
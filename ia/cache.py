@@ -0,0 +1,180 @@
+"""
+Caché de respuestas generadas por la app IA.
+
+Muchas preguntas son iguales salvo espacios, mayúsculas o signos de
+puntuación; la clave de la caché se calcula sobre la pregunta normalizada más
+los parámetros de generación, así todas comparten la misma respuesta.
+
+Dos niveles:
+- Memoria del proceso: LRU acotada por ``IA_CACHE_MAX_ENTRADAS`` y con TTL.
+- Persistente (opcional): el alias ``IA_CACHE_ALIAS`` de ``CACHES``, compartido
+  entre workers y reinicios.
+
+Con la caché activa la generación se fuerza a ser determinista (búsqueda
+voraz, sin muestreo) para que la respuesta guardada sea reproducible.
+"""
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Parámetros de muestreo que no tienen sentido en una generación determinista
+PARAMETROS_MUESTREO = ("temperature", "top_k", "top_p", "typical_p")
+
+# Segundos que se espera a que el hilo de generación confirme que ha terminado bien
+ESPERA_FIN_GENERACION = 5
+
+
+def normalizar(pregunta):
+    """
+    Minúsculas, sin signos de puntuación y con los espacios colapsados.
+    """
+    texto = unicodedata.normalize("NFKC", pregunta).casefold()
+    texto = "".join(" " if unicodedata.category(c).startswith("P") else c for c in texto)
+    return " ".join(texto.split())
+
+
+class CacheGeneraciones:
+    """
+    Caché de dos niveles (LRU en memoria + caché de Django) con contadores.
+    """
+
+    def __init__(self, activa=None, max_entradas=None, ttl=None, alias=None):
+        self.activa = getattr(settings, "IA_CACHE_ACTIVA", True) if activa is None else activa
+        self.max_entradas = max_entradas or getattr(settings, "IA_CACHE_MAX_ENTRADAS", 1024)
+        self.ttl = ttl or getattr(settings, "IA_CACHE_TTL", 60 * 60 * 24)
+        self.alias = alias if alias is not None else getattr(settings, "IA_CACHE_ALIAS", None)
+        self._lock = threading.Lock()
+        self._memoria = OrderedDict()
+        self.aciertos_memoria = 0
+        self.aciertos_persistente = 0
+        self.fallos = 0
+
+    # -----------------------------
+    # Claves y parámetros
+    # -----------------------------
+
+    def parametros(self, parametros):
+        """
+        Devuelve los parámetros de generación a usar: deterministas si la caché está activa.
+        """
+        if not self.activa:
+            return dict(parametros)
+        deterministas = {k: v for k, v in parametros.items() if k not in PARAMETROS_MUESTREO}
+        deterministas["do_sample"] = False
+        return deterministas
+
+    def clave(self, pregunta, parametros):
+        contenido = json.dumps([normalizar(pregunta), sorted(parametros.items())], default=str)
+        return "ia:respuesta:" + hashlib.sha256(contenido.encode()).hexdigest()
+
+    # -----------------------------
+    # Lectura y escritura
+    # -----------------------------
+
+    def obtener(self, pregunta, parametros):
+        """
+        Devuelve la respuesta guardada para ``pregunta`` o ``None``.
+
+        Se guarda solo la continuación generada y se antepone la pregunta tal
+        como la escribió el usuario, para que el eco respete su forma.
+        """
+        if not self.activa:
+            return None
+        clave = self.clave(pregunta, parametros)
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._memoria.get(clave)
+            if entrada is not None:
+                continuacion, expira = entrada
+                if expira > ahora:
+                    self._memoria.move_to_end(clave)
+                    self.aciertos_memoria += 1
+                    return pregunta + continuacion
+                del self._memoria[clave]
+
+        if self.alias:
+            continuacion = caches[self.alias].get(clave)
+            if continuacion is not None:
+                self._guardar_memoria(clave, continuacion)
+                with self._lock:
+                    self.aciertos_persistente += 1
+                return pregunta + continuacion
+
+        with self._lock:
+            self.fallos += 1
+        return None
+
+    def guardar(self, pregunta, parametros, texto):
+        if not self.activa:
+            return
+        continuacion = texto[len(pregunta):] if texto.startswith(pregunta) else texto
+        if not continuacion.strip():
+            return
+        clave = self.clave(pregunta, parametros)
+        self._guardar_memoria(clave, continuacion)
+        if self.alias:
+            caches[self.alias].set(clave, continuacion, self.ttl)
+
+    def _guardar_memoria(self, clave, continuacion):
+        with self._lock:
+            self._memoria[clave] = (continuacion, time.monotonic() + self.ttl)
+            self._memoria.move_to_end(clave)
+            while len(self._memoria) > self.max_entradas:
+                self._memoria.popitem(last=False)
+
+    def obtener_o_generar(self, pregunta, parametros, generar):
+        """
+        Devuelve la respuesta en caché o la genera con ``generar()`` y la guarda.
+        """
+        texto = self.obtener(pregunta, parametros)
+        if texto is None:
+            texto = generar()
+            self.guardar(pregunta, parametros, texto)
+        return texto
+
+    def guardando(self, pregunta, parametros, fragmentos):
+        """
+        Reenvía los fragmentos de una respuesta en streaming y la guarda al terminar.
+
+        Si ``fragmentos`` viene de ``MotorInferencia.transmitir`` solo se guarda
+        cuando la generación ha terminado bien: tras un error el iterador se
+        cierra igual y lo recibido puede estar incompleto.
+        """
+        partes = []
+        for fragmento in fragmentos:
+            partes.append(fragmento)
+            yield fragmento
+        terminada = getattr(fragmentos, "terminada", None)
+        if terminada is not None and not (terminada.wait(ESPERA_FIN_GENERACION) and fragmentos.completa):
+            return
+        self.guardar(pregunta, parametros, "".join(partes))
+
+    # -----------------------------
+    # Monitorización
+    # -----------------------------
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos_memoria + self.aciertos_persistente + self.fallos
+            return {
+                "activa": self.activa,
+                "entradas_memoria": len(self._memoria),
+                "max_entradas": self.max_entradas,
+                "aciertos_memoria": self.aciertos_memoria,
+                "aciertos_persistente": self.aciertos_persistente,
+                "fallos": self.fallos,
+                "tasa_aciertos": round((consultas - self.fallos) / consultas, 4) if consultas else 0.0,
+            }
+
+    def limpiar(self):
+        with self._lock:
+            self._memoria.clear()
+
+
+cache_respuestas = CacheGeneraciones()
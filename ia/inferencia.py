@@ -0,0 +1,261 @@
+"""
+Motor de inferencia por lotes para la app IA.
+
+En lugar de llamar a ``model.generate`` dentro del hilo de cada petición, las
+preguntas se encolan y un hilo colector las agrupa en micro-lotes (hasta
+``IA_LOTE_MAXIMO`` preguntas o ``IA_ESPERA_MAXIMA_MS`` milisegundos de espera).
+Cada lote se genera en un pool de hilos dedicado y el resultado se devuelve a
+la petición que espera mediante un ``Future``.
+
+Mientras todos los hilos del pool están ocupados las preguntas se siguen
+acumulando en la cola, por lo que bajo carga los lotes crecen solos.
+
+El motor de cada proceso se crea la primera vez que se usa ``obtener_motor()``;
+así los hilos nunca se crean en el maestro de gunicorn antes del fork.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from .modelos import registro
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Peticion:
+    pregunta: str
+    input_ids: list
+    parametros: tuple
+    futuro: Future
+
+
+class MotorInferencia:
+    """
+    Agrupa preguntas concurrentes en lotes y las genera en un pool de hilos.
+
+    - Solo se agrupan preguntas con los mismos parámetros de generación.
+    - El lote es consciente del relleno: no se mezclan preguntas cuya longitud
+      (en tokens) difiera más de ``IA_RELLENO_MAXIMO``; las que no encajan se
+      quedan para el siguiente lote.
+    """
+
+    def __init__(self, model, tokenizer, lote_maximo=None, espera_maxima_ms=None,
+                 hilos=None, relleno_maximo=None):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.lote_maximo = lote_maximo or getattr(settings, "IA_LOTE_MAXIMO", 8)
+        if espera_maxima_ms is None:
+            espera_maxima_ms = getattr(settings, "IA_ESPERA_MAXIMA_MS", 20)
+        self.espera_maxima = espera_maxima_ms / 1000
+        self.hilos = hilos or getattr(settings, "IA_HILOS", 2)
+        if relleno_maximo is None:
+            relleno_maximo = getattr(settings, "IA_RELLENO_MAXIMO", 32)
+        self.relleno_maximo = relleno_maximo
+
+        # Los modelos causales se rellenan por la izquierda para que todas las
+        # preguntas del lote terminen en la misma posición.
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.tokenizer.padding_side = "left"
+
+        # Repartir los núcleos entre los hilos del pool para que los lotes
+        # paralelos no compitan por los mismos hilos de PyTorch.
+        import torch
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // self.hilos))
+
+        self._cola = queue.Queue()
+        self._libres = threading.Semaphore(self.hilos)
+        self._pool = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix="ia-lote")
+        self._colector = threading.Thread(target=self._recolectar, name="ia-colector", daemon=True)
+        self._colector.start()
+
+    # -----------------------------
+    # API pública
+    # -----------------------------
+
+    def enviar(self, pregunta, **parametros):
+        """
+        Encola una pregunta y devuelve un ``Future`` con el texto generado.
+        """
+        futuro = Future()
+        input_ids = self.tokenizer(pregunta)["input_ids"]
+        clave = tuple(sorted(parametros.items()))
+        self._cola.put(_Peticion(pregunta, input_ids, clave, futuro))
+        return futuro
+
+    def generar(self, pregunta, timeout=None, **parametros):
+        """
+        Versión bloqueante de ``enviar``: espera al lote y devuelve el texto.
+        """
+        return self.enviar(pregunta, **parametros).result(timeout=timeout)
+
+    def transmitir(self, pregunta, **parametros):
+        """
+        Genera una sola pregunta fuera de los lotes y devuelve un iterador que
+        produce el texto a medida que se generan los tokens (para streaming).
+
+        Ocupa uno de los hilos del pool igual que un lote; si están todos
+        ocupados, espera a que quede uno libre.
+        """
+        from transformers import TextIteratorStreamer
+
+        streamer = TextIteratorStreamer(self.tokenizer, skip_special_tokens=True)
+        # El hilo que genera marca al acabar si la respuesta está completa (ver CacheGeneraciones.guardando)
+        streamer.completa = False
+        streamer.terminada = threading.Event()
+        self._libres.acquire()
+        self._pool.submit(self._ejecutar_transmision, pregunta, streamer, parametros)
+        return streamer
+
+    def cerrar(self):
+        """
+        Detiene el colector y espera a que terminen los lotes en curso.
+        """
+        self._cola.put(None)
+        self._colector.join()
+        self._pool.shutdown(wait=True)
+
+    # -----------------------------
+    # Colector de lotes
+    # -----------------------------
+
+    def _compatible(self, primera, peticion):
+        return (
+            peticion.parametros == primera.parametros
+            and abs(len(peticion.input_ids) - len(primera.input_ids)) <= self.relleno_maximo
+        )
+
+    def _recolectar(self):
+        diferidas = deque()
+        cerrando = False
+        while True:
+            if diferidas:
+                primera = diferidas.popleft()
+            elif cerrando:
+                return
+            else:
+                primera = self._cola.get()
+                if primera is None:
+                    return
+
+            # Esperar a que haya un hilo libre: mientras tanto la cola sigue creciendo.
+            self._libres.acquire()
+            lote = [primera]
+
+            # Primero las preguntas aplazadas de lotes anteriores.
+            restantes = deque()
+            while diferidas:
+                peticion = diferidas.popleft()
+                if len(lote) < self.lote_maximo and self._compatible(primera, peticion):
+                    lote.append(peticion)
+                else:
+                    restantes.append(peticion)
+            diferidas = restantes
+
+            # Después, lo que llegue antes de agotar la espera máxima.
+            limite = time.monotonic() + self.espera_maxima
+            while not cerrando and len(lote) < self.lote_maximo:
+                espera = limite - time.monotonic()
+                try:
+                    peticion = self._cola.get(timeout=espera) if espera > 0 else self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if peticion is None:
+                    cerrando = True
+                elif self._compatible(primera, peticion):
+                    lote.append(peticion)
+                else:
+                    diferidas.append(peticion)
+
+            self._pool.submit(self._ejecutar_lote, lote)
+
+    # -----------------------------
+    # Generación de un lote
+    # -----------------------------
+
+    def _ejecutar_lote(self, lote):
+        import torch
+
+        try:
+            pad = self.tokenizer.pad_token_id
+            longitudes = [len(p.input_ids) for p in lote]
+            ancho = max(longitudes)
+            input_ids = torch.tensor([[pad] * (ancho - n) + p.input_ids for p, n in zip(lote, longitudes)])
+            attention_mask = torch.tensor([[0] * (ancho - n) + [1] * n for n in longitudes])
+
+            # ``max_length`` se interpreta por pregunta, como en la llamada individual:
+            # se generan los tokens que necesita la pregunta más corta y se recorta el resto.
+            parametros = dict(lote[0].parametros)
+            max_length = parametros.pop("max_length", None)
+            if max_length is not None:
+                parametros["max_new_tokens"] = max(1, max_length - min(longitudes))
+
+            with torch.inference_mode():
+                salidas = self.model.generate(
+                    input_ids=input_ids,
+                    attention_mask=attention_mask,
+                    pad_token_id=pad,
+                    **parametros,
+                )
+
+            for peticion, n, fila in zip(lote, longitudes, salidas):
+                nuevos = fila[ancho:].tolist()
+                if max_length is not None:
+                    nuevos = nuevos[:max(0, max_length - n)]
+                texto = self.tokenizer.decode(peticion.input_ids + nuevos, skip_special_tokens=True)
+                peticion.futuro.set_result(texto)
+        except Exception as exc:
+            for peticion in lote:
+                if not peticion.futuro.done():
+                    peticion.futuro.set_exception(exc)
+        finally:
+            self._libres.release()
+
+    def _ejecutar_transmision(self, pregunta, streamer, parametros):
+        import torch
+
+        try:
+            inputs = self.tokenizer(pregunta, return_tensors="pt")
+            with torch.inference_mode():
+                self.model.generate(
+                    **inputs,
+                    pad_token_id=self.tokenizer.pad_token_id,
+                    streamer=streamer,
+                    **parametros,
+                )
+            streamer.completa = True
+        except Exception:
+            logger.exception("Error generando la respuesta en streaming")
+            # Cerrar el iterador para que la respuesta en curso no se quede colgada.
+            streamer.end()
+        finally:
+            streamer.terminada.set()
+            self._libres.release()
+
+
+_motor = None
+_motor_pid = None
+_motor_lock = threading.Lock()
+
+
+def obtener_motor():
+    """
+    Devuelve el motor de este proceso, creándolo (y cargando el modelo) si hace falta.
+    """
+    global _motor, _motor_pid
+    pid = os.getpid()
+    if _motor is None or _motor_pid != pid:
+        with _motor_lock:
+            if _motor is None or _motor_pid != pid:
+                model, tokenizer = registro.obtener()
+                _motor = MotorInferencia(model, tokenizer)
+                _motor_pid = pid
+    return _motor
@@ -0,0 +1,108 @@
+"""
+Compara los backends de inferencia de la app IA sobre el mismo conjunto de preguntas.
+
+Uso:
+    python manage.py ia_benchmark --backends pytorch,int8,onnx --repeticiones 3
+"""
+import gc
+import resource
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ia.backends import BACKENDS, obtener_backend
+
+PREGUNTAS = [
+    "Hola Brayan, dame un consejo de ajedrez:",
+    "¿Cuál es la mejor apertura para principiantes?",
+    "¿Cómo se juega la defensa siciliana?",
+    "Explícame el enroque",
+    "¿Qué es una clavada en ajedrez?",
+    "Dame un ejercicio de táctica",
+    "¿Cómo mejorar en los finales de torres?",
+    "¿Qué significa controlar el centro?",
+]
+
+
+def rss_mb():
+    """
+    Memoria residente actual del proceso (en MB).
+    """
+    try:
+        with open("/proc/self/status") as status:
+            for linea in status:
+                if linea.startswith("VmRSS:"):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    # Fuera de Linux solo está disponible el máximo (ru_maxrss en KB)
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+class Command(BaseCommand):
+    help = "Mide latencia (p50/p90/p99), tokens/segundo y memoria de cada backend de IA"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backends", default=",".join(BACKENDS),
+                            help="Backends a comparar separados por comas")
+        parser.add_argument("--modelo", default=None, help="Modelo (por defecto IA_MODELO)")
+        parser.add_argument("--repeticiones", type=int, default=3,
+                            help="Veces que se recorre el conjunto de preguntas")
+        parser.add_argument("--max-length", type=int, default=100)
+
+    def handle(self, *args, **options):
+        import torch
+
+        modelo = options["modelo"] or getattr(settings, "IA_MODELO", "distilgpt2")
+        nombres = [n.strip() for n in options["backends"].split(",") if n.strip()]
+        for nombre in nombres:
+            if nombre not in BACKENDS:
+                raise CommandError(f"Backend desconocido: {nombre}")
+
+        self.stdout.write(f"Modelo: {modelo} | preguntas: {len(PREGUNTAS)} x {options['repeticiones']}")
+        self.stdout.write(f"{'backend':<10}{'carga s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}"
+                          f"{'tokens/s':>10}{'RSS MB':>9}{'+RSS MB':>9}")
+
+        for nombre in nombres:
+            gc.collect()
+            rss_inicial = rss_mb()
+            inicio = time.perf_counter()
+            try:
+                model, tokenizer = obtener_backend(nombre).cargar(modelo)
+            except ImportError as exc:
+                self.stdout.write(self.style.WARNING(f"{nombre:<10}omitido: {exc}"))
+                continue
+            carga = time.perf_counter() - inicio
+
+            parametros = {"max_length": options["max_length"], "do_sample": False,
+                          "pad_token_id": tokenizer.eos_token_id}
+            latencias = []
+            tokens = 0
+            with torch.inference_mode():
+                # Calentamiento: la primera generación incluye inicializaciones
+                model.generate(**tokenizer(PREGUNTAS[0], return_tensors="pt"), **parametros)
+                for _ in range(options["repeticiones"]):
+                    for pregunta in PREGUNTAS:
+                        inputs = tokenizer(pregunta, return_tensors="pt")
+                        t0 = time.perf_counter()
+                        salida = model.generate(**inputs, **parametros)
+                        latencias.append(time.perf_counter() - t0)
+                        tokens += salida.shape[-1] - inputs["input_ids"].shape[-1]
+
+            rss = rss_mb()
+            self.stdout.write(
+                f"{nombre:<10}{carga:>9.2f}"
+                f"{percentil(latencias, 50) * 1000:>9.0f}"
+                f"{percentil(latencias, 90) * 1000:>9.0f}"
+                f"{percentil(latencias, 99) * 1000:>9.0f}"
+                f"{tokens / sum(latencias):>10.1f}"
+                f"{rss:>9.0f}{rss - rss_inicial:>9.0f}"
+            )
+            del model, tokenizer
@@ -0,0 +1,59 @@
+"""
+Registro de modelos de la app IA.
+
+Los modelos ya no se cargan al importar ``ia.views``: se cargan la primera vez
+que se piden, de modo que ``manage.py migrate``, ``collectstatic``, los tests,
+etc. no pagan la carga ni importan torch/transformers.
+
+En producción, ``gunicorn.conf.py`` llama a ``registro.precargar()`` en el
+proceso maestro antes del fork; los workers heredan los pesos y comparten sus
+páginas de memoria (copy-on-write) en lugar de tener cada uno su copia.
+"""
+import threading
+
+from django.conf import settings
+
+from .backends import obtener_backend
+
+
+class RegistroModelos:
+    """
+    Carga perezosa y segura entre hilos de pares (modelo, tokenizer).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._modelos = {}
+
+    def nombre_por_defecto(self):
+        return getattr(settings, "IA_MODELO", "distilgpt2")
+
+    def backend_por_defecto(self):
+        return getattr(settings, "IA_BACKEND", "pytorch")
+
+    def obtener(self, nombre=None, backend=None):
+        """
+        Devuelve ``(model, tokenizer)``, cargándolos si es la primera vez.
+        """
+        clave = (backend or self.backend_por_defecto(), nombre or self.nombre_por_defecto())
+        cargado = self._modelos.get(clave)
+        if cargado is None:
+            with self._lock:
+                cargado = self._modelos.get(clave)
+                if cargado is None:
+                    cargado = obtener_backend(clave[0]).cargar(clave[1])
+                    self._modelos[clave] = cargado
+        return cargado
+
+    def precargar(self, nombre=None, backend=None):
+        """
+        Fuerza la carga ahora (pensado para el maestro de gunicorn antes del fork).
+        """
+        return self.obtener(nombre, backend)
+
+    def cargado(self, nombre=None, backend=None):
+        clave = (backend or self.backend_por_defecto(), nombre or self.nombre_por_defecto())
+        return clave in self._modelos
+
+
+registro = RegistroModelos()
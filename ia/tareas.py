@@ -0,0 +1,13 @@
+# ia/tareas.py
+from tareas.cola import tarea
+
+
+@tarea(max_intentos=2)
+def generar_respuesta(pregunta):
+    """
+    Genera la respuesta a una pregunta fuera del ciclo de la petición.
+    """
+    # Import diferido: ia.views importa este módulo para encolar
+    from .views import responder
+
+    return {"respuesta": responder(pregunta)}
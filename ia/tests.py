@@ -1,3 +1,63 @@
-from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+
+from .backends import BackendInferencia, BackendPyTorch, obtener_backend
+from .cache import CacheGeneraciones
+
+
+class FragmentosTransmision(list):
+    """
+    Imita el iterador de ``MotorInferencia.transmitir`` con las marcas de fin.
+    """
+
+    def __init__(self, partes, completa):
+        super().__init__(partes)
+        self.completa = completa
+        self.terminada = threading.Event()
+        self.terminada.set()
+
+
+class GuardandoTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = CacheGeneraciones(activa=True, alias="")
+
+    def test_guarda_la_respuesta_completa(self):
+        fragmentos = FragmentosTransmision(["Hola", " mundo"], completa=True)
+        self.assertEqual("".join(self.cache.guardando("Hola", {}, fragmentos)), "Hola mundo")
+        self.assertEqual(self.cache.obtener("hola", {}), "hola mundo")
+
+    def test_no_guarda_si_la_generacion_falla(self):
+        fragmentos = FragmentosTransmision(["Hola", " mun"], completa=False)
+        self.assertEqual("".join(self.cache.guardando("Hola", {}, fragmentos)), "Hola mun")
+        self.assertIsNone(self.cache.obtener("Hola", {}))
+
+    def test_no_guarda_respuestas_vacias(self):
+        fragmentos = FragmentosTransmision(["Hola"], completa=True)
+        list(self.cache.guardando("Hola", {}, fragmentos))
+        self.assertIsNone(self.cache.obtener("Hola", {}))
+
+
+class BackendsTests(SimpleTestCase):
+    def test_la_interfaz_exige_cargar(self):
+        with self.assertRaises(TypeError):
+            BackendInferencia()
+
+        class SinCargar(BackendInferencia):
+            nombre = "incompleto"
+
+        with self.assertRaises(TypeError):
+            SinCargar()
+
+    def test_backend_desconocido(self):
+        with self.assertRaises(ValueError):
+            obtener_backend("tpu")
+
+    def test_safetensors_configurable(self):
+        for valor in (None, True, False):
+            with self.subTest(IA_SAFETENSORS=valor), override_settings(IA_SAFETENSORS=valor), \
+                    mock.patch("transformers.AutoModelForCausalLM.from_pretrained") as from_pretrained:
+                BackendPyTorch().cargar_modelo("distilgpt2")
+                from_pretrained.assert_called_once_with("distilgpt2", use_safetensors=valor)
+                from_pretrained.return_value.eval.assert_called_once_with()
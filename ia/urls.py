@@ -3,4 +3,7 @@ from . import views
 
 urlpatterns = [
     path("chat/", views.chat_ia, name="chat_ia"),
+    path("chat/stream/", views.chat_ia_stream, name="chat_ia_stream"),
+    path("chat/tarea/", views.chat_ia_tarea, name="chat_ia_tarea"),
+    path("estado/cache/", views.estado_cache, name="ia_estado_cache"),
 ]
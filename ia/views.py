@@ -1,16 +1,131 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from django.urls import reverse
+
+from tareas.views import recordar
+
+from .cache import cache_respuestas
+from .inferencia import obtener_motor
+from .tareas import generar_respuesta
+
+# El modelo se carga de forma perezosa en el primer uso (ver ia/modelos.py)
+
+# Parámetros de generación comunes a la respuesta completa y al streaming
+# (deterministas si la caché de respuestas está activa)
+PARAMETROS_GENERACION = cache_respuestas.parametros({"max_length": 100, "temperature": 0.7})
+
+
+def responder(pregunta):
+    return cache_respuestas.obtener_o_generar(
+        pregunta, PARAMETROS_GENERACION,
+        lambda: obtener_motor().generar(pregunta, **PARAMETROS_GENERACION),
+    )
 
-# Cargar el modelo una sola vez
-model_name = "distilgpt2"
-model = AutoModelForCausalLM.from_pretrained(model_name)
-tokenizer = AutoTokenizer.from_pretrained(model_name)
 
 def chat_ia(request):
     respuesta = ""
     if request.method == "POST":
-        pregunta = request.POST.get("pregunta")
-        inputs = tokenizer(pregunta, return_tensors="pt")
-        outputs = model.generate(**inputs, max_length=100, temperature=0.7)
-        respuesta = tokenizer.decode(outputs[0])
+        pregunta = request.POST.get("pregunta", "").strip()
+        if pregunta:
+            respuesta = responder(pregunta)
     return render(request, "ia/chat.html", {"respuesta": respuesta})
+
+
+def chat_ia_tarea(request):
+    """
+    Encola la pregunta y devuelve al momento el id de la tarea (202); el
+    resultado se consulta en ``tareas:estado``. Si la respuesta ya está en la
+    caché se devuelve directamente.
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    pregunta = request.POST.get("pregunta", "").strip()
+    if not pregunta:
+        return HttpResponseBadRequest("Falta la pregunta")
+
+    texto = cache_respuestas.obtener(pregunta, PARAMETROS_GENERACION)
+    if texto is not None:
+        return JsonResponse({"estado": "completada", "resultado": {"respuesta": texto}})
+
+    tarea = generar_respuesta.encolar(args=[pregunta], usuario=request.user)
+    recordar(request, tarea)
+    return JsonResponse({
+        "tarea": tarea.pk,
+        "estado": tarea.estado,
+        "resultado": tarea.resultado,
+        "url_estado": reverse("tareas:estado", args=[tarea.pk]),
+    }, status=202)
+
+
+@staff_member_required
+def estado_cache(request):
+    """
+    Contadores de aciertos/fallos de la caché de respuestas (para monitorización).
+    """
+    return JsonResponse(cache_respuestas.estadisticas())
+
+
+# -----------------------------
+# Respuesta en streaming (server-sent events)
+# -----------------------------
+
+def _evento(texto, tipo=None):
+    cabecera = f"event: {tipo}\n" if tipo else ""
+    return f"{cabecera}data: {json.dumps(texto)}\n\n"
+
+
+def _eventos(fragmentos):
+    for texto in fragmentos:
+        if texto:
+            yield _evento(texto)
+    yield _evento("", "fin")
+
+
+async def _eventos_async(fragmentos):
+    siguiente = sync_to_async(next, thread_sensitive=False)
+    while True:
+        texto = await siguiente(fragmentos, None)
+        if texto is None:
+            break
+        if texto:
+            yield _evento(texto)
+    yield _evento("", "fin")
+
+
+def _fragmentos(pregunta):
+    texto = cache_respuestas.obtener(pregunta, PARAMETROS_GENERACION)
+    if texto is not None:
+        return iter([texto])
+    fragmentos = obtener_motor().transmitir(pregunta, **PARAMETROS_GENERACION)
+    return cache_respuestas.guardando(pregunta, PARAMETROS_GENERACION, fragmentos)
+
+
+async def chat_ia_stream(request):
+    """
+    Envía la respuesta token a token como server-sent events.
+
+    Bajo ``config.asgi`` se sirve con un iterador asíncrono; bajo WSGI con uno
+    síncrono (Django acumularía la respuesta entera si no coinciden). Los
+    clientes sin JavaScript siguen usando ``chat_ia`` con la página completa.
+    """
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    pregunta = request.POST.get("pregunta", "").strip()
+    if not pregunta:
+        return HttpResponseBadRequest("Falta la pregunta")
+
+    fragmentos = await sync_to_async(_fragmentos, thread_sensitive=False)(pregunta)
+
+    if isinstance(request, ASGIRequest):
+        eventos = _eventos_async(fragmentos)
+    else:
+        eventos = _eventos(fragmentos)
+    response = StreamingHttpResponse(eventos, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # evitar que nginx acumule la respuesta
+    return response
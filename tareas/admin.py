@@ -0,0 +1,23 @@
+from django.contrib import admin
+
+from .models import Tarea
+
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ('id', 'nombre', 'estado', 'intentos', 'usuario', 'trabajador', 'creada', 'terminada')
+    list_filter = ('estado', 'nombre')
+    search_fields = ('nombre', 'error')
+    date_hierarchy = 'creada'
+    list_select_related = ('usuario',)
+    readonly_fields = ('creada', 'iniciada', 'latido', 'terminada', 'trabajador')
+    actions = ['reintentar']
+
+    def reintentar(self, request, queryset):
+        from django.utils import timezone
+
+        actualizadas = queryset.filter(estado=Tarea.FALLIDA).update(
+            estado=Tarea.PENDIENTE, intentos=0, disponible_en=timezone.now(), terminada=None
+        )
+        self.message_user(request, f"{actualizadas} tareas devueltas a la cola.")
+    reintentar.short_description = "Reintentar las tareas fallidas seleccionadas"
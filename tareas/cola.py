@@ -0,0 +1,258 @@
+"""
+Cola de tareas guardada en la base de datos (sin broker externo).
+
+Las tareas se declaran con el decorador ``@tarea`` en el módulo ``tareas.py``
+de cada app y se encolan con ``mi_tarea.encolar(args=[...])``; la vista
+devuelve al momento el id de la tarea y ``manage.py run_workers`` la ejecuta
+en otro proceso. El estado y el resultado se consultan en ``/tareas/<id>/``.
+
+- Los argumentos y el resultado deben ser serializables a JSON.
+- Un trabajador reclama una tarea con un ``UPDATE ... WHERE estado='pendiente'``
+  condicional, así dos trabajadores nunca ejecutan la misma.
+- Si la tarea lanza una excepción se reintenta con espera exponencial hasta
+  ``max_intentos``.
+- Mientras se ejecuta, el trabajador renueva ``latido`` cada ``TAREAS_LATIDO``
+  segundos desde otro hilo. Solo se recuperan las tareas "en curso" sin latido
+  desde hace ``TAREAS_TIEMPO_MAXIMO`` segundos (su proceso murió), no las que
+  simplemente tardan. Si aun así se recupera una que seguía viva, su resultado
+  se descarta: cada ejecución solo puede guardar el de su propio intento.
+- Con ``TAREAS_SINCRONAS = True`` (desarrollo) se ejecutan al encolarlas.
+"""
+import logging
+import os
+import shutil
+import socket
+import threading
+import traceback
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import partial
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Tarea
+
+logger = logging.getLogger(__name__)
+
+REGISTRO = {}
+
+
+def tarea(nombre=None, max_intentos=3):
+    """
+    Registra una función como tarea. Añade ``func.encolar(args=..., kwargs=..., ...)``.
+    """
+    def decorador(func):
+        clave = nombre or f"{func.__module__.split('.')[0]}.{func.__name__}"
+        func.nombre_tarea = clave
+        func.max_intentos = max_intentos
+        func.encolar = partial(encolar, clave)
+        REGISTRO[clave] = func
+        return func
+    return decorador
+
+
+def encolar(nombre, args=(), kwargs=None, usuario=None, unica=False):
+    """
+    Crea una tarea pendiente y la devuelve.
+
+    Con ``unica=True`` se reutiliza la tarea pendiente o en curso con los mismos
+    argumentos si ya existe (p. ej. dos descargas seguidas del mismo certificado).
+    """
+    if nombre not in REGISTRO:
+        raise LookupError(f"Tarea desconocida: {nombre!r}")
+    argumentos = {"args": list(args), "kwargs": kwargs or {}}
+    if usuario is not None and not usuario.is_authenticated:
+        usuario = None
+
+    if unica:
+        existente = (Tarea.objects
+                     .filter(nombre=nombre, argumentos=argumentos,
+                             estado__in=[Tarea.PENDIENTE, Tarea.EN_CURSO])
+                     .first())
+        if existente is not None:
+            return existente
+
+    nueva = Tarea.objects.create(
+        nombre=nombre, argumentos=argumentos, usuario=usuario,
+        max_intentos=REGISTRO[nombre].max_intentos,
+    )
+    if getattr(settings, 'TAREAS_SINCRONAS', False):
+        reclamada = _reclamar(nueva.pk, "sincrono")
+        if reclamada is not None:
+            nueva = ejecutar(reclamada)
+    return nueva
+
+
+# -----------------------------
+# Ejecución (trabajadores)
+# -----------------------------
+
+def nombre_trabajador():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _reclamar(pk, trabajador):
+    ahora = timezone.now()
+    reclamada = Tarea.objects.filter(pk=pk, estado=Tarea.PENDIENTE).update(
+        estado=Tarea.EN_CURSO, trabajador=trabajador,
+        iniciada=ahora, latido=ahora, intentos=F('intentos') + 1,
+    )
+    return Tarea.objects.get(pk=pk) if reclamada else None
+
+
+def _este_intento(tarea):
+    """
+    La fila de ``tarea`` solo mientras siga "en curso" con este mismo intento (no recuperada ni reclamada por otro).
+    """
+    return Tarea.objects.filter(pk=tarea.pk, estado=Tarea.EN_CURSO, intentos=tarea.intentos)
+
+
+@contextmanager
+def _latiendo(tarea):
+    """
+    Renueva ``tarea.latido`` cada ``TAREAS_LATIDO`` segundos mientras dura el bloque.
+    """
+    parar = threading.Event()
+    intervalo = getattr(settings, 'TAREAS_LATIDO', 30)
+
+    def latir():
+        try:
+            while not parar.wait(intervalo):
+                try:
+                    _este_intento(tarea).update(latido=timezone.now())
+                except Exception:
+                    logger.exception("No se pudo renovar el latido de la tarea %s", tarea)
+        finally:
+            connection.close()
+
+    hilo = threading.Thread(target=latir, name=f"latido-tarea-{tarea.pk}", daemon=True)
+    hilo.start()
+    try:
+        yield
+    finally:
+        parar.set()
+        hilo.join()
+
+
+def reclamar(trabajador=None, candidatas=10):
+    """
+    Marca como "en curso" la siguiente tarea disponible y la devuelve (o ``None``).
+    """
+    trabajador = trabajador or nombre_trabajador()
+    pks = list(
+        Tarea.objects
+        .filter(estado=Tarea.PENDIENTE, disponible_en__lte=timezone.now())
+        .order_by('disponible_en', 'pk')
+        .values_list('pk', flat=True)[:candidatas]
+    )
+    for pk in pks:
+        # Otro trabajador puede habérsela llevado entre la consulta y el UPDATE
+        reclamada = _reclamar(pk, trabajador)
+        if reclamada is not None:
+            return reclamada
+    return None
+
+
+def ejecutar(tarea):
+    """
+    Ejecuta una tarea ya reclamada y guarda su resultado, su error o el siguiente reintento.
+    """
+    func = REGISTRO.get(tarea.nombre)
+    try:
+        if func is None:
+            raise LookupError(f"Tarea desconocida: {tarea.nombre!r}")
+        with _latiendo(tarea):
+            resultado = func(*tarea.argumentos.get("args", []), **tarea.argumentos.get("kwargs", {}))
+    except Exception:
+        logger.exception("Error en la tarea %s", tarea)
+        tarea.error = traceback.format_exc()
+        if func is not None and tarea.intentos < tarea.max_intentos:
+            base = getattr(settings, 'TAREAS_REINTENTO_SEGUNDOS', 10)
+            tarea.estado = Tarea.PENDIENTE
+            tarea.disponible_en = timezone.now() + timedelta(seconds=base * 2 ** (tarea.intentos - 1))
+        else:
+            tarea.estado = Tarea.FALLIDA
+            tarea.terminada = timezone.now()
+    else:
+        tarea.estado = Tarea.COMPLETADA
+        tarea.resultado = resultado
+        tarea.error = ""
+        tarea.terminada = timezone.now()
+    campos = ['estado', 'resultado', 'error', 'disponible_en', 'terminada']
+    if not _este_intento(tarea).update(**{campo: getattr(tarea, campo) for campo in campos}):
+        logger.warning("La tarea %s se dio por abandonada mientras se ejecutaba: se descarta este intento", tarea)
+    return tarea
+
+
+def recuperar_abandonadas():
+    """
+    Devuelve a la cola las tareas "en curso" cuyo trabajador murió sin terminarlas
+    (sin latido desde hace ``TAREAS_TIEMPO_MAXIMO`` segundos).
+    """
+    limite = timezone.now() - timedelta(seconds=getattr(settings, 'TAREAS_TIEMPO_MAXIMO', 600))
+    # Las reclamadas antes de que existiera el latido solo tienen la hora de inicio
+    sin_latido = Q(latido__lt=limite) | Q(latido=None, iniciada__lt=limite)
+    abandonadas = Tarea.objects.filter(sin_latido, estado=Tarea.EN_CURSO)
+    fallidas = abandonadas.filter(intentos__gte=F('max_intentos')).update(
+        estado=Tarea.FALLIDA, terminada=timezone.now(),
+        error="El trabajador no terminó la tarea a tiempo",
+    )
+    reintentadas = abandonadas.update(estado=Tarea.PENDIENTE, disponible_en=timezone.now())
+    return reintentadas + fallidas
+
+
+def purgar_antiguas():
+    """
+    Borra las tareas terminadas hace más de ``TAREAS_RETENCION_DIAS`` y sus ficheros.
+    """
+    limite = timezone.now() - timedelta(days=getattr(settings, 'TAREAS_RETENCION_DIAS', 7))
+    antiguas = Tarea.objects.filter(estado__in=[Tarea.COMPLETADA, Tarea.FALLIDA], terminada__lt=limite)
+    for resultado in antiguas.exclude(resultado=None).values_list('resultado', flat=True).iterator():
+        borrar_fichero(resultado)
+    borradas, _ = antiguas.delete()
+    return borradas
+
+
+# -----------------------------
+# Resultados en fichero
+# -----------------------------
+
+def directorio_resultados():
+    return Path(getattr(settings, 'TAREAS_RESULTADOS_DIR', settings.BASE_DIR / 'resultados_tareas'))
+
+
+def nuevo_fichero(nombre):
+    """
+    Reserva una ruta para un fichero de resultado. Devuelve ``(ruta, resultado)``:
+    la tarea escribe en ``ruta`` y devuelve ``resultado`` para que se pueda descargar.
+    """
+    relativa = f"{uuid.uuid4().hex}/{Path(nombre).name}"
+    ruta = directorio_resultados() / relativa
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    return ruta, {"fichero": relativa}
+
+
+def ruta_fichero(resultado):
+    """
+    Ruta del fichero de un resultado o ``None`` (nunca fuera del directorio de resultados).
+    """
+    if not isinstance(resultado, dict) or not resultado.get("fichero"):
+        return None
+    base = directorio_resultados().resolve()
+    ruta = (base / resultado["fichero"]).resolve()
+    return ruta if ruta.is_relative_to(base) and ruta != base else None
+
+
+def borrar_fichero(resultado):
+    ruta = ruta_fichero(resultado)
+    if ruta is None:
+        return
+    if ruta.parent == directorio_resultados().resolve():
+        ruta.unlink(missing_ok=True)
+    else:
+        shutil.rmtree(ruta.parent, ignore_errors=True)
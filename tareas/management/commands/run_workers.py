@@ -0,0 +1,122 @@
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from tareas import cola
+
+
+class Parada:
+    """
+    Aviso de parada que se puede activar desde un manejador de señales.
+
+    Los manejadores solo cambian un booleano: tomar un lock dentro de ellos
+    (como hace ``multiprocessing.Event.set``) puede bloquear el proceso.
+    """
+
+    def __init__(self, compartida=None):
+        self.local = False
+        self.compartida = compartida
+
+    def activar(self, *args):
+        self.local = True
+
+    def activa(self):
+        return self.local or (self.compartida is not None and self.compartida.is_set())
+
+    def esperar(self, segundos):
+        limite = time.monotonic() + segundos
+        while not self.activa() and time.monotonic() < limite:
+            time.sleep(min(0.1, segundos))
+
+
+def trabajar(compartida, intervalo, hijo=True):
+    """
+    Bucle de un trabajador: reclama y ejecuta tareas hasta que se pide parar.
+    La tarea en curso siempre se termina antes de salir.
+    """
+    parada = Parada(compartida)
+    # Ctrl+C llega a todo el grupo de procesos: en los hijos solo lo atiende el maestro
+    signal.signal(signal.SIGINT, signal.SIG_IGN if hijo else parada.activar)
+    signal.signal(signal.SIGTERM, parada.activar)
+    trabajador = cola.nombre_trabajador()
+    while not parada.activa():
+        close_old_connections()
+        tarea = cola.reclamar(trabajador)
+        if tarea is None:
+            parada.esperar(intervalo)
+        else:
+            cola.ejecutar(tarea)
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Arranca los procesos que ejecutan las tareas en segundo plano"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--procesos", type=int, default=getattr(settings, "TAREAS_PROCESOS", 2),
+                            help="Número de procesos trabajadores (1 = en este mismo proceso)")
+        parser.add_argument("--intervalo", type=float, default=getattr(settings, "TAREAS_INTERVALO", 1.0),
+                            help="Segundos de espera cuando la cola está vacía")
+        parser.add_argument("--una-vez", action="store_true",
+                            help="Ejecuta las tareas disponibles y termina (útil en cron)")
+
+    def handle(self, *args, **options):
+        self._mantenimiento()
+
+        if options["una_vez"]:
+            total = 0
+            while (tarea := cola.reclamar()) is not None:
+                cola.ejecutar(tarea)
+                total += 1
+            self.stdout.write(self.style.SUCCESS(f"{total} tareas ejecutadas"))
+            return
+
+        if options["procesos"] <= 1:
+            trabajar(None, options["intervalo"], hijo=False)
+            return
+
+        # fork: los hijos heredan Django ya configurado y las tareas registradas
+        contexto = multiprocessing.get_context("fork")
+        compartida = contexto.Event()
+        connections.close_all()  # cada proceso abre su propia conexión
+
+        def lanzar():
+            proceso = contexto.Process(target=trabajar, args=(compartida, options["intervalo"]), daemon=True)
+            proceso.start()
+            return proceso
+
+        procesos = [lanzar() for _ in range(options["procesos"])]
+        self.stdout.write(f"{len(procesos)} trabajadores en marcha (Ctrl+C para parar)")
+
+        parada = Parada()
+        signal.signal(signal.SIGINT, parada.activar)
+        signal.signal(signal.SIGTERM, parada.activar)
+        ultimo_mantenimiento = time.monotonic()
+        while not parada.activa():
+            parada.esperar(5)
+            if parada.activa():
+                break
+            # Sustituir los trabajadores que hayan muerto
+            for i, proceso in enumerate(procesos):
+                if not proceso.is_alive():
+                    self.stderr.write(f"El trabajador {proceso.pid} terminó ({proceso.exitcode}); se relanza")
+                    procesos[i] = lanzar()
+            if time.monotonic() - ultimo_mantenimiento > 60:
+                self._mantenimiento()
+                ultimo_mantenimiento = time.monotonic()
+
+        self.stdout.write("Esperando a que terminen las tareas en curso...")
+        compartida.set()
+        for proceso in procesos:
+            proceso.join()
+
+    def _mantenimiento(self):
+        recuperadas = cola.recuperar_abandonadas()
+        purgadas = cola.purgar_antiguas()
+        if recuperadas or purgadas:
+            self.stdout.write(f"{recuperadas} tareas recuperadas, {purgadas} purgadas")
+        connections.close_all()
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.1 on 2026-10-17 10:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=150, verbose_name='Tarea')),
+                ('argumentos', models.JSONField(blank=True, default=dict)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_curso', 'En curso'), ('completada', 'Completada'), ('fallida', 'Fallida')], default='pendiente', max_length=20)),
+                ('resultado', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('intentos', models.PositiveIntegerField(default=0)),
+                ('max_intentos', models.PositiveIntegerField(default=3)),
+                ('trabajador', models.CharField(blank=True, max_length=100)),
+                ('disponible_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('creada', models.DateTimeField(auto_now_add=True)),
+                ('iniciada', models.DateTimeField(blank=True, null=True)),
+                ('terminada', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tareas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Tarea',
+                'verbose_name_plural': 'Tareas',
+                'ordering': ['-creada'],
+                'indexes': [models.Index(fields=['estado', 'disponible_en'], name='tarea_estado_disp_idx')],
+            },
+        ),
+    ]
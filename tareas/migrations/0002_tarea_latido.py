@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tareas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarea',
+            name='latido',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Tarea(models.Model):
+    PENDIENTE = 'pendiente'
+    EN_CURSO = 'en_curso'
+    COMPLETADA = 'completada'
+    FALLIDA = 'fallida'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_CURSO, 'En curso'),
+        (COMPLETADA, 'Completada'),
+        (FALLIDA, 'Fallida'),
+    ]
+
+    nombre = models.CharField(max_length=150, verbose_name="Tarea")
+    argumentos = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+    resultado = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    intentos = models.PositiveIntegerField(default=0)
+    max_intentos = models.PositiveIntegerField(default=3)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+        null=True, blank=True, related_name='tareas'
+    )
+    trabajador = models.CharField(max_length=100, blank=True)
+    disponible_en = models.DateTimeField(default=timezone.now)
+    creada = models.DateTimeField(auto_now_add=True)
+    iniciada = models.DateTimeField(null=True, blank=True)
+    # Lo renueva el trabajador mientras la ejecuta: sin latido reciente se da por abandonada
+    latido = models.DateTimeField(null=True, blank=True)
+    terminada = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Tarea"
+        verbose_name_plural = "Tareas"
+        ordering = ['-creada']
+        indexes = [
+            # Consulta de los trabajadores: siguiente tarea pendiente ya disponible
+            models.Index(fields=['estado', 'disponible_en'], name='tarea_estado_disp_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre} #{self.pk} ({self.get_estado_display()})"
+
+    @property
+    def finalizada(self):
+        return self.estado in (self.COMPLETADA, self.FALLIDA)
+
+    def como_dict(self):
+        return {
+            "id": self.pk,
+            "nombre": self.nombre,
+            "estado": self.estado,
+            "resultado": self.resultado,
+            "error": self.error,
+            "intentos": self.intentos,
+            "creada": self.creada.isoformat() if self.creada else None,
+            "terminada": self.terminada.isoformat() if self.terminada else None,
+        }
@@ -0,0 +1,184 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from tareas import cola
+from tareas.cola import tarea
+from tareas.models import Tarea
+
+
+@tarea(nombre="tests.sumar")
+def sumar(a, b):
+    return a + b
+
+
+@tarea(nombre="tests.fallar", max_intentos=3)
+def fallar():
+    raise RuntimeError("fallo de prueba")
+
+
+@tarea(nombre="tests.esperar")
+def esperar(segundos):
+    time.sleep(segundos)
+    return "hecho"
+
+
+class ReclamarTests(TestCase):
+    def test_una_tarea_solo_la_reclama_un_trabajador(self):
+        pendiente = sumar.encolar(args=[1, 2])
+        reclamada = cola.reclamar("trabajador-a")
+        self.assertEqual(reclamada.pk, pendiente.pk)
+        self.assertEqual((reclamada.estado, reclamada.trabajador, reclamada.intentos),
+                         (Tarea.EN_CURSO, "trabajador-a", 1))
+        self.assertIsNotNone(reclamada.latido)
+        self.assertIsNone(cola.reclamar("trabajador-b"))
+
+    def test_otro_trabajador_se_adelanta_entre_la_consulta_y_el_update(self):
+        primera = sumar.encolar(args=[1, 1])
+        segunda = sumar.encolar(args=[2, 2])
+        reclamar = cola._reclamar
+        adelantadas = []
+
+        def adelantarse(pk, trabajador):
+            # B reclama la misma tarea que A acaba de elegir, justo antes de su UPDATE
+            if not adelantadas:
+                adelantadas.append(reclamar(pk, "trabajador-b"))
+            return reclamar(pk, trabajador)
+
+        with mock.patch.object(cola, "_reclamar", side_effect=adelantarse):
+            reclamada = cola.reclamar("trabajador-a")
+        self.assertEqual(adelantadas[0].pk, primera.pk)
+        self.assertEqual(reclamada.pk, segunda.pk)
+        self.assertEqual(Tarea.objects.get(pk=primera.pk).trabajador, "trabajador-b")
+
+    def test_no_reclama_las_que_aun_no_estan_disponibles(self):
+        sumar.encolar(args=[1, 2])
+        Tarea.objects.update(disponible_en=timezone.now() + timedelta(minutes=1))
+        self.assertIsNone(cola.reclamar())
+
+    def test_unica_reutiliza_la_pendiente(self):
+        primera = sumar.encolar(args=[1, 2], unica=True)
+        self.assertEqual(sumar.encolar(args=[1, 2], unica=True).pk, primera.pk)
+        self.assertNotEqual(sumar.encolar(args=[2, 1], unica=True).pk, primera.pk)
+
+
+@override_settings(TAREAS_REINTENTO_SEGUNDOS=10)
+class EjecutarTests(TestCase):
+    def test_completada(self):
+        sumar.encolar(args=[2, 3])
+        hecha = cola.ejecutar(cola.reclamar())
+        hecha.refresh_from_db()
+        self.assertEqual((hecha.estado, hecha.resultado, hecha.error), (Tarea.COMPLETADA, 5, ""))
+        self.assertIsNotNone(hecha.terminada)
+
+    def test_reintentos_con_espera_exponencial(self):
+        fallar.encolar()
+        ahora = timezone.now()
+        esperas = []
+        with mock.patch("tareas.cola.timezone.now", side_effect=lambda: ahora), \
+                self.assertLogs("tareas.cola", "ERROR") as registro:
+            for _ in range(2):
+                fallida = cola.ejecutar(cola.reclamar())
+                fallida.refresh_from_db()
+                self.assertEqual(fallida.estado, Tarea.PENDIENTE)
+                self.assertIn("fallo de prueba", fallida.error)
+                esperas.append(fallida.disponible_en - ahora)
+                self.assertIsNone(cola.reclamar())  # todavía no toca
+                ahora = fallida.disponible_en
+            fallida = cola.ejecutar(cola.reclamar())
+        self.assertEqual(len(registro.records), 3)
+        self.assertEqual(esperas, [timedelta(seconds=10), timedelta(seconds=20)])
+        fallida.refresh_from_db()
+        self.assertEqual((fallida.estado, fallida.intentos), (Tarea.FALLIDA, 3))
+        self.assertIsNotNone(fallida.terminada)
+
+    def test_tarea_desconocida_falla_sin_reintentos(self):
+        Tarea.objects.create(nombre="tests.no_existe", max_intentos=3)
+        with self.assertLogs("tareas.cola", "ERROR"):
+            fallida = cola.ejecutar(cola.reclamar())
+        fallida.refresh_from_db()
+        self.assertEqual((fallida.estado, fallida.intentos), (Tarea.FALLIDA, 1))
+        self.assertIn("Tarea desconocida", fallida.error)
+
+    @override_settings(TAREAS_SINCRONAS=True)
+    def test_sincronas(self):
+        hecha = sumar.encolar(args=[1, 1])
+        self.assertEqual((hecha.estado, hecha.resultado), (Tarea.COMPLETADA, 2))
+
+
+@override_settings(TAREAS_TIEMPO_MAXIMO=600)
+class RecuperarTests(TestCase):
+    def en_curso(self, latido, intentos=1, **campos):
+        return Tarea.objects.create(nombre="tests.sumar", argumentos={"args": [1, 2]}, estado=Tarea.EN_CURSO,
+                                    trabajador="muerto:1", intentos=intentos, latido=latido, **campos)
+
+    def test_sin_latido_vuelve_a_la_cola(self):
+        abandonada = self.en_curso(timezone.now() - timedelta(minutes=11))
+        self.assertEqual(cola.recuperar_abandonadas(), 1)
+        abandonada.refresh_from_db()
+        self.assertEqual(abandonada.estado, Tarea.PENDIENTE)
+        self.assertEqual(cola.reclamar("vivo:2").pk, abandonada.pk)
+
+    def test_larga_con_latido_reciente_no_se_recupera(self):
+        # Empezó hace una hora pero su trabajador sigue renovando el latido
+        viva = self.en_curso(timezone.now() - timedelta(seconds=20), iniciada=timezone.now() - timedelta(hours=1))
+        self.assertEqual(cola.recuperar_abandonadas(), 0)
+        viva.refresh_from_db()
+        self.assertEqual(viva.estado, Tarea.EN_CURSO)
+
+    def test_sin_intentos_restantes_falla(self):
+        agotada = self.en_curso(timezone.now() - timedelta(minutes=11), intentos=3)
+        self.assertEqual(cola.recuperar_abandonadas(), 1)
+        agotada.refresh_from_db()
+        self.assertEqual(agotada.estado, Tarea.FALLIDA)
+        self.assertIn("no terminó la tarea a tiempo", agotada.error)
+
+    def test_reclamadas_antes_del_latido(self):
+        antigua = self.en_curso(None, iniciada=timezone.now() - timedelta(minutes=11))
+        self.assertEqual(cola.recuperar_abandonadas(), 1)
+        antigua.refresh_from_db()
+        self.assertEqual(antigua.estado, Tarea.PENDIENTE)
+
+    def test_el_intento_recuperado_no_guarda_su_resultado(self):
+        sumar.encolar(args=[1, 2])
+        lenta = cola.reclamar("lento:1")
+        # Mientras tanto se da por abandonada y otro trabajador la reclama
+        Tarea.objects.filter(pk=lenta.pk).update(estado=Tarea.PENDIENTE)
+        cola.reclamar("rapido:2")
+        with self.assertLogs("tareas.cola", "WARNING"):
+            cola.ejecutar(lenta)
+        lenta.refresh_from_db()
+        self.assertEqual((lenta.estado, lenta.trabajador, lenta.intentos), (Tarea.EN_CURSO, "rapido:2", 2))
+
+
+@override_settings(TAREAS_LATIDO=0.05, TAREAS_TIEMPO_MAXIMO=0.5)
+class LatidoTests(TransactionTestCase):
+    def test_el_latido_mantiene_viva_una_tarea_larga(self):
+        esperar.encolar(args=[1.5])
+        larga = cola.reclamar("trabajador:1")
+
+        def ejecutar():
+            try:
+                cola.ejecutar(larga)
+            finally:
+                connection.close()
+
+        hilo = threading.Thread(target=ejecutar)
+        hilo.start()
+        try:
+            recuperadas = 0
+            while hilo.is_alive():
+                # Dura el triple que TAREAS_TIEMPO_MAXIMO y nunca se da por abandonada
+                recuperadas += cola.recuperar_abandonadas()
+                time.sleep(0.1)
+        finally:
+            hilo.join()
+        self.assertEqual(recuperadas, 0)
+        larga.refresh_from_db()
+        self.assertEqual((larga.estado, larga.resultado, larga.intentos), (Tarea.COMPLETADA, "hecho", 1))
+        self.assertGreater(larga.latido, larga.iniciada)
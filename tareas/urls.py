@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+app_name = 'tareas'
+
+urlpatterns = [
+    path('<int:pk>/', views.estado, name='estado'),
+    path('<int:pk>/espera/', views.espera, name='espera'),
+    path('<int:pk>/descargar/', views.descargar, name='descargar'),
+]
@@ -0,0 +1,67 @@
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme, urlencode
+
+from . import cola
+from .models import Tarea
+
+SESION = 'tareas'
+
+
+def recordar(request, tarea):
+    """
+    Guarda el id en la sesión para que un visitante anónimo pueda consultar su tarea.
+    """
+    ids = request.session.get(SESION, [])
+    if tarea.pk not in ids:
+        request.session[SESION] = (ids + [tarea.pk])[-50:]
+
+
+def esperar(request, tarea, siguiente=''):
+    """
+    Redirige a la página de espera de la tarea; al terminar vuelve a ``siguiente``
+    (o descarga el fichero resultado si no se indica).
+    """
+    recordar(request, tarea)
+    url = reverse('tareas:espera', args=[tarea.pk])
+    return redirect(f"{url}?{urlencode({'siguiente': siguiente})}" if siguiente else url)
+
+
+def _tarea_visible(request, pk):
+    tarea = get_object_or_404(Tarea, pk=pk)
+    propia = tarea.usuario_id is not None and tarea.usuario_id == request.user.pk
+    if not (propia or request.user.is_staff or pk in request.session.get(SESION, [])):
+        raise Http404
+    return tarea
+
+
+def estado(request, pk):
+    """
+    Estado de una tarea en JSON (para consultarlo periódicamente desde el navegador).
+    """
+    tarea = _tarea_visible(request, pk)
+    datos = tarea.como_dict()
+    if cola.ruta_fichero(tarea.resultado) is not None:
+        datos["descarga"] = reverse('tareas:descargar', args=[tarea.pk])
+    return JsonResponse(datos)
+
+
+def espera(request, pk):
+    """
+    Página de "procesando..." que consulta el estado y redirige al terminar.
+    """
+    tarea = _tarea_visible(request, pk)
+    siguiente = request.GET.get('siguiente', '')
+    if not url_has_allowed_host_and_scheme(siguiente, allowed_hosts={request.get_host()},
+                                           require_https=request.is_secure()):
+        siguiente = ''
+    return render(request, 'tareas/espera.html', {'tarea': tarea, 'siguiente': siguiente})
+
+
+def descargar(request, pk):
+    tarea = _tarea_visible(request, pk)
+    ruta = cola.ruta_fichero(tarea.resultado)
+    if tarea.estado != Tarea.COMPLETADA or ruta is None or not ruta.exists():
+        raise Http404
+    return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=ruta.name)
@@ -1,5 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
+from config.exportar import ExportacionMixin
+from config.imagenes import url_miniatura
 from .models import Producto, Categoria, Pedido, LineaPedido   # añadimos Pedido y LineaPedido
 
 @admin.register(Categoria)
@@ -12,10 +14,10 @@ class CategoriaAdmin(admin.ModelAdmin):
 @admin.register(Producto)
 class ProductoAdmin(admin.ModelAdmin):
     list_display = (
-        'id', 'nombre', 'precio', 'stock', 'categoria', 'fecha_creacion'
+        'id', 'sku', 'nombre', 'precio', 'stock', 'categoria', 'fecha_creacion'
     )                                                # Mostrar ID y campos clave
     list_filter = ('categoria', 'fecha_creacion', 'stock')  # Filtros útiles
-    search_fields = ('nombre', 'descripcion')        # Buscar por nombre y descripción
+    search_fields = ('sku', 'nombre', 'descripcion') # Buscar por referencia, nombre y descripción
     ordering = ('nombre',)                           # Ordenar por nombre
     list_editable = ('precio', 'stock')              # Editar precio y stock directamente en la lista
     list_per_page = 20                               # Paginación
@@ -25,7 +27,7 @@ class ProductoAdmin(admin.ModelAdmin):
     # Mantengo tu estructura original de fieldsets y añado la sección Multimedia
     fieldsets = (
         ('Información básica', {
-            'fields': ('nombre', 'descripcion', 'categoria')
+            'fields': ('sku', 'nombre', 'descripcion', 'categoria')
         }),
         ('Detalles de inventario', {
             'fields': ('precio', 'stock')
@@ -46,7 +48,7 @@ class ProductoAdmin(admin.ModelAdmin):
         if obj.imagen:
             return format_html(
                 '<img src="{}" style="max-height: 150px; object-fit: contain;"/>',
-                obj.imagen.url
+                url_miniatura(obj.imagen, 320) or obj.imagen.url
             )
         return "(sin imagen)"
     imagen_preview.short_description = 'Vista previa'
@@ -64,7 +66,7 @@ class LineaPedidoInline(admin.TabularInline):
 
 
 @admin.register(Pedido)
-class PedidoAdmin(admin.ModelAdmin):
+class PedidoAdmin(ExportacionMixin, admin.ModelAdmin):
     list_display = ('id', 'nombre', 'apellidos', 'email', 'telefono', 'fecha', 'total')
     search_fields = ('nombre', 'apellidos', 'email')
     list_filter = ('fecha', 'suscripcion_boletin', 'crear_cuenta')
@@ -72,6 +74,10 @@ class PedidoAdmin(admin.ModelAdmin):
     date_hierarchy = 'fecha'
     inlines = [LineaPedidoInline]
     readonly_fields = ('fecha', 'total')
+    campos_exportacion = (
+        'id', 'nombre', 'apellidos', 'email', 'telefono', 'direccion', 'fecha', 'total',
+        'suscripcion_boletin', 'crear_cuenta',
+    )
 
     fieldsets = (
         ('Datos del cliente', {
@@ -87,8 +93,9 @@ class PedidoAdmin(admin.ModelAdmin):
 
 
 @admin.register(LineaPedido)
-class LineaPedidoAdmin(admin.ModelAdmin):
+class LineaPedidoAdmin(ExportacionMixin, admin.ModelAdmin):
     list_display = ('id', 'pedido', 'producto', 'cantidad', 'precio_unitario', 'subtotal')
+    campos_exportacion = ('id', 'pedido', 'pedido__fecha', 'producto', 'producto__nombre', 'cantidad', 'precio_unitario')
     search_fields = ('producto__nombre', 'pedido__nombre')
     list_filter = ('pedido',)
     ordering = ('pedido',)
@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import cached_property
+
+from .models import Producto
+
+CLAVE_SESION = 'carrito'
+
+
+@dataclass(frozen=True)
+class LineaCarrito:
+    producto: Producto
+    cantidad: int
+
+    @property
+    def subtotal(self):
+        return self.producto.precio * self.cantidad
+
+
+class Carrito:
+    """
+    Carrito de la sesión: ``{"<id de producto>": cantidad}``.
+
+    Los productos se cargan con una sola consulta la primera vez que se
+    necesitan y los importes se calculan en ``Decimal`` una vez por petición.
+    ``Carrito.de_request(request)`` devuelve siempre el mismo objeto dentro de
+    una petición, así la página, el contador de la cabecera y el checkout
+    comparten la consulta y los cálculos.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.cantidades = {}
+        for pk, cantidad in session.get(CLAVE_SESION, {}).items():
+            try:
+                pk, cantidad = int(pk), int(cantidad)
+            except (TypeError, ValueError):
+                continue  # sesión manipulada o de una versión anterior
+            if cantidad > 0:
+                self.cantidades[pk] = cantidad
+
+    @classmethod
+    def de_request(cls, request):
+        if not hasattr(request, '_carrito'):
+            request._carrito = cls(request.session)
+        return request._carrito
+
+    # -----------------------------
+    # Contenido e importes
+    # -----------------------------
+
+    @cached_property
+    def lineas(self):
+        if not self.cantidades:
+            return []
+        productos = Producto.objects.filter(pk__in=self.cantidades).select_related('categoria')
+        return [LineaCarrito(producto, self.cantidades[producto.pk]) for producto in productos]
+
+    @cached_property
+    def total(self):
+        return sum((linea.subtotal for linea in self.lineas), Decimal('0.00'))
+
+    @property
+    def num_articulos(self):
+        """
+        Unidades en el carrito (sin consultar la base de datos: sirve para la cabecera).
+        """
+        return sum(self.cantidades.values())
+
+    def __iter__(self):
+        return iter(self.lineas)
+
+    def __len__(self):
+        return len(self.lineas)
+
+    def __bool__(self):
+        return bool(self.lineas)
+
+    # -----------------------------
+    # Cambios
+    # -----------------------------
+
+    def agregar(self, producto_id, cantidad=1):
+        self.cantidades[int(producto_id)] = self.cantidades.get(int(producto_id), 0) + cantidad
+        self._guardar()
+
+    def eliminar(self, producto_id):
+        self.cantidades.pop(int(producto_id), None)
+        self._guardar()
+
+    def vaciar(self):
+        self.cantidades = {}
+        self._guardar()
+
+    def _guardar(self):
+        self.session[CLAVE_SESION] = {str(pk): cantidad for pk, cantidad in self.cantidades.items()}
+        # Los importes ya calculados dejan de valer
+        self.__dict__.pop('lineas', None)
+        self.__dict__.pop('total', None)
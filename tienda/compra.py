@@ -0,0 +1,90 @@
+import logging
+
+from django.db import OperationalError, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from config import cache_paginas
+
+from .models import Producto, LineaPedido
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorCompra(Exception):
+    """
+    La compra no se puede completar (el mensaje se muestra al cliente).
+    """
+
+
+class StockInsuficiente(ErrorCompra):
+    def __init__(self, productos):
+        self.productos = productos
+        nombres = ", ".join(p.nombre for p in productos)
+        super().__init__(f"No hay stock suficiente de: {nombres}")
+
+
+class _SinReserva(Exception):
+    """
+    Alguna línea no se pudo reservar (sale de la transacción para deshacer la reserva parcial).
+    """
+
+
+def procesar_compra(form, carrito):
+    """
+    Crea el Pedido del formulario con las líneas del carrito en una sola transacción.
+
+    - El stock se reserva con un único UPDATE condicional (stock >= cantidad), así
+      dos compras simultáneas no pueden vender más unidades de las que hay.
+    - Las líneas se insertan con bulk_create y el total se calcula en una pasada.
+
+    El número de consultas es constante, sin importar cuántos productos tenga el carrito.
+
+    El UPDATE no pasa por las señales de ``Producto``: al confirmar la compra se
+    invalida a mano el grupo ``"tienda"`` de la caché de páginas (el stock de las
+    fichas, las facetas y el total de ``?disponibles=1`` cambian).
+
+    El UPDATE va antes que la lectura de los productos: en SQLite una transacción
+    que primero lee y luego escribe no puede esperar al bloqueo de escritura y
+    falla en el acto con "database is locked" si otra compra se le adelanta. Si
+    aun así la base de datos sigue bloqueada (también al releer el stock que
+    falta), se lanza ``ErrorCompra``.
+    """
+    cantidades = {int(pk): int(cantidad) for pk, cantidad in carrito.items() if int(cantidad) > 0}
+    if not cantidades:
+        raise ErrorCompra("Tu carrito está vacío.")
+
+    cantidad_por_producto = Case(
+        *[When(pk=pk, then=Value(cantidad)) for pk, cantidad in cantidades.items()],
+        output_field=IntegerField(),
+    )
+    try:
+        try:
+            with transaction.atomic():
+                reservados = (Producto.objects
+                              .filter(pk__in=cantidades, stock__gte=cantidad_por_producto)
+                              .update(stock=F('stock') - cantidad_por_producto))
+                productos = list(Producto.objects.filter(pk__in=cantidades))
+                if not productos:
+                    raise ErrorCompra("Tu carrito está vacío.")
+                if reservados != len(productos):
+                    # Al salir con la excepción la transacción deshace la reserva parcial
+                    raise _SinReserva
+
+                pedido = form.save(commit=False)
+                pedido.total = sum(p.precio * cantidades[p.pk] for p in productos)
+                pedido.save()
+
+                LineaPedido.objects.bulk_create([
+                    LineaPedido(pedido=pedido, producto=p, cantidad=cantidades[p.pk], precio_unitario=p.precio)
+                    for p in productos
+                ])
+                transaction.on_commit(lambda: cache_paginas.invalidar("tienda"))
+        except _SinReserva:
+            # Esta lectura también puede encontrarse la tabla bloqueada: va dentro del mismo try
+            productos = list(Producto.objects.filter(pk__in=cantidades))
+            raise StockInsuficiente([p for p in productos if p.stock < cantidades[p.pk]] or productos) from None
+    except OperationalError as exc:
+        logger.warning("Compra no procesada, base de datos ocupada: %s", exc)
+        raise ErrorCompra("La tienda está recibiendo muchos pedidos ahora mismo. "
+                          "Inténtalo de nuevo en unos segundos.") from None
+    return pedido
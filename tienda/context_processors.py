@@ -0,0 +1,12 @@
+from django.utils.functional import SimpleLazyObject
+
+from .carrito import Carrito
+
+
+def carrito(request):
+    """
+    ``carrito_compra`` para el contador de la cabecera. Solo lee la sesión si la plantilla lo usa.
+    """
+    if not hasattr(request, 'session'):
+        return {}
+    return {'carrito_compra': SimpleLazyObject(lambda: Carrito.de_request(request))}
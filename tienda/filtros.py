@@ -0,0 +1,140 @@
+"""
+Filtros, facetas y orden del catálogo de la tienda (``listado_productos``).
+
+Las facetas (productos por categoría y cuántos hay disponibles) salen de una
+única consulta agrupada por categoría. De esa misma consulta se obtiene el
+total de resultados, así que el paginador no necesita su propio ``COUNT``.
+Las facetas se guardan en la caché de páginas con la versión del grupo
+``"tienda"`` (config/cache_paginas.py): cambian solo al guardar un producto o
+una categoría, o al confirmar una compra (tienda/compra.py). Con la caché llena, una página del catálogo es una consulta,
+tenga la tienda cien productos o cincuenta mil.
+"""
+from decimal import Decimal, InvalidOperation
+from functools import cached_property
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+
+from config import cache_paginas
+
+from .models import Producto
+
+# Clave del parámetro ?orden= -> (etiqueta, order_by). El pk desempata para que la paginación sea estable
+ORDENES = {
+    "nombre": ("Nombre", ("nombre", "pk")),
+    "precio": ("Precio: de menor a mayor", ("precio", "pk")),
+    "-precio": ("Precio: de mayor a menor", ("-precio", "-pk")),
+    "novedades": ("Novedades", ("-fecha_creacion", "-pk")),
+}
+ORDEN_POR_DEFECTO = "nombre"
+
+
+def _entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _precio(valor):
+    try:
+        precio = Decimal(valor)
+    except (TypeError, ValueError, InvalidOperation):
+        return None
+    return precio if precio.is_finite() and precio >= 0 else None
+
+
+def leer_filtros(parametros):
+    """
+    Filtros válidos de la query string (los valores incorrectos se ignoran).
+    """
+    orden = parametros.get("orden")
+    return {
+        "categoria": _entero(parametros.get("categoria")),
+        "precio_min": _precio(parametros.get("precio_min")),
+        "precio_max": _precio(parametros.get("precio_max")),
+        "disponibles": parametros.get("disponibles") == "1",
+        "orden": orden if orden in ORDENES else ORDEN_POR_DEFECTO,
+    }
+
+
+def _por_precio(queryset, filtros):
+    if filtros["precio_min"] is not None:
+        queryset = queryset.filter(precio__gte=filtros["precio_min"])
+    if filtros["precio_max"] is not None:
+        queryset = queryset.filter(precio__lte=filtros["precio_max"])
+    return queryset
+
+
+def filtrar(queryset, filtros):
+    queryset = _por_precio(queryset, filtros)
+    if filtros["categoria"] is not None:
+        queryset = queryset.filter(categoria_id=filtros["categoria"])
+    if filtros["disponibles"]:
+        queryset = queryset.filter(stock__gt=0)
+    return queryset.order_by(*ORDENES[filtros["orden"]][1])
+
+
+def facetas(queryset, filtros):
+    """
+    Facetas del catálogo con una sola consulta agrupada por categoría::
+
+        {"categorias": [{"id": 3, "nombre": "Libros", "productos": 120}, ...],
+         "disponibles": 310,   # con stock, en la categoría elegida (o todas)
+         "todos": 412,         # con y sin stock, en la categoría elegida (o todas)
+         "total": 310}         # resultados con todos los filtros aplicados
+
+    Cada faceta cuenta con el resto de filtros aplicados, pero no con el suyo:
+    el desplegable de categorías muestra cuántos productos habría al elegir otra.
+    """
+    filas = (_por_precio(queryset, filtros)
+             .order_by()
+             .values("categoria_id", "categoria__nombre")
+             .annotate(todos=Count("pk"), disponibles=Count("pk", filter=Q(stock__gt=0)))
+             .order_by("categoria__nombre"))
+    clave = "disponibles" if filtros["disponibles"] else "todos"
+    categorias, disponibles, todos = [], 0, 0
+    for fila in filas:
+        if fila["categoria_id"] is not None:
+            categorias.append({"id": fila["categoria_id"], "nombre": fila["categoria__nombre"],
+                               "productos": fila[clave]})
+        if filtros["categoria"] in (None, fila["categoria_id"]):
+            disponibles += fila["disponibles"]
+            todos += fila["todos"]
+    return {
+        "categorias": categorias,
+        "disponibles": disponibles,
+        "todos": todos,
+        "total": disponibles if filtros["disponibles"] else todos,
+    }
+
+
+def facetas_en_cache(filtros):
+    """
+    ``facetas`` de todo el catálogo, desde la caché si no ha cambiado desde que se calcularon.
+    """
+    cache = caches[cache_paginas.ALIAS]
+    clave = "tienda:facetas:{}:{categoria}:{precio_min}:{precio_max}:{disponibles}".format(
+        cache_paginas.version("tienda"), **filtros,
+    )
+    resultado = cache.get(clave)
+    if resultado is None:
+        resultado = facetas(Producto.objects.all(), filtros)
+        cache.set(clave, resultado, getattr(settings, "CACHE_PAGINAS_TTL", 60 * 5))
+    return resultado
+
+
+class PaginadorConTotal(Paginator):
+    """
+    ``Paginator`` con el número de resultados ya conocido (no hace ``COUNT``).
+    """
+
+    def __init__(self, object_list, per_page, total, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.total = total
+
+    @cached_property
+    def count(self):
+        return self.total
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0002_pedido_lineapedido'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='sku',
+            field=models.CharField(blank=True, help_text='Referencia única del producto (la usa import_catalog para actualizarlo)', max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-17 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0003_producto_sku'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['categoria', 'nombre'], name='producto_cat_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['categoria', 'precio'], name='producto_cat_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['categoria', '-fecha_creacion'], name='producto_cat_novedad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['nombre'], name='producto_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['precio'], name='producto_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['-fecha_creacion'], name='producto_novedad_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:20
+
+from django.db import migrations
+from django.db.models import Q
+
+
+def asignar_skus(apps, schema_editor):
+    """
+    Da una referencia a los productos que no tienen: sin ella, exportar y volver a importar los duplicaría.
+    """
+    Producto = apps.get_model('tienda', 'Producto')
+    usados = set(Producto.objects.exclude(sku=None).values_list('sku', flat=True))
+    cambios = []
+    for producto in Producto.objects.filter(Q(sku=None) | Q(sku='')).only('pk').iterator():
+        sku, n = f"P-{producto.pk:06d}", 2
+        while sku in usados:
+            sku, n = f"P-{producto.pk:06d}-{n}", n + 1
+        usados.add(sku)
+        producto.sku = sku
+        cambios.append(producto)
+    Producto.objects.bulk_update(cambios, ['sku'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0004_indices_catalogo'),
+    ]
+
+    operations = [
+        migrations.RunPython(asignar_skus, migrations.RunPython.noop),
+    ]
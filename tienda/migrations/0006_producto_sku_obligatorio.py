@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:21
+
+import tienda.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tienda', '0005_asignar_skus'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='producto',
+            name='sku',
+            field=models.CharField(default=tienda.models.nuevo_sku, help_text='Referencia única del producto (la usa import_catalog para actualizarlo)', max_length=64, unique=True),
+        ),
+    ]
@@ -1,5 +1,15 @@
+import uuid
+
 from django.db import models
 
+
+def nuevo_sku():
+    """
+    Referencia para los productos que se crean sin una (admin, tests): ``P-`` y 12 caracteres aleatorios.
+    """
+    return f"P-{uuid.uuid4().hex[:12].upper()}"
+
+
 # Categorías de productos (ejemplo: Libros, Tableros, Accesorios)
 class Categoria(models.Model):
     nombre = models.CharField(max_length=100, unique=True)
@@ -15,6 +25,8 @@ class Categoria(models.Model):
 
 # Modelo principal de Producto
 class Producto(models.Model):
+    sku = models.CharField(max_length=64, unique=True, default=nuevo_sku,
+                           help_text="Referencia única del producto (la usa import_catalog para actualizarlo)")
     nombre = models.CharField(max_length=200)
     autor = models.CharField(max_length=100, blank=True, null=True)  # opcional, útil para libros
     descripcion = models.TextField()
@@ -29,6 +41,15 @@ class Producto(models.Model):
         ordering = ['nombre']
         verbose_name = "Producto"
         verbose_name_plural = "Productos"
+        # Órdenes del catálogo (tienda/filtros.py), con y sin filtro de categoría
+        indexes = [
+            models.Index(fields=['categoria', 'nombre'], name='producto_cat_nombre_idx'),
+            models.Index(fields=['categoria', 'precio'], name='producto_cat_precio_idx'),
+            models.Index(fields=['categoria', '-fecha_creacion'], name='producto_cat_novedad_idx'),
+            models.Index(fields=['nombre'], name='producto_nombre_idx'),
+            models.Index(fields=['precio'], name='producto_precio_idx'),
+            models.Index(fields=['-fecha_creacion'], name='producto_novedad_idx'),
+        ]
 
     def __str__(self):
         return self.nombre
@@ -1,3 +1,5 @@
+from decimal import Decimal, InvalidOperation
+
 from django import template
 
 register = template.Library()
@@ -34,6 +36,7 @@ def mul(value, arg):
     Uso en plantilla: {{ producto.precio|mul:carrito|get_item:producto.id }}
     """
     try:
-        return float(value) * float(arg)
-    except (ValueError, TypeError):
+        # Decimal: los precios no pierden céntimos al pasar por float
+        return Decimal(str(value)) * Decimal(str(arg))
+    except (InvalidOperation, ValueError, TypeError):
         return 0
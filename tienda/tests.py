@@ -0,0 +1,219 @@
+import threading
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import caches
+from django.db import OperationalError, connection, transaction
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils.formats import localize
+
+from tienda.carrito import CLAVE_SESION
+from tienda.compra import ErrorCompra, StockInsuficiente, procesar_compra
+from tienda.forms import FormularioCompra
+from tienda.models import LineaPedido, Pedido, Producto
+from tienda.templatetags.tienda_extras import calc_subtotal
+
+DATOS_PEDIDO = {
+    "nombre": "Ana", "apellidos": "Pérez", "telefono": "555000", "email": "ana@example.com",
+    "direccion": "Calle 1",
+}
+
+
+def formulario():
+    form = FormularioCompra(DATOS_PEDIDO)
+    assert form.is_valid(), form.errors
+    return form
+
+
+class CompraConcurrenteTests(TransactionTestCase):
+    """
+    Muchas compras simultáneas del último stock: nunca se venden más unidades de las que hay.
+    """
+    COMPRADORES = 12
+    STOCK = 5
+    INTENTOS = 200
+
+    def setUp(self):
+        self.producto = Producto.objects.create(nombre="Libro de finales", descripcion="Libro",
+                                                precio=Decimal("12.50"), stock=self.STOCK)
+        self.otro = Producto.objects.create(nombre="Tablero", descripcion="Tablero",
+                                            precio=Decimal("30.00"), stock=100)
+        self.carrito = {str(self.producto.pk): 1, str(self.otro.pk): 1}
+
+    def comprar(self, inicio, resultados):
+        # Como un cliente que vuelve a pulsar "Realizar el pedido" mientras la tienda está ocupada
+        try:
+            inicio.wait()
+            for _ in range(self.INTENTOS):
+                try:
+                    procesar_compra(formulario(), self.carrito)
+                except StockInsuficiente:
+                    resultados.append("StockInsuficiente")
+                    return
+                except ErrorCompra:
+                    time.sleep(0.005)
+                    continue
+                resultados.append("vendido")
+                return
+            resultados.append("ocupada")
+        except Exception as exc:  # cualquier otro error sería un 500 en la vista
+            resultados.append(repr(exc))
+        finally:
+            connection.close()
+
+    def test_no_se_vende_mas_stock_del_que_hay(self):
+        inicio, resultados = threading.Event(), []
+        hilos = [threading.Thread(target=self.comprar, args=(inicio, resultados)) for _ in range(self.COMPRADORES)]
+        for hilo in hilos:
+            hilo.start()
+        inicio.set()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(sorted(resultados),
+                         ["StockInsuficiente"] * (self.COMPRADORES - self.STOCK) + ["vendido"] * self.STOCK)
+        self.producto.refresh_from_db()
+        self.otro.refresh_from_db()
+        self.assertEqual(self.producto.stock, 0)
+        self.assertEqual(self.otro.stock, 100 - self.STOCK)
+        self.assertEqual(Pedido.objects.count(), self.STOCK)
+        self.assertEqual(LineaPedido.objects.filter(producto=self.producto).count(), self.STOCK)
+
+    def test_tabla_bloqueada_por_otra_compra(self):
+        # Otra conexión tiene el bloqueo de escritura de la tabla de productos mientras se compra
+        bloqueada, soltar = threading.Event(), threading.Event()
+
+        def bloquear():
+            try:
+                with transaction.atomic():
+                    Producto.objects.filter(pk=self.otro.pk).update(stock=F("stock"))
+                    bloqueada.set()
+                    soltar.wait(10)
+            finally:
+                connection.close()
+
+        hilo = threading.Thread(target=bloquear)
+        hilo.start()
+        try:
+            self.assertTrue(bloqueada.wait(10))
+            with self.assertRaises(ErrorCompra) as error:
+                procesar_compra(formulario(), self.carrito)
+            self.assertNotIsInstance(error.exception, StockInsuficiente)
+        finally:
+            soltar.set()
+            hilo.join()
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, self.STOCK)
+        self.assertFalse(Pedido.objects.exists())
+
+    def test_tabla_bloqueada_al_releer_el_stock(self):
+        filtrar = Producto.objects.filter
+        llamadas = []
+
+        def filtrar_y_bloquear(*args, **kwargs):
+            # UPDATE y lectura dentro de la transacción; la tercera es la relectura tras deshacerla
+            llamadas.append(kwargs)
+            if len(llamadas) == 3:
+                raise OperationalError("database table is locked: tienda_producto")
+            return filtrar(*args, **kwargs)
+
+        with mock.patch.object(Producto.objects, "filter", side_effect=filtrar_y_bloquear):
+            with self.assertRaises(ErrorCompra) as error:
+                procesar_compra(formulario(), {str(self.producto.pk): self.STOCK + 1})
+        self.assertNotIsInstance(error.exception, StockInsuficiente)
+        self.assertEqual(len(llamadas), 3)
+
+    def test_sin_stock_no_crea_pedido_ni_reserva(self):
+        with self.assertRaises(StockInsuficiente) as error:
+            procesar_compra(formulario(), {str(self.producto.pk): self.STOCK + 1, str(self.otro.pk): 1})
+        self.assertEqual(error.exception.productos, [self.producto])
+        self.otro.refresh_from_db()
+        self.assertEqual(self.otro.stock, 100)
+        self.assertFalse(Pedido.objects.exists())
+
+
+class CarritoTests(TestCase):
+    """
+    Los importes del carrito, el checkout y la cabecera coinciden con los que
+    calculaba cada vista por su cuenta (``calc_subtotal`` sobre la sesión).
+    """
+    PRECIOS = ["0.10", "12.50", "19.99", "7.33", "150.00"]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.productos = [Producto.objects.create(nombre=f"Producto {i}", descripcion="Producto",
+                                                 precio=Decimal(precio), stock=10)
+                         for i, precio in enumerate(cls.PRECIOS)]
+
+    def setUp(self):
+        self.cantidades = {str(producto.pk): i + 1 for i, producto in enumerate(self.productos)}
+        session = self.client.session
+        session[CLAVE_SESION] = self.cantidades
+        session.save()
+
+    def total_anterior(self):
+        return calc_subtotal(Producto.objects.filter(id__in=self.cantidades.keys()), self.cantidades)
+
+    def test_pagina_del_carrito(self):
+        with self.assertNumQueries(2):  # sesión + productos
+            respuesta = self.client.get(reverse('tienda:carrito'))
+        carrito = respuesta.context['carrito']
+        self.assertEqual(carrito.total, self.total_anterior())
+        self.assertEqual(carrito.total, Decimal("864.39"))
+        for linea in carrito:
+            self.assertEqual(linea.subtotal, linea.producto.precio * self.cantidades[str(linea.producto.pk)])
+        self.assertContains(respuesta, f"${localize(self.total_anterior())}</span>")
+
+    def test_checkout(self):
+        with self.assertNumQueries(2):
+            respuesta = self.client.get(reverse('tienda:finalizar_compra'))
+        self.assertEqual(respuesta.context['carrito'].total, self.total_anterior())
+        self.assertContains(respuesta, f"${localize(self.total_anterior())}", count=2)  # subtotal y total
+
+    def test_contador_de_la_cabecera(self):
+        respuesta = self.client.get(reverse('tienda:carrito'))
+        total_unidades = sum(self.cantidades.values())
+        self.assertEqual(respuesta.context['carrito_compra'].num_articulos, total_unidades)
+        self.assertContains(respuesta, f'<span class="badge bg-success">{total_unidades}</span>', html=True)
+
+    def test_ignora_entradas_manipuladas(self):
+        session = self.client.session
+        session[CLAVE_SESION] = {**self.cantidades, "abc": 2, str(self.productos[0].pk + 1000): "x",
+                                 str(self.productos[1].pk): -4}
+        session.save()
+        respuesta = self.client.get(reverse('tienda:carrito'))
+        carrito = respuesta.context['carrito']
+        del self.cantidades[str(self.productos[1].pk)]
+        self.assertEqual(carrito.total, self.total_anterior())
+        self.assertEqual(carrito.num_articulos, sum(self.cantidades.values()))
+
+    def test_cambios_recalculan_el_total(self):
+        self.client.get(reverse('tienda:agregar_carrito', args=[self.productos[0].pk]))
+        self.client.get(reverse('tienda:eliminar_carrito', args=[self.productos[4].pk]))
+        self.cantidades[str(self.productos[0].pk)] += 1
+        del self.cantidades[str(self.productos[4].pk)]
+        self.assertEqual(self.client.session[CLAVE_SESION], self.cantidades)
+        respuesta = self.client.get(reverse('tienda:carrito'))
+        self.assertEqual(respuesta.context['carrito'].total, self.total_anterior())
+
+
+class CatalogoTrasLaCompraTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.ultimo = Producto.objects.create(nombre="Libro de finales", descripcion="Libro",
+                                              precio=Decimal("12.50"), stock=1)
+        Producto.objects.create(nombre="Tablero", descripcion="Tablero", precio=Decimal("30.00"), stock=5)
+
+    def disponibles(self):
+        respuesta = self.client.get(reverse('tienda:listado'), {"disponibles": "1"})
+        return respuesta.context['page_obj'].paginator.count, respuesta.context['facetas']['disponibles']
+
+    def test_vender_el_ultimo_invalida_el_total_en_cache(self):
+        self.assertEqual(self.disponibles(), (2, 2))
+        with self.captureOnCommitCallbacks(execute=True):
+            procesar_compra(formulario(), {str(self.ultimo.pk): 1})
+        self.assertEqual(self.disponibles(), (1, 1))
@@ -1,11 +1,16 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.db.models import Q
-from .models import Producto, Categoria, Pedido, LineaPedido
+from .models import Producto, Categoria, Pedido
 from .forms import FormularioCompra
+from .carrito import Carrito
+from .compra import ErrorCompra, procesar_compra
+from .filtros import ORDENES, PaginadorConTotal, facetas_en_cache, filtrar, leer_filtros
+from config.cache_paginas import cache_anonimo
 
 # -----------------------------
 # Página principal de la Tienda
 # -----------------------------
+@cache_anonimo("tienda")
 def home(request):
     destacados = Producto.objects.order_by('-fecha_creacion')[:4]
     categorias = Categoria.objects.all()
@@ -15,20 +20,21 @@ def home(request):
     })
 
 # -----------------------------
-# Listado completo de productos
+# Listado completo de productos (paginado, con filtros y facetas)
 # -----------------------------
-def listado_productos(request):
-    productos = Producto.objects.all().order_by('nombre')
-    categorias = Categoria.objects.all()
+PRODUCTOS_POR_PAGINA = 24
 
-    categoria_id = request.GET.get('categoria')
-    if categoria_id:
-        productos = productos.filter(categoria_id=categoria_id)
+def listado_productos(request):
+    filtros = leer_filtros(request.GET)
+    resumen = facetas_en_cache(filtros)
+    productos = filtrar(Producto.objects.select_related('categoria'), filtros)
+    page_obj = PaginadorConTotal(productos, PRODUCTOS_POR_PAGINA, resumen['total']).get_page(request.GET.get('page'))
 
     return render(request, 'tienda/listado.html', {
-        'productos': productos,
-        'categorias': categorias,
-        'categoria_seleccionada': categoria_id
+        'page_obj': page_obj,
+        'facetas': resumen,
+        'filtros': filtros,
+        'ordenes': [(clave, etiqueta) for clave, (etiqueta, _) in ORDENES.items()],
     })
 
 # -----------------------------
@@ -62,67 +68,46 @@ def buscar_productos(request):
     })
 
 # -----------------------------
-# Carrito de compras (simple con sesión)
+# Carrito de compras (en la sesión, ver tienda/carrito.py)
 # -----------------------------
 def carrito(request):
-    carrito = request.session.get('carrito', {})
-    productos = Producto.objects.filter(id__in=carrito.keys())
     return render(request, 'tienda/carrito.html', {
-        'productos': productos,
-        'carrito': carrito,
+        'carrito': Carrito.de_request(request),
     })
 
 def agregar_carrito(request, producto_id):
-    carrito = request.session.get('carrito', {})
-    carrito[str(producto_id)] = carrito.get(str(producto_id), 0) + 1
-    request.session['carrito'] = carrito
+    Carrito.de_request(request).agregar(producto_id)
     return redirect('tienda:carrito')
 
 def eliminar_carrito(request, producto_id):
-    carrito = request.session.get('carrito', {})
-    carrito.pop(str(producto_id), None)
-    request.session['carrito'] = carrito
+    Carrito.de_request(request).eliminar(producto_id)
     return redirect('tienda:carrito')
 
 def vaciar_carrito(request):
-    request.session['carrito'] = {}
+    Carrito.de_request(request).vaciar()
     return redirect('tienda:carrito')
 
 # -----------------------------
 # Checkout (Finalizar compra)
 # -----------------------------
 def finalizar_compra(request):
-    carrito = request.session.get('carrito', {})
-    productos = Producto.objects.filter(id__in=carrito.keys())
+    carrito = Carrito.de_request(request)
 
     if request.method == 'POST':
         form = FormularioCompra(request.POST)
         if form.is_valid():
-            pedido = form.save(commit=False)
-            pedido.total = 0
-            pedido.save()
-
-            # Crear líneas de pedido
-            for producto in productos:
-                cantidad = carrito[str(producto.id)]
-                linea = LineaPedido.objects.create(
-                    pedido=pedido,
-                    producto=producto,
-                    cantidad=cantidad,
-                    precio_unitario=producto.precio
-                )
-                pedido.total += linea.subtotal()
-
-            pedido.save()
-            request.session['carrito'] = {}  # vaciar carrito
-
-            return redirect('tienda:confirmacion', pedido_id=pedido.id)
+            try:
+                pedido = procesar_compra(form, carrito.cantidades)
+            except ErrorCompra as exc:
+                form.add_error(None, str(exc))
+            else:
+                carrito.vaciar()
+                return redirect('tienda:confirmacion', pedido_id=pedido.id)
     else:
         form = FormularioCompra()
 
     return render(request, 'tienda/checkout.html', {
         'form': form,
-        'productos': productos,
         'carrito': carrito,
     })
 